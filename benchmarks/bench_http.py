@@ -0,0 +1,137 @@
+"""Benchmark des moteurs HTTP de Spotag sur la route /spotify
+
+Chaque moteur tourne dans un processus séparé (pour ne pas partager le GIL
+avec les clients) et reçoit des requêtes depuis plusieurs threads. Chaque client
+réutilise sa connexion si le moteur la garde ouverte (threaded, asyncio) et se
+reconnecte sinon (dev : une requête par connexion).
+L'ouverture réelle des liens est désactivée : seul le coût HTTP est mesuré.
+
+Usage :
+    python benchmarks/bench_http.py --requests 2000 --concurrency 16
+"""
+import argparse
+import http.client
+import multiprocessing
+import os
+import socket
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+ENGINES = ("dev", "threaded", "asyncio")
+PATH = "/spotify?link=spotify:playlist:37i9dQZF1DXcBWIGoYBM5M"
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _serve(engine, port, ready):
+    import logging
+    import spotag_dispatch
+    import spotag_web
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    spotag_web.dispatcher = spotag_dispatch.DispatchQueue(lambda link: None)
+    # Toutes les requêtes viennent du même client : ne pas les limiter
+    spotag_web.admission.configure(ip_rate=0, uri_rate=0, max_in_flight=0)
+    sys.stdout = open(os.devnull, "w")
+
+    if engine == "dev":
+        # Ce que fait app.run() : serveur de développement multi-thread
+        from werkzeug.serving import make_server
+        server = make_server("127.0.0.1", port, spotag_web.app, threaded=True)
+        ready.set()
+        server.serve_forever()
+    elif engine == "threaded":
+        import spotag_server
+        server = spotag_server.make_threaded_server(spotag_web.app, host="127.0.0.1", port=port)
+        ready.set()
+        server.serve_forever()
+    elif engine == "asyncio":
+        import spotag_fastpath
+        server = spotag_fastpath.make_fastpath_server(spotag_web.app, host="127.0.0.1", port=port)
+        server.start_in_thread()
+        ready.set()
+        threading.Event().wait()
+
+
+def _client(port, count, latencies, errors):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    for _ in range(count):
+        start = time.perf_counter()
+        try:
+            conn.request("GET", PATH)
+            response = conn.getresponse()
+            response.read()
+            if response.status != 200:
+                errors.append(response.status)
+        except (OSError, http.client.HTTPException) as e:
+            errors.append(e)
+            conn.close()
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+            continue
+        latencies.append(time.perf_counter() - start)
+    conn.close()
+
+
+def run(engine, requests, concurrency):
+    ctx = multiprocessing.get_context("spawn")
+    port = _free_port()
+    ready = ctx.Event()
+    proc = ctx.Process(target=_serve, args=(engine, port, ready), daemon=True)
+    proc.start()
+    try:
+        if not ready.wait(30):
+            raise RuntimeError(f"le moteur {engine} n'a pas démarré")
+        # Laisser le temps au socket de passer en écoute, puis chauffer
+        time.sleep(0.2)
+        _client(port, 50, [], [])
+
+        latencies, errors = [], []
+        per_client = max(1, requests // concurrency)
+        threads = [threading.Thread(target=_client, args=(port, per_client, latencies, errors))
+                   for _ in range(concurrency)]
+        start = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - start
+    finally:
+        proc.terminate()
+        proc.join()
+
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] if latencies else 0
+    return {
+        "engine": engine,
+        "requests": len(latencies),
+        "errors": len(errors),
+        "rps": len(latencies) / elapsed if elapsed else 0,
+        "p50": statistics.median(latencies) * 1000 if latencies else 0,
+        "p99": p99 * 1000,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--engines", nargs="+", choices=ENGINES, default=list(ENGINES))
+    args = parser.parse_args(argv)
+
+    print(f"{'moteur':<10} {'requêtes':>9} {'erreurs':>8} {'req/s':>10} {'p50 (ms)':>9} {'p99 (ms)':>9}")
+    for engine in args.engines:
+        r = run(engine, args.requests, args.concurrency)
+        print(f"{r['engine']:<10} {r['requests']:>9} {r['errors']:>8} {r['rps']:>10.0f} "
+              f"{r['p50']:>9.2f} {r['p99']:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
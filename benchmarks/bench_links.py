@@ -0,0 +1,70 @@
+"""Microbenchmark de l'analyse des liens Spotify
+
+Compare l'ancien découpage par ``split('/')`` de l'interface avec
+``spotag_links`` : premier passage (cache vide) puis liens déjà vus (cache
+LRU), sur un mélange de formes d'URL réelles.
+
+Usage :
+    python benchmarks/bench_links.py --number 200000
+"""
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import spotag_links
+
+LINKS = [
+    "https://open.spotify.com/track/4uLU6hMCjMI75M1A2tKUQC?si=1f2e3d4c5b6a7988",
+    "https://open.spotify.com/intl-fr/album/1ATL5GLyefJaxhQzSPVrLX",
+    "https://open.spotify.com/playlist/37i9dQZF1DXcBWIGoYBM5M?si=abc&utm_source=copy-link",
+    "https://open.spotify.com/intl-de/artist/0OdUWJ0sBjDrqHygGUXeCF?si=xyz",
+    "https://open.spotify.com/episode/512ojhOuo1ktJprKbVcKyQ",
+]
+
+
+def split_parse(link):
+    """Ancienne analyse de convert_link (sans validation du domaine ni de l'identifiant)"""
+    parts = link.split('/')
+    if len(parts) >= 6 and parts[3].startswith('intl-'):
+        spotify_type, spotify_id = parts[4], parts[5].split('?')[0]
+    else:
+        spotify_type, spotify_id = parts[3], parts[4].split('?')[0]
+    return f"spotify:{spotify_type}:{spotify_id}"
+
+
+def compiled_uncached(link):
+    return spotag_links._parse.__wrapped__(link).uri
+
+
+def compiled_cached(link):
+    return spotag_links.canonical_uri(link)
+
+
+def bench(function, number):
+    per_round = len(LINKS)
+    rounds = max(1, number // per_round)
+    elapsed = timeit.timeit(lambda: [function(link) for link in LINKS], number=rounds)
+    return elapsed / (rounds * per_round) * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=200000)
+    args = parser.parse_args()
+
+    for link in LINKS:
+        assert split_parse(link) == compiled_cached(link), link
+
+    print(f"{'analyse':<22}{'ns/lien':>10}")
+    for name, function in (("split", split_parse),
+                           ("regex (sans cache)", compiled_uncached),
+                           ("regex (cache LRU)", compiled_cached)):
+        print(f"{name:<22}{bench(function, args.number):>10.0f}")
+    print(spotag_links.cache_info())
+
+
+if __name__ == "__main__":
+    main()
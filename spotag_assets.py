@@ -0,0 +1,146 @@
+"""Cache des images dérivées des icônes de Spotag
+
+Réduire une image avec PIL prend une centaine de millisecondes et charge
+plusieurs mégaoctets de bibliothèques. Chaque image dérivée est donc
+produite une seule fois et rangée dans le dossier cache de l'utilisateur,
+sous un nom tiré de l'empreinte SHA-256 du fichier source et des paramètres :
+un source modifié donne simplement un autre nom.
+
+Les icônes de la fenêtre et de la barre système suivent le même principe :
+PNG carrés aux tailles ``ICON_SIZES`` (lus directement par Tk) et fichier
+ICO pour Windows, produits au premier lancement seulement.
+
+Quand ``IN_PROCESS`` vaut False (mode serveur seul), PIL n'est jamais importé
+dans le processus : une image absente du cache est produite par un processus
+enfant éphémère.
+
+Usage :
+    python spotag_assets.py --shrink 160 < spotag2.png > icone.png
+"""
+import argparse
+import hashlib
+import io
+import os
+import subprocess
+import sys
+
+
+IN_PROCESS = True
+CHILD_TIMEOUT = 30
+ICON_SIZES = (16, 32, 48, 64)
+
+
+def user_cache_dir():
+    """Dossier cache de Spotag selon le système (XDG, Library/Caches, LOCALAPPDATA)"""
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~\\AppData\\Local")
+        return os.path.join(base, "Spotag", "cache")
+    if sys.platform == "darwin":
+        return os.path.expanduser("~/Library/Caches/Spotag")
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(base, "spotag")
+
+
+CACHE_DIR = user_cache_dir()
+
+
+def cache_path(data, variant, extension):
+    """Chemin de l'image dérivée de ``data`` (contenu du source) pour ce variant"""
+    digest = hashlib.sha256(data).hexdigest()[:16]
+    return os.path.join(CACHE_DIR, f"{digest}-{variant}{extension}")
+
+
+def read_cached(path):
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def write_cached(path, data):
+    """Écriture atomique : un autre processus ne lit jamais un fichier à moitié écrit"""
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_file = f"{path}.{os.getpid()}.tmp"
+        with open(temp_file, "wb") as f:
+            f.write(data)
+        os.replace(temp_file, path)
+    except OSError as e:
+        print(f"⚠️ Cache d'images inutilisable ({e})")
+
+
+def _shrink(data, size):
+    from PIL import Image
+    image = Image.open(io.BytesIO(data))
+    image.thumbnail((size, size), Image.Resampling.LANCZOS)
+    output = io.BytesIO()
+    image.save(output, format="PNG", optimize=True)
+    return output.getvalue()
+
+
+def _shrink_in_child(data, size):
+    result = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--shrink", str(size)],
+        input=data, capture_output=True, timeout=CHILD_TIMEOUT,
+    )
+    if result.returncode != 0 or not result.stdout:
+        raise RuntimeError(result.stderr.decode("utf-8", "replace").strip() or "échec")
+    return result.stdout
+
+
+def shrunk_png(data, size):
+    """PNG réduit à ``size`` px au plus (inchangé si PIL est absent ou si c'est plus gros)"""
+    path = cache_path(data, f"{size}px", ".png")
+    cached = read_cached(path)
+    if cached is not None:
+        return cached
+    try:
+        if IN_PROCESS:
+            shrunk = _shrink(data, size)
+        else:
+            shrunk = _shrink_in_child(data, size)
+    except ImportError:
+        return data
+    except Exception as e:
+        print(f"Erreur lors de la réduction de l'icône: {e}")
+        return data
+    result = min(data, shrunk, key=len)
+    write_cached(path, result)
+    return result
+
+
+def _make_icons(data, paths, ico_path):
+    from PIL import Image
+    source = Image.open(io.BytesIO(data)).convert("RGBA")
+    for size, path in paths.items():
+        output = io.BytesIO()
+        source.resize((size, size), Image.Resampling.LANCZOS).save(output, format="PNG")
+        write_cached(path, output.getvalue())
+    output = io.BytesIO()
+    source.save(output, format="ICO", sizes=[(size, size) for size in paths])
+    write_cached(ico_path, output.getvalue())
+
+
+def icon_files(source, sizes=ICON_SIZES):
+    """Chemins des icônes dérivées de ``source`` : {taille: PNG} et "ico" (produites au besoin)"""
+    with open(source, "rb") as f:
+        data = f.read()
+    paths = {size: cache_path(data, f"icon{size}", ".png") for size in sizes}
+    ico_path = cache_path(data, "icon", ".ico")
+    if not all(os.path.exists(path) for path in list(paths.values()) + [ico_path]):
+        _make_icons(data, paths, ico_path)
+    return dict(paths, ico=ico_path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Produit les images dérivées des icônes")
+    parser.add_argument("--shrink", type=int, required=True, metavar="PX",
+                        help="réduit le PNG lu sur stdin et l'écrit sur stdout")
+    args = parser.parse_args(argv)
+    sys.stdout.buffer.write(_shrink(sys.stdin.buffer.read(), args.shrink))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
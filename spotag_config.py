@@ -0,0 +1,118 @@
+"""Configuration de Spotag (fichier JSON dans le dossier courant)
+
+Ce module n'importe aucune bibliothèque d'interface (tkinter, pystray, PIL) :
+la configuration peut être lue avant que l'interface soit chargée. Les valeurs
+par défaut sont écrites telles quelles (ce sont celles des constantes
+DEFAULT_* de chaque module) pour ne charger ni werkzeug ni sqlite3 ici.
+"""
+import json
+import os
+import sys
+
+
+CONFIG_FILE = "spotify_nfc_config.json"
+
+
+def user_data_dir():
+    """Dossier de données de Spotag selon le système (XDG, Application Support, APPDATA)"""
+    if sys.platform == "win32":
+        base = os.environ.get("APPDATA") or os.path.expanduser("~\\AppData\\Roaming")
+        return os.path.join(base, "Spotag")
+    if sys.platform == "darwin":
+        return os.path.expanduser("~/Library/Application Support/Spotag")
+    base = os.environ.get("XDG_DATA_HOME") or os.path.expanduser("~/.local/share")
+    return os.path.join(base, "spotag")
+
+
+# Jamais relatif : le dossier courant d'un service ou d'un raccourci est souvent / ou $HOME
+REGISTRY_FILE = os.path.join(user_data_dir(), "tags.db")
+DEFAULT_CONFIG = {
+    "auto_start": False,
+    "server_port": 5000,
+    # "threaded" : pool de threads borné, "prefork" : plusieurs processus (SO_REUSEPORT),
+    # "asyncio" : boucle d'événements pour /spotify, "dev" : serveur de développement Flask
+    "server_mode": "threaded",
+    "server_processes": max(2, os.cpu_count() or 2),
+    "server_workers": 8,
+    "server_backlog": 128,
+    "server_timeout": 5,
+    # Secondes pendant lesquelles un même lien scanné à nouveau n'est pas rouvert
+    "dispatch_coalesce_window": 2.0,
+    # N'ouvrir que le dernier lien quand plusieurs attendent
+    "dispatch_drop_superseded": True,
+    # Scans par seconde et rafale autorisés par téléphone et par lien (0 pour désactiver)
+    "limit_ip_rate": 2.0,
+    "limit_ip_burst": 5,
+    "limit_uri_rate": 1.0,
+    "limit_uri_burst": 3,
+    "limit_max_in_flight": 32,
+    # "auto", "webbrowser", "xdg-open", "spotify", "mpris" ou "command" (voir launcher_command)
+    "launcher_backend": "auto",
+    "launcher_command": "",
+    # Lancer les programmes depuis un petit processus auxiliaire (Linux/macOS)
+    "launcher_helper": True,
+    # Nom D-Bus du lecteur pour le backend "mpris"
+    "mpris_bus_name": "org.mpris.MediaPlayer2.spotify",
+    # Démarrer Spotify à l'avance : "off", "boot" (au démarrage) ou "connect" (à la connexion d'un téléphone)
+    "prewarm_policy": "off",
+    # Commande qui démarre Spotify (vide : commande par défaut du système)
+    "prewarm_command": "",
+    # Secondes entre deux vérifications qui relancent Spotify s'il a été fermé (0 : jamais)
+    "prewarm_keep_warm": 0,
+    # Secondes entre deux lectures des interfaces réseau quand netlink n'est pas disponible
+    "network_poll_interval": 10.0,
+    # Base des codes courts servis par /t/<code> (vide pour désactiver)
+    "registry_file": REGISTRY_FILE,
+    # Lecteur NFC USB branché sur le PC : "off", "pcsc" ou "simulated" (rejoue reader_replay_path)
+    "reader_mode": "off",
+    "reader_name": "",
+    "reader_poll_interval": 0.2,
+    "reader_replay_path": "",
+}
+
+
+class Config(dict):
+    """Configuration complète (fichier et valeurs par défaut)
+
+    Seules les clés lues dans le fichier ou modifiées ensuite sont sauvegardées :
+    les valeurs par défaut ne sont jamais figées dans le fichier de l'utilisateur.
+    """
+
+    def __init__(self, settings=None):
+        super().__init__(DEFAULT_CONFIG)
+        self.user_keys = set()
+        for key, value in (settings or {}).items():
+            self[key] = value
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.user_keys.add(key)
+
+    def user_settings(self):
+        """Clés choisies par l'utilisateur, à écrire dans le fichier"""
+        return {key: self[key] for key in self if key in self.user_keys}
+
+
+def load_config(path=CONFIG_FILE):
+    """Configuration du fichier, complétée par les valeurs par défaut"""
+    try:
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                return Config(json.load(f))
+    except Exception as e:
+        print(f"Erreur lors du chargement de la configuration: {e}")
+    return Config()
+
+
+def save_config(config, path=CONFIG_FILE):
+    """Écrit les réglages de l'utilisateur (sans les valeurs par défaut d'un Config)"""
+    if isinstance(config, Config):
+        config = config.user_settings()
+    try:
+        # Fichier temporaire puis remplacement : jamais de configuration à moitié écrite
+        temp_file = path + ".tmp"
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump(config, f, indent=2, ensure_ascii=False)
+        os.replace(temp_file, path)
+    except Exception as e:
+        print(f"Erreur lors de la sauvegarde de la configuration: {e}")
@@ -0,0 +1,404 @@
+"""Conversion en masse de liens Spotify en URL Spotag
+
+Lit des liens depuis stdin ou des fichiers (texte, CSV, JSON ou JSON Lines)
+et écrit au fil de l'eau l'URL Spotag et l'URI de chacun. Les entrées sont
+lues et converties par lots, les tableaux JSON élément par élément (même
+dans un objet enveloppe) : la mémoire reste constante quelle que soit la
+taille de l'export. Les lignes invalides sont signalées sur stderr sans
+interrompre la conversion.
+
+Usage :
+    python spotag_convert.py playlist.csv --host 192.168.1.20 > tags.tsv
+    cat liens.txt | python spotag_convert.py --output jsonl
+    python spotag_convert.py export.json --workers 4 --output csv
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import spotag_config
+import spotag_links
+
+
+INPUT_FORMATS = ("auto", "text", "csv", "json", "jsonl")
+OUTPUT_FORMATS = ("tsv", "csv", "jsonl")
+BATCH_SIZE = 2048
+JSON_CHUNK = 64 * 1024
+MAX_JSON_VALUE = 1024 * 1024
+# Colonnes ou clés essayées en premier dans les exports
+LINK_KEYS = ("uri", "url", "link", "spotify_track_uri", "spotify_episode_uri",
+             "track_uri", "track uri", "spotify_url", "external_urls")
+
+
+def configured_port(default=None):
+    """Port du serveur d'après la configuration de Spotag (fichier et valeurs par défaut)"""
+    try:
+        return int(spotag_config.load_config().get("server_port"))
+    except (TypeError, ValueError):
+        return default or spotag_config.DEFAULT_CONFIG["server_port"]
+
+
+def find_link(value, depth=0):
+    """Premier lien Spotify reconnu dans une valeur (texte, liste ou objet JSON)"""
+    if isinstance(value, str):
+        return value if spotag_links.canonical_uri(value) else None
+    if depth > 2:
+        return None
+    if isinstance(value, dict):
+        keys = [k for k in LINK_KEYS if k in value]
+        keys += [k for k in value if k not in LINK_KEYS]
+        value = [value[k] for k in keys]
+    if isinstance(value, list):
+        for item in value:
+            link = find_link(item, depth + 1)
+            if link:
+                return link
+    return None
+
+
+def detect_format(name, first_line):
+    extension = os.path.splitext(name)[1].lower()
+    if extension == ".csv":
+        return "csv"
+    if extension in (".jsonl", ".ndjson"):
+        return "jsonl"
+    first_line = first_line.strip()
+    if extension == ".json" or first_line.startswith(("[", "{")):
+        # Un objet complet sur la première ligne : une entrée par ligne (JSON Lines)
+        if first_line.startswith("{"):
+            try:
+                if isinstance(json.loads(first_line), dict):
+                    return "jsonl"
+            except ValueError:
+                pass
+        return "json"
+    return "text"
+
+
+def iter_text(stream):
+    for number, line in enumerate(stream, 1):
+        line = line.strip()
+        if line and not line.startswith("#"):
+            yield number, line
+
+
+def iter_csv(stream):
+    """Une entrée par ligne : la colonne du lien est choisie sur l'en-tête, sinon cellule par cellule"""
+    reader = csv.reader(stream)
+    column = None
+    for row in reader:
+        number = reader.line_num
+        if not row:
+            continue
+        if number == 1:
+            header = [cell.strip().lower() for cell in row]
+            column = next((header.index(k) for k in LINK_KEYS if k in header), None)
+            if column is not None or not any(find_link(cell) for cell in row):
+                continue  # ligne d'en-tête
+        if column is not None and column < len(row):
+            yield number, row[column].strip()
+        else:
+            yield number, find_link(row) or ",".join(row)
+
+
+def _entries(value):
+    """Texte à convertir pour chaque entrée d'une valeur JSON décodée"""
+    lists = [v for v in value.values() if isinstance(v, list)] if isinstance(value, dict) else []
+    if lists and not find_link(value):
+        # Objet enveloppe (ex. {"items": [...]}) : convertir ses listes
+        for items in lists:
+            for item in items:
+                yield find_link(item) or json.dumps(item, ensure_ascii=False)[:80]
+        return
+    yield find_link(value) or json.dumps(value, ensure_ascii=False)[:80]
+
+
+def iter_jsonl(stream):
+    """Une valeur JSON par ligne ; une ligne illisible est signalée puis sautée"""
+    for number, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            value = json.loads(line)
+        except ValueError:
+            yield number, line[:80]
+            continue
+        for text in _entries(value):
+            yield number, text
+
+
+class _JSONStream:
+    """Décode les valeurs d'un document JSON une à une, par blocs de JSON_CHUNK"""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.position = 0
+        self.eof = False
+
+    def _fill(self):
+        if self.eof:
+            return False
+        chunk = self.stream.read(JSON_CHUNK)
+        self.buffer = self.buffer[self.position:] + chunk
+        self.position = 0
+        self.eof = not chunk
+        return True
+
+    def peek(self):
+        """Prochain caractère significatif ("" en fin de flux)"""
+        while True:
+            while self.position < len(self.buffer) and self.buffer[self.position] in " \t\r\n":
+                self.position += 1
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+            if not self._fill():
+                return ""
+
+    def expect(self, char):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"« {char} » attendu, « {found[:1] or 'fin du fichier'} » trouvé")
+        self.position += 1
+
+    def value(self):
+        """Valeur suivante, lue en entier (au plus MAX_JSON_VALUE caractères)"""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.position)
+                # Un nombre en fin de bloc peut continuer dans le bloc suivant
+                complete = end < len(self.buffer) or self.eof
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+                complete = False
+            if complete:
+                self.position = end
+                return value
+            if len(self.buffer) - self.position > MAX_JSON_VALUE:
+                raise ValueError(f"élément de plus de {MAX_JSON_VALUE} caractères")
+            self._fill()
+
+
+def _iter_array(reader):
+    """Éléments d'un tableau, décodés un par un"""
+    reader.expect("[")
+    if reader.peek() == "]":
+        reader.position += 1
+        return
+    while True:
+        yield reader.value()
+        separator = reader.peek()
+        if separator == "]":
+            reader.position += 1
+            return
+        reader.expect(",")
+
+
+def _iter_wrapper(reader):
+    """Objet de premier niveau : ses tableaux sont parcourus élément par élément"""
+    reader.expect("{")
+    fields = {}
+    streamed = False
+    first = True
+    while reader.peek() != "}":
+        if not first:
+            reader.expect(",")
+        first = False
+        key = reader.value()
+        if not isinstance(key, str):
+            raise ValueError("nom de clé attendu")
+        reader.expect(":")
+        if reader.peek() == "[":
+            streamed = True
+            for item in _iter_array(reader):
+                yield from _entries(item)
+        else:
+            fields[key] = reader.value()
+    reader.position += 1
+    if not streamed or find_link(fields):
+        yield from _entries(fields)
+
+
+def iter_json(stream):
+    """Éléments d'un tableau JSON ou des tableaux d'un objet enveloppe ({"items": [...]})
+
+    Les éléments sont décodés un par un : la mémoire ne dépend pas de la
+    taille du fichier. Un document mal formé est signalé et arrête la lecture
+    de ce fichier (on ne peut pas retrouver le début de l'élément suivant).
+    """
+    reader = _JSONStream(stream)
+    number = 0
+    try:
+        while True:
+            char = reader.peek()
+            if not char:
+                return
+            if char == "[":
+                texts = (text for item in _iter_array(reader) for text in _entries(item))
+            elif char == "{":
+                texts = _iter_wrapper(reader)
+            else:
+                texts = _entries(reader.value())
+            for text in texts:
+                number += 1
+                yield number, text
+    except ValueError as e:
+        number += 1
+        yield number, f"JSON invalide ({e})"
+
+
+class _Pushback:
+    """Remet devant le flux la première ligne lue pour détecter le format"""
+
+    def __init__(self, first, stream):
+        self._first = first
+        self._stream = stream
+
+    def read(self, size=-1):
+        first, self._first = self._first, ""
+        if size is None or size < 0:
+            return first + self._stream.read()
+        return first + self._stream.read(max(0, size - len(first)))
+
+    def __iter__(self):
+        if self._first:
+            first, self._first = self._first, ""
+            if not first.endswith("\n"):
+                # Première ligne lue en partie seulement (readline limité)
+                first += next(iter(self._stream), "")
+            yield first
+        yield from self._stream
+
+
+def read_entries(stream, name, input_format="auto"):
+    """(position, texte) pour chaque entrée de la source"""
+    if input_format == "auto":
+        # Lecture bornée : un JSON minifié tient souvent sur une seule ligne
+        first = stream.readline(JSON_CHUNK)
+        input_format = detect_format(name, first.lstrip("\ufeff"))
+        stream = _Pushback(first.lstrip("\ufeff"), stream)
+    if input_format == "csv":
+        return iter_csv(stream)
+    if input_format == "json":
+        return iter_json(stream)
+    if input_format == "jsonl":
+        return iter_jsonl(stream)
+    return iter_text(stream)
+
+
+def convert_batch(batch, host, port):
+    """Convertit un lot ; retourne (position, texte, url, uri) avec url None si invalide"""
+    results = []
+    for number, text in batch:
+        uri = spotag_links.canonical_uri(text)
+        url = spotag_links.spotag_url(uri, host, port) if uri else None
+        results.append((number, text, url, uri))
+    return results
+
+
+def batches(entries, size=BATCH_SIZE):
+    batch = []
+    for entry in entries:
+        batch.append(entry)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def convert_stream(entries, host, port, workers=0):
+    """Lots convertis dans l'ordre ; avec des workers, au plus 2 lots en attente par worker"""
+    if workers <= 1:
+        for batch in batches(entries):
+            yield convert_batch(batch, host, port)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = []
+        for batch in batches(entries):
+            pending.append(pool.submit(convert_batch, batch, host, port))
+            if len(pending) >= workers * 2:
+                yield pending.pop(0).result()
+        for future in pending:
+            yield future.result()
+
+
+class Writer:
+    """Écrit les résultats dans le format demandé"""
+
+    def __init__(self, stream, output_format):
+        self.stream = stream
+        self.output_format = output_format
+        if output_format == "csv":
+            self._csv = csv.writer(stream)
+            self._csv.writerow(("input", "spotag_url", "uri"))
+
+    def write(self, text, url, uri):
+        if self.output_format == "csv":
+            self._csv.writerow((text, url, uri))
+        elif self.output_format == "jsonl":
+            self.stream.write(json.dumps({"input": text, "spotag_url": url, "uri": uri},
+                                         ensure_ascii=False) + "\n")
+        else:
+            self.stream.write(f"{url}\t{uri}\n")
+
+
+def open_inputs(paths):
+    if not paths or paths == ["-"]:
+        yield "<stdin>", sys.stdin
+        return
+    for path in paths:
+        if path == "-":
+            yield "<stdin>", sys.stdin
+            continue
+        with open(path, encoding="utf-8-sig", newline="") as f:
+            yield path, f
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convertit des liens Spotify en URL Spotag")
+    parser.add_argument("inputs", nargs="*", help="fichiers à convertir (stdin par défaut)")
+    parser.add_argument("--host", help="adresse du PC (par défaut : adresse locale détectée)")
+    parser.add_argument("--port", type=int, help="port du serveur (par défaut : configuration)")
+    parser.add_argument("--input-format", choices=INPUT_FORMATS, default="auto")
+    parser.add_argument("--output", choices=OUTPUT_FORMATS, default="tsv")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="processus de conversion (0 : dans le processus courant)")
+    args = parser.parse_args(argv)
+
+    host = args.host
+    if host is None:
+        import spotag_net
+        host = spotag_net.NetworkAddressService().primary
+    port = args.port or configured_port()
+
+    writer = Writer(sys.stdout, args.output)
+    converted = invalid = 0
+    start = time.perf_counter()
+    for name, stream in open_inputs(args.inputs):
+        entries = read_entries(stream, name, args.input_format)
+        for results in convert_stream(entries, host, port, args.workers):
+            for number, text, url, uri in results:
+                if url is None:
+                    invalid += 1
+                    print(f"⚠️ {name}:{number}: lien invalide: {text}", file=sys.stderr)
+                    continue
+                converted += 1
+                writer.write(text, url, uri)
+    sys.stdout.flush()
+    elapsed = time.perf_counter() - start
+    print(f"✅ {converted} liens convertis, {invalid} invalides en {elapsed:.2f} s",
+          file=sys.stderr)
+    return 1 if invalid else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,242 @@
+"""File d'ouverture des liens de Spotag
+
+Les requêtes HTTP ne font que déposer le lien dans la file et répondent tout
+de suite. Un seul worker ouvre les liens : les scans identiques rapprochés
+(double tap, deux téléphones) sont fusionnés, et quand plusieurs liens
+différents attendent, seul le plus récent est ouvert.
+"""
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from datetime import datetime
+
+
+DEFAULT_COALESCE_WINDOW = 2.0
+DEFAULT_HISTORY = 256
+
+
+def new_dispatch_id():
+    return uuid.uuid4().hex[:12]
+
+
+class DispatchItem:
+    """Un lien à ouvrir et les mesures de son passage dans la file"""
+
+    __slots__ = ("id", "link", "state", "coalesced_with", "error", "submit_ms",
+                 "enqueued_at", "started_at", "finished_at")
+
+    def __init__(self, link, dispatch_id=None, state="queued"):
+        self.id = dispatch_id or new_dispatch_id()
+        self.link = link
+        # queued, running, dispatched, failed, superseded, coalesced, forwarded
+        self.state = state
+        self.coalesced_with = None
+        self.error = None
+        self.submit_ms = 0.0
+        self.enqueued_at = time.monotonic()
+        self.started_at = None
+        self.finished_at = None
+
+    @property
+    def queue_ms(self):
+        """Temps passé dans la file avant l'ouverture"""
+        end = self.started_at or self.finished_at
+        if end is None:
+            return None
+        return (end - self.enqueued_at) * 1000
+
+    @property
+    def dispatch_ms(self):
+        """Durée de l'ouverture elle-même"""
+        if self.started_at is None or self.finished_at is None:
+            return None
+        return (self.finished_at - self.started_at) * 1000
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "link": self.link,
+            "state": self.state,
+            "coalesced_with": self.coalesced_with,
+            "queue_ms": None if self.queue_ms is None else round(self.queue_ms, 3),
+            "dispatch_ms": None if self.dispatch_ms is None else round(self.dispatch_ms, 3),
+            "error": self.error,
+        }
+
+
+class DispatchQueue:
+    """File d'ouverture à un seul worker, avec fusion des scans en double"""
+
+    def __init__(self, opener, coalesce_window=DEFAULT_COALESCE_WINDOW, drop_superseded=True,
+                 history=DEFAULT_HISTORY):
+        self.opener = opener
+        self.coalesce_window = coalesce_window
+        self.drop_superseded = drop_superseded
+        self._cond = threading.Condition()
+        self._pending = deque()
+        self._last_by_link = {}
+        self._history = OrderedDict()
+        self._history_size = history
+        self._thread = None
+        self._stopping = False
+        self._held = False
+        self.counters = {"submitted": 0, "coalesced": 0, "superseded": 0,
+                         "dispatched": 0, "failed": 0}
+
+    def start(self):
+        with self._cond:
+            if self._thread is None:
+                self._stopping = False
+                self._thread = threading.Thread(target=self._run, name="spotag-dispatch",
+                                                daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join(timeout=2)
+
+    def hold(self):
+        """Les liens sont acceptés mais attendent dans la file jusqu'à release()"""
+        with self._cond:
+            self._held = True
+
+    def release(self):
+        with self._cond:
+            self._held = False
+            self._cond.notify_all()
+
+    def ready(self):
+        """Le worker tourne et ouvre les liens (pas de hold() en cours)"""
+        with self._cond:
+            return self._thread is not None and self._thread.is_alive() and not self._held
+
+    def submit(self, link, dispatch_id=None):
+        """Dépose un lien dans la file et retourne immédiatement son élément"""
+        start = time.perf_counter()
+        if self._thread is None:
+            self.start()
+        item = DispatchItem(link, dispatch_id)
+        with self._cond:
+            self.counters["submitted"] += 1
+            previous = self._last_by_link.get(link)
+            if (previous is not None and previous.state not in ("failed", "superseded")
+                    and item.enqueued_at - previous.enqueued_at < self.coalesce_window):
+                # Même lien scanné il y a moins de coalesce_window secondes
+                item.state = "coalesced"
+                item.coalesced_with = previous.id
+                item.finished_at = item.enqueued_at
+                self.counters["coalesced"] += 1
+            else:
+                self._last_by_link[link] = item
+                self._pending.append(item)
+                self._cond.notify()
+            self._remember(item)
+        item.submit_ms = (time.perf_counter() - start) * 1000
+        return item
+
+    def get(self, dispatch_id):
+        with self._cond:
+            return self._history.get(dispatch_id)
+
+    def stats(self):
+        with self._cond:
+            stats = dict(self.counters)
+            stats["pending"] = len(self._pending)
+            stats["held"] = self._held
+        return stats
+
+    def _remember(self, item):
+        self._history[item.id] = item
+        while len(self._history) > self._history_size:
+            _, old = self._history.popitem(last=False)
+            if self._last_by_link.get(old.link) is old:
+                del self._last_by_link[old.link]
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while (not self._pending or self._held) and not self._stopping:
+                    self._cond.wait()
+                if self._stopping:
+                    return
+                batch = list(self._pending)
+                self._pending.clear()
+                if self.drop_superseded and len(batch) > 1:
+                    # Ouvrir plusieurs liens d'affilée ne sert à rien : le dernier gagne
+                    now = time.monotonic()
+                    for item in batch[:-1]:
+                        item.state = "superseded"
+                        item.finished_at = now
+                        self.counters["superseded"] += 1
+                    batch = batch[-1:]
+                for item in batch:
+                    item.state = "running"
+            for item in batch:
+                self._open(item)
+
+    def _open(self, item):
+        item.started_at = time.monotonic()
+        try:
+            self.opener(item.link)
+            state = "dispatched"
+        except Exception as e:
+            item.error = str(e)
+            state = "failed"
+        item.finished_at = time.monotonic()
+        with self._cond:
+            item.state = state
+            self.counters[state] += 1
+        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        if state == "dispatched":
+            print(f"[{timestamp}] Lien ouvert: {item.link} "
+                  f"(attente {item.queue_ms:.1f} ms, ouverture {item.dispatch_ms:.1f} ms)")
+        else:
+            print(f"[{timestamp}] Erreur lors de l'ouverture du lien {item.link}: {item.error}")
+
+
+class RemoteItem:
+    """État d'un élément tel que le processus principal l'a renvoyé (mode prefork)"""
+
+    def __init__(self, data):
+        self.data = data
+
+    def to_dict(self):
+        return self.data
+
+
+class ForwardingDispatcher:
+    """Côté worker prefork : transmet les liens au processus principal
+
+    ``query(kind, argument)`` interroge la file du processus principal
+    (``spotag_web.answer_query``) ; il retourne None si celui-ci ne répond pas.
+    """
+
+    def __init__(self, channel, query=None):
+        self.channel = channel
+        self.query = query
+
+    def submit(self, link, dispatch_id=None):
+        start = time.perf_counter()
+        item = DispatchItem(link, dispatch_id, state="forwarded")
+        self.channel.put((link, item.id))
+        item.submit_ms = (time.perf_counter() - start) * 1000
+        return item
+
+    def get(self, dispatch_id):
+        data = self.query("dispatch", dispatch_id) if self.query is not None else None
+        return RemoteItem(data) if data is not None else None
+
+    def ready(self):
+        # Les liens sont ouverts par le processus principal : c'est sa file qui compte
+        if self.query is None:
+            return True
+        return bool(self.query("ready", None))
+
+    def stats(self):
+        stats = self.query("stats", None) if self.query is not None else None
+        return (stats or {}).get("dispatch", {})
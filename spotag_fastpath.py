@@ -0,0 +1,355 @@
+"""Moteur HTTP asyncio pour les routes de scan (/spotify et /t/<code>)
+
+Seules les routes de scan sont traitées directement : la ligne de requête et les
+en-têtes sont lus sans passer par Werkzeug, puis la réponse est écrite depuis
+des octets déjà encodés. Les autres routes sont confiées à l'application Flask
+(WSGI) dans un thread, pour qu'elles restent disponibles sur le même port.
+"""
+import asyncio
+import io
+import sys
+import threading
+from http import HTTPStatus
+from urllib.parse import parse_qs, unquote, unquote_to_bytes
+
+import spotag_links
+import spotag_web
+
+
+DEFAULT_TIMEOUT = 5
+DEFAULT_BACKLOG = 1024
+MAX_HEADERS = 100
+MAX_BODY = 1024 * 1024
+
+SERVER_NAME = b"Spotag"
+
+
+def _status_line(code):
+    try:
+        phrase = HTTPStatus(code).phrase
+    except ValueError:
+        phrase = "Unknown"  # code renvoyé par l'application mais absent de HTTPStatus
+    return f"HTTP/1.1 {code} {phrase}\r\n".encode("latin-1")
+
+
+class RequestError(Exception):
+    """Requête illisible ou trop lente : réponse d'erreur puis fermeture de la connexion"""
+
+    def __init__(self, code, body):
+        super().__init__(code, body)
+        self.code = code
+        self.body = body
+
+
+class FastPathServer:
+    """Serveur asyncio : une boucle d'événements tient toutes les connexions"""
+
+    def __init__(self, app=None, host="0.0.0.0", port=5000, timeout=DEFAULT_TIMEOUT,
+                 backlog=DEFAULT_BACKLOG, on_connection=None, sock=None):
+        self.app = app or spotag_web.app
+        # Appelé dès l'acceptation, avant la lecture de la requête
+        self.on_connection = on_connection
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.backlog = backlog
+        # Socket déjà en écoute (spotag_listen.bind_listener), sinon lié dans start()
+        self.sock = sock
+        self.loop = None
+        self._server = None
+        self._ready = threading.Event()
+        self._error = None
+        # Réponses de la route des scans, encodées une seule fois
+        self._success = spotag_web.SUCCESS_RESPONSE
+        self._missing_body = b"Missing link"
+        self._invalid_body = b"Invalid link"
+        self._unknown_tag_body = b"Unknown tag"
+
+    async def start(self):
+        """Lie le socket d'écoute sur la boucle courante"""
+        self.loop = asyncio.get_running_loop()
+        if self.sock is not None:
+            self._server = await asyncio.start_server(
+                self._handle_connection, sock=self.sock, backlog=self.backlog)
+            self.port = self.sock.getsockname()[1]
+        else:
+            self._server = await asyncio.start_server(
+                self._handle_connection, self.host, self.port,
+                backlog=self.backlog, reuse_address=True,
+            )
+        if not self.port:
+            self.port = self._server.sockets[0].getsockname()[1]
+
+    async def serve(self):
+        await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    def start_in_thread(self):
+        """Démarre la boucle dans un thread et attend que le port soit lié"""
+        def run():
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            try:
+                loop.run_until_complete(self.start())
+            except Exception as e:
+                self._error = e
+                self._ready.set()
+                loop.close()
+                return
+            self._ready.set()
+            try:
+                loop.run_until_complete(self._server.serve_forever())
+            except asyncio.CancelledError:
+                pass
+            finally:
+                loop.close()
+
+        thread = threading.Thread(target=run, name="spotag-fastpath", daemon=True)
+        thread.start()
+        self._ready.wait()
+        if self._error:
+            raise self._error
+        return thread
+
+    def shutdown(self):
+        if self.loop and self._server:
+            self.loop.call_soon_threadsafe(self._server.close)
+
+    async def _handle_connection(self, reader, writer):
+        if self.on_connection is not None:
+            self.on_connection()
+        peer = writer.get_extra_info("peername") or ("", 0)
+        try:
+            while True:
+                try:
+                    request_line = await asyncio.wait_for(reader.readline(), self.timeout)
+                except asyncio.TimeoutError:
+                    break  # connexion keep-alive inactive
+                except ValueError:
+                    # Ligne plus longue que la limite du StreamReader (64 Kio)
+                    writer.write(self._build_response(414, b"Request line too long", keep_alive=False))
+                    break
+                if not request_line:
+                    break
+                if request_line in (b"\r\n", b"\n"):
+                    continue
+                try:
+                    try:
+                        method, target, version = request_line.decode("latin-1").split()
+                    except ValueError:
+                        raise RequestError(400, b"Bad request")
+                    headers = await self._read_headers(reader)
+                    body = await self._read_body(reader, headers)
+                except RequestError as e:
+                    writer.write(self._build_response(e.code, e.body, keep_alive=False))
+                    break
+
+                connection = headers.get("connection", "").lower()
+                if version == "HTTP/1.1":
+                    keep_alive = connection != "close"
+                else:
+                    keep_alive = connection == "keep-alive"
+
+                path, _, query = target.partition("?")
+                if path == "/spotify" and method in ("GET", "HEAD"):
+                    response = self._serve_scan(query, headers, peer, keep_alive, method == "HEAD")
+                elif path.startswith("/t/") and method in ("GET", "HEAD"):
+                    response = self._serve_tag(unquote(path[3:]), query, headers, peer,
+                                               keep_alive, method == "HEAD")
+                else:
+                    response = await self._serve_wsgi(method, path, query, version, headers,
+                                                      body, peer, keep_alive)
+                writer.write(response)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_headers(self, reader):
+        headers = {}
+        for _ in range(MAX_HEADERS):
+            try:
+                line = await asyncio.wait_for(reader.readline(), self.timeout)
+            except asyncio.TimeoutError:
+                raise RequestError(408, b"Request timeout")
+            except ValueError:
+                raise RequestError(431, b"Header line too long")
+            if line in (b"\r\n", b"\n", b""):
+                return headers
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        raise RequestError(431, b"Too many headers")
+
+    async def _read_body(self, reader, headers):
+        """Corps annoncé par Content-Length (lu aussi sur les routes de scan, pour garder le fil)"""
+        if "transfer-encoding" in headers:
+            raise RequestError(501, b"Transfer-Encoding not supported")
+        value = headers.get("content-length")
+        if value is None:
+            return b""
+        if not (value.isascii() and value.isdigit()):
+            raise RequestError(400, b"Bad Content-Length")
+        length = int(value)
+        if length > MAX_BODY:
+            raise RequestError(413, b"Payload too large")
+        if not length:
+            return b""
+        try:
+            return await asyncio.wait_for(reader.readexactly(length), self.timeout)
+        except asyncio.TimeoutError:
+            raise RequestError(408, b"Request timeout")
+
+    def _serve_tag(self, code, query, headers, peer, keep_alive, head):
+        uri = spotag_web.lookup_tag(code)
+        if uri is not None:
+            return self._serve_scan(query, headers, peer, keep_alive, head, link=uri)
+        response_format = spotag_web.negotiate_format(parse_qs(query).get("format", [None])[0],
+                                                      headers.get("accept"),
+                                                      headers.get("prefer"))
+        if response_format == "json":
+            return self._build_response(404, spotag_web.UNKNOWN_TAG_JSON,
+                                        content_type=b"application/json",
+                                        keep_alive=keep_alive, head=head)
+        return self._build_response(404, self._unknown_tag_body, keep_alive=keep_alive, head=head)
+
+    def _serve_scan(self, query, headers, peer, keep_alive, head, link=None):
+        params = parse_qs(query)
+        if link is None:
+            link = params.get("link", [""])[0]
+        response_format = spotag_web.negotiate_format(params.get("format", [None])[0],
+                                                      headers.get("accept"),
+                                                      headers.get("prefer"))
+        rejection = spotag_web.admission.admit(peer[0], spotag_web.admission_key(link))
+        if rejection is not None:
+            content_type, body, extra = spotag_web.rejection_parts(response_format, rejection)
+            return self._build_response(429, body, content_type=content_type.encode("latin-1"),
+                                        keep_alive=keep_alive, head=head, extra_headers=extra)
+        try:
+            return self._scan_response(response_format, link, headers, keep_alive, head)
+        finally:
+            spotag_web.admission.release()
+
+    def _scan_response(self, response_format, link, headers, keep_alive, head):
+        if not link:
+            if response_format == "json":
+                return self._build_response(400, spotag_web.MISSING_LINK_JSON,
+                                            content_type=b"application/json",
+                                            keep_alive=keep_alive, head=head)
+            return self._build_response(400, self._missing_body, keep_alive=keep_alive, head=head)
+        uri = spotag_links.canonical_uri(link)
+        if uri is None:
+            if response_format == "json":
+                return self._build_response(400, spotag_web.INVALID_LINK_JSON,
+                                            content_type=b"application/json",
+                                            keep_alive=keep_alive, head=head)
+            return self._build_response(400, self._invalid_body, keep_alive=keep_alive, head=head)
+        # Simple mise en file : l'ouverture se fait dans le worker de dispatch
+        item = spotag_web.handle_link(uri)
+        extra = spotag_web.scan_headers(item)
+        if response_format == "minimal":
+            extra.append(("Vary", spotag_web.SCAN_VARY))
+            if spotag_web.prefer_minimal(headers.get("prefer")):
+                extra.append(("Preference-Applied", "return=minimal"))
+            return self._build_response(204, b"", content_type=None, keep_alive=keep_alive,
+                                        extra_headers=extra)
+        if response_format == "json":
+            extra += [("Vary", spotag_web.SCAN_VARY), ("Cache-Control", "no-store")]
+            return self._build_response(200, spotag_web.scan_json(item),
+                                        content_type=b"application/json",
+                                        keep_alive=keep_alive, head=head, extra_headers=extra)
+        return self._cached_response(self._success, headers, keep_alive, head, extra)
+
+    def _cached_response(self, cached, headers, keep_alive, head, extra_headers=()):
+        coding = cached.negotiate(headers.get("accept-encoding"))
+        response_headers = cached.headers(coding) + list(extra_headers)
+        if cached.not_modified(headers.get("if-none-match")):
+            return self._build_response(304, b"", content_type=None, keep_alive=keep_alive,
+                                        extra_headers=response_headers)
+        return self._build_response(200, cached.bodies[coding],
+                                    content_type=cached.content_type.encode("latin-1"),
+                                    keep_alive=keep_alive, head=head,
+                                    extra_headers=response_headers)
+
+    def _build_response(self, code, body, content_type=b"text/html; charset=utf-8",
+                        keep_alive=True, head=False, extra_headers=()):
+        parts = [_status_line(code), b"Server: ", SERVER_NAME, b"\r\n"]
+        if content_type:
+            parts += [b"Content-Type: ", content_type, b"\r\n"]
+        if code not in (204, 304):
+            parts += [b"Content-Length: ", str(len(body)).encode(), b"\r\n"]
+        parts.append(b"Connection: keep-alive\r\n" if keep_alive else b"Connection: close\r\n")
+        for name, value in extra_headers:
+            parts.append(f"{name}: {value}\r\n".encode("latin-1"))
+        parts.append(b"\r\n")
+        if not head:
+            parts.append(body)
+        return b"".join(parts)
+
+    async def _serve_wsgi(self, method, path, query, version, headers, body, peer, keep_alive):
+        environ = {
+            "REQUEST_METHOD": method,
+            "SCRIPT_NAME": "",
+            "PATH_INFO": unquote_to_bytes(path).decode("latin-1"),
+            "QUERY_STRING": query,
+            "SERVER_NAME": self.host,
+            "SERVER_PORT": str(self.port),
+            "SERVER_PROTOCOL": version,
+            "REMOTE_ADDR": peer[0],
+            "REMOTE_PORT": str(peer[1]),
+            "wsgi.version": (1, 0),
+            "wsgi.url_scheme": "http",
+            "wsgi.input": io.BytesIO(body),
+            "wsgi.errors": sys.stderr,
+            "wsgi.multithread": True,
+            "wsgi.multiprocess": False,
+            "wsgi.run_once": False,
+        }
+        for name, value in headers.items():
+            key = name.upper().replace("-", "_")
+            if key in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+                environ[key] = value
+            else:
+                environ[f"HTTP_{key}"] = value
+
+        status, response_headers, response_body = await self.loop.run_in_executor(
+            None, self._run_wsgi, environ)
+        code = int(status.split(" ", 1)[0])
+        content_type = b"text/html; charset=utf-8"
+        extra = []
+        for name, value in response_headers:
+            lower = name.lower()
+            if lower == "content-type":
+                content_type = value.encode("latin-1")
+            elif lower not in ("content-length", "connection", "server"):
+                extra.append((name, value))
+        return self._build_response(code, response_body, content_type=content_type,
+                                    keep_alive=keep_alive, head=method == "HEAD",
+                                    extra_headers=extra)
+
+    def _run_wsgi(self, environ):
+        response = []
+        chunks = []
+
+        def start_response(status, headers, exc_info=None):
+            response[:] = [status, headers]
+            return chunks.append
+
+        result = self.app(environ, start_response)
+        try:
+            for chunk in result:
+                chunks.append(chunk)
+        finally:
+            if hasattr(result, "close"):
+                result.close()
+        return response[0], response[1], b"".join(chunks)
+
+
+def make_fastpath_server(app=None, host="0.0.0.0", port=5000, timeout=DEFAULT_TIMEOUT,
+                         backlog=DEFAULT_BACKLOG, on_connection=None, sock=None):
+    """Crée le serveur asyncio, sans le démarrer"""
+    return FastPathServer(app, host=host, port=port, timeout=timeout, backlog=backlog,
+                          on_connection=on_connection, sock=sock)
@@ -0,0 +1,869 @@
+"""Interface graphique de Spotag (Tk, icône de la barre système)
+
+Importé par spotify-nfc.py une fois la ligne de commande lue. Les modules
+lourds (Flask, pystray, PIL, serveurs, lecteur NFC) sont importés par les
+méthodes qui s'en servent, au moment où elles s'en servent.
+"""
+import threading
+import os
+import sys
+import time
+import tkinter as tk
+from tkinter import font as tkfont
+from tkinter import ttk
+from functools import lru_cache
+import spotag_assets
+import spotag_config
+import spotag_links
+import spotag_profile
+import spotag_tk
+
+@lru_cache(maxsize=None)
+def rounded_rectangle_points(x1, y1, x2, y2, radius):
+    """Points du rectangle arrondi, calculés une fois par géométrie et partagés entre boutons"""
+    return (
+        x1 + radius, y1,
+        x2 - radius, y1,
+        x2, y1,
+        x2, y1 + radius,
+        x2, y2 - radius,
+        x2, y2,
+        x2 - radius, y2,
+        x1 + radius, y2,
+        x1, y2,
+        x1, y2 - radius,
+        x1, y1 + radius,
+        x1, y1
+    )
+
+_fonts = {}
+_text_widths = {}
+
+def measure_text(widget, font, text):
+    """Largeur réelle du texte en pixels, mesurée une seule fois par police et par texte"""
+    key = (font, text)
+    width = _text_widths.get(key)
+    if width is None:
+        measurer = _fonts.get(font)
+        if measurer is None:
+            measurer = _fonts[font] = tkfont.Font(root=widget, font=font)
+        width = _text_widths[key] = measurer.measure(text)
+    return width
+
+class ModernButton(tk.Canvas):
+    ICON_FONT = ("Segoe UI", 16)
+    ICON_SPACING = 10
+    
+    def __init__(self, parent, text, command=None, bg="#1DB954", fg="white", 
+                 active_bg="#1ed760", active_fg="white", width=140, height=45, 
+                 corner_radius=12, font=("Segoe UI", 11, "bold"), icon=None):
+        try:
+            parent_bg = parent.cget("bg")
+        except:
+            try:
+                parent_bg = parent.cget("background")
+            except:
+                parent_bg = "#0F0F0F"
+        
+        super().__init__(parent, width=width, height=height, bg=parent_bg, 
+                        highlightthickness=0, relief="flat")
+        
+        self.command = command
+        self.bg = bg
+        self.fg = fg
+        self.active_bg = active_bg
+        self.active_fg = active_fg
+        self.corner_radius = corner_radius
+        self.font = font
+        self.state = "normal"
+        self.text = text
+        self.icon = icon
+        
+        self.draw_button()
+        self.bind("<Button-1>", self._on_click)
+        self.bind("<Enter>", self._on_enter)
+        self.bind("<Leave>", self._on_leave)
+        
+    def draw_button(self):
+        """Crée les éléments du bouton une seule fois ; le survol ne change que leurs couleurs"""
+        self.delete("all")
+        width, height = self.winfo_reqwidth(), self.winfo_reqheight()
+        
+        # Bouton principal
+        self.create_polygon(rounded_rectangle_points(0, 0, width, height, self.corner_radius),
+                            smooth=True, outline="", tags="body")
+        
+        # Effet de brillance
+        highlight_height = int(height * 0.4)
+        self.create_polygon(rounded_rectangle_points(2, 2, width - 2, highlight_height,
+                                                     self.corner_radius - 2),
+                            smooth=True, fill="", outline="", stipple="gray50")
+        
+        # Texte avec icône si présente
+        if self.icon:
+            self.create_text(0, height // 2, text=self.icon, font=self.ICON_FONT, tags=("label", "icon"))
+        self.create_text(0, height // 2, text=self.text, font=self.font, tags=("label", "text"))
+        self.layout_text()
+        self.apply_state()
+    
+    def layout_text(self):
+        """Centre l'icône et le texte d'après leur largeur réelle"""
+        width, height = self.winfo_reqwidth(), self.winfo_reqheight()
+        text_width = measure_text(self, self.font, self.text)
+        if self.icon:
+            icon_width = measure_text(self, self.ICON_FONT, self.icon)
+            total_width = icon_width + self.ICON_SPACING + text_width
+            start_x = (width - total_width) // 2
+            self.coords("icon", start_x + icon_width // 2, height // 2)
+            self.coords("text", start_x + icon_width + self.ICON_SPACING + text_width // 2, height // 2)
+        else:
+            self.coords("text", width // 2, height // 2)
+    
+    def apply_state(self):
+        active = self.state == "active"
+        self.itemconfigure("body", fill=self.active_bg if active else self.bg)
+        self.itemconfigure("label", fill=self.active_fg if active else self.fg)
+    
+    def _on_click(self, event):
+        if self.command:
+            self.command()
+    
+    def _on_enter(self, event):
+        if self.state != "active":
+            self.state = "active"
+            self.apply_state()
+    
+    def _on_leave(self, event):
+        if self.state != "normal":
+            self.state = "normal"
+            self.apply_state()
+    
+    def configure(self, **kwargs):
+        if "text" in kwargs:
+            self.text = kwargs["text"]
+            self.itemconfigure("text", text=self.text)
+            self.layout_text()
+        if "bg" in kwargs:
+            self.bg = kwargs["bg"]
+            self.apply_state()
+        if "active_bg" in kwargs:
+            self.active_bg = kwargs["active_bg"]
+            self.apply_state()
+        tk_kwargs = {k: v for k, v in kwargs.items() if k not in ["text", "bg", "active_bg"]}
+        if tk_kwargs:
+            super().configure(**tk_kwargs)
+
+class ModernEntry(tk.Frame):
+    def __init__(self, parent, placeholder="", **kwargs):
+        super().__init__(parent, bg="#1A1A1A", relief="flat", bd=0)
+        
+        self.placeholder = placeholder
+        self.placeholder_color = "#666666"
+        self.text_color = "#FFFFFF"
+        self.focus_color = "#1A1A1A"
+        self.bg_color = "#1A1A1A"
+        
+        self.entry = tk.Entry(self, 
+                             font=("Segoe UI", 10),
+                             bg=self.bg_color,
+                             fg=self.placeholder_color,
+                             insertbackground=self.text_color,
+                             relief="flat",
+                             bd=0,
+                             **kwargs)
+        self.entry.pack(fill=tk.BOTH, expand=True, padx=8, pady=6)
+        
+        # Événements
+        self.entry.insert(0, placeholder)
+        self.entry.bind('<FocusIn>', self._on_focus_in)
+        self.entry.bind('<FocusOut>', self._on_focus_out)
+        self.entry.bind('<KeyRelease>', self._on_key_release)
+        
+        # Support pour le mode read-only
+        self._readonly = False
+        
+    def _on_focus_in(self, event):
+        if self.entry.get() == self.placeholder:
+            self.entry.delete(0, tk.END)
+            self.entry.config(fg=self.text_color)
+        
+        # Changement de couleur de fond au focus
+        self.configure(bg=self.focus_color)
+    
+    def _on_focus_out(self, event):
+        if not self.entry.get():
+            self.entry.insert(0, self.placeholder)
+            self.entry.config(fg=self.placeholder_color)
+        
+        # Retour à la couleur normale
+        self.configure(bg=self.bg_color)
+    
+    def _on_key_release(self, event):
+        if self.entry.get() and self.entry.get() != self.placeholder:
+            self.entry.config(fg=self.text_color)
+    
+    def get(self):
+        value = self.entry.get()
+        return value if value != self.placeholder else ""
+    
+    def insert(self, index, string):
+        self.entry.insert(index, string)
+        if string and string != self.placeholder:
+            self.entry.config(fg=self.text_color)
+    
+    def delete(self, first, last=None):
+        if not self._readonly:
+            self.entry.delete(first, last)
+            if not self.entry.get():
+                self.entry.config(fg=self.placeholder_color)
+    
+    def set_readonly(self, readonly=True):
+        """Définit si le champ est en lecture seule"""
+        self._readonly = readonly
+        if readonly:
+            self.entry.config(state="readonly", fg="#CCCCCC", readonlybackground="#1A1A1A")
+            self.configure(bg="#1A1A1A")  # Garder la même couleur de fond
+        else:
+            self.entry.config(state="normal", fg=self.text_color)
+            self.configure(bg=self.bg_color)
+    
+    def is_readonly(self):
+        """Retourne si le champ est en lecture seule"""
+        return self._readonly
+    
+    def set_text(self, text):
+        """Définit le texte du champ (fonctionne même en lecture seule)"""
+        if self._readonly:
+            # Temporairement désactiver le mode readonly pour modifier le texte
+            self.entry.config(state="normal")
+            self.entry.delete(0, tk.END)
+            self.entry.insert(0, text)
+            self.entry.config(state="readonly")
+        else:
+            self.entry.delete(0, tk.END)
+            self.entry.insert(0, text)
+
+
+
+class SpotifyNFCGUI:
+    def __init__(self, root, service, network, profiler=None):
+        self.root = root
+        # Désactivé par défaut : les étapes ne sont mesurées qu'avec --profile-startup
+        self.profiler = profiler or spotag_profile.StartupProfiler()
+        phase = self.profiler.phase
+        self.root.title("Spotag - Spotify NFC pour PC")
+        self.root.geometry("800x600")
+        self.root.minsize(800, 600)
+        
+        # Configuration de la fenêtre
+        self.root.configure(bg="#0F0F0F")
+        
+        with phase("chargement des icônes"):
+            self.load_window_icon()
+        
+        # Le serveur est déjà à l'écoute : l'interface est construite après lui
+        self.service = service
+        self.config = service.config
+        self.server_port = service.server_port
+        self.network = network
+        self.tray_icon = None
+        self.toast_label = None
+        self._toast_after = None
+        # Les autres threads passent par le pont pour toucher à Tk
+        self.bridge = spotag_tk.TkBridge(self.root)
+        self.bridge.start()
+        self.service.set_ui(self.bridge)
+        with phase("construction des widgets"):
+            self.setup_styles()
+            self.create_widgets()
+        self.network.subscribe(self.on_network_change)
+        with phase("barre système"):
+            self.setup_system_tray()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
+    
+    def icon_source(self):
+        """Fichier source des icônes (spotag2.png de préférence), ou None"""
+        current_dir = os.path.dirname(os.path.abspath(__file__))
+        for icon_path in (
+            os.path.join(current_dir, "spotag2.png"),
+            os.path.join(current_dir, "spotag.ico"),
+            "spotag2.png",
+            "spotag.ico",
+        ):
+            if os.path.exists(icon_path):
+                return icon_path
+        return None
+
+    def icon_files(self):
+        """Icônes prêtes à l'emploi du cache d'images (produites au premier lancement), ou None"""
+        source = self.icon_source()
+        if source is None:
+            return None
+        try:
+            return spotag_assets.icon_files(source)
+        except Exception as e:
+            print(f"❌ Erreur avec {source}: {e}")
+            return None
+
+    def load_window_icon(self):
+        """Configuration de l'icône de la fenêtre"""
+        icons = self.icon_files()
+        if icons is None:
+            print("⚠️ Aucune icône n'a pu être chargée")
+            return
+        try:
+            if sys.platform == "win32":
+                self.root.iconbitmap(icons["ico"])
+            else:
+                # Tk lit les PNG du cache lui-même, sans PIL
+                self.window_icons = [tk.PhotoImage(file=icons[size])
+                                     for size in spotag_assets.ICON_SIZES]
+                self.root.iconphoto(True, *self.window_icons)
+            print("✅ Icône chargée")
+        except Exception as e:
+            print(f"❌ Erreur générale lors du chargement de l'icône: {e}")
+        
+    def get_local_ip(self):
+        """Adresse locale gardée en mémoire par le service réseau"""
+        return self.network.primary
+    
+    def on_network_change(self, primary, addresses):
+        """Appelé depuis le thread réseau : la mise à jour se fait dans le thread Tk"""
+        self.bridge.call_soon(self.update_server_url)
+    
+    def update_server_url(self):
+        """Met à jour l'URL du serveur et les URL Spotag affichées"""
+        self.url_label.config(text=f"http://{self.get_local_ip()}:{self.server_port}/spotify")
+        if self.link_entry.get().strip():
+            self.convert_link()
+    
+    def setup_styles(self):
+        style = ttk.Style()
+        style.theme_use('clam')
+        
+        self.spotify_green = "#1DB954"
+        self.spotify_black = "#0F0F0F"
+        self.spotify_dark_gray = "#1A1A1A"
+        self.spotify_medium_gray = "#2A2A2A"
+        self.spotify_white = "#FFFFFF"
+        self.spotify_light_gray = "#CCCCCC"
+        
+        # Configuration des styles
+        style.configure("Modern.TFrame", background=self.spotify_black)
+        style.configure("Modern.TLabel", background=self.spotify_black, foreground=self.spotify_white)
+        style.configure("Modern.TLabelframe", background=self.spotify_black, bordercolor=self.spotify_medium_gray)
+        style.configure("Modern.TLabelframe.Label", background=self.spotify_black, foreground=self.spotify_white, font=("Segoe UI", 11, "bold"))
+        
+        self.root.configure(bg=self.spotify_black)
+        
+    def create_widgets(self):
+        # Créer un canvas avec scrollbar
+        canvas = tk.Canvas(self.root, bg=self.spotify_black, highlightthickness=0, relief="flat", bd=0)
+        
+        class YouTubeScrollbar(tk.Canvas):
+            FRAME_MS = 16
+            WHEEL_TAG = "SpotagWheel"
+            
+            def __init__(self, parent, **kwargs):
+                super().__init__(parent, **kwargs)
+                self.parent = parent
+                self.scrollable_widget = None
+                self.scrollbar_width = 8
+                self.scrollbar_color = "#606060"
+                self.scrollbar_hover_color = "#909090"
+                self.trough_color = "#0F0F0F"
+                self.scrollbar_visible = False
+                self.scrollbar_dragging = False
+                self.last_y = 0
+                # État accumulé entre deux rendus (au plus un par image)
+                self._view = (0.0, 1.0)
+                self._wheel_units = 0
+                self._pending = None
+                self._last_render = 0.0
+                
+                # Configuration du canvas
+                self.configure(
+                    width=self.scrollbar_width,
+                    bg=self.trough_color,
+                    highlightthickness=0,
+                    relief="flat",
+                    bd=0
+                )
+                
+                # Le curseur est créé une fois, puis seulement déplacé
+                self.scrollbar_rect = self.create_rectangle(
+                    0, 0, self.scrollbar_width, 0,
+                    fill=self.scrollbar_color,
+                    outline="",
+                    state="hidden",
+                    tags="scrollbar"
+                )
+                
+                # Bindings
+                self.bind("<Enter>", self.on_enter)
+                self.bind("<Leave>", self.on_leave)
+                self.bind("<Button-1>", self.on_click)
+                self.bind("<B1-Motion>", self.on_drag)
+                self.bind("<ButtonRelease-1>", self.on_release)
+                self.bind("<Configure>", lambda e: self.schedule())
+                self.bind_wheel(self)
+                
+            def set_scrollable_widget(self, widget):
+                self.scrollable_widget = widget
+                self._view = widget.yview()
+                self.schedule()
+            
+            def bind_wheel(self, widget):
+                """Molette (Windows/macOS et boutons 4/5 de Linux) sur ce widget et ses enfants"""
+                self.bind_class(self.WHEEL_TAG, "<MouseWheel>", self.on_mousewheel)
+                self.bind_class(self.WHEEL_TAG, "<Button-4>", self.on_mousewheel)
+                self.bind_class(self.WHEEL_TAG, "<Button-5>", self.on_mousewheel)
+                pending = [widget]
+                while pending:
+                    current = pending.pop()
+                    tags = current.bindtags()
+                    if self.WHEEL_TAG not in tags:
+                        current.bindtags((self.WHEEL_TAG,) + tags)
+                    pending.extend(current.winfo_children())
+                
+            def on_enter(self, event):
+                self.itemconfigure(self.scrollbar_rect, fill=self.scrollbar_hover_color)
+                
+            def on_leave(self, event):
+                if not self.scrollbar_dragging:
+                    self.itemconfigure(self.scrollbar_rect, fill=self.scrollbar_color)
+                    
+            def on_click(self, event):
+                if self.scrollbar_visible:
+                    y = event.y
+                    if self.coords(self.scrollbar_rect)[1] <= y <= self.coords(self.scrollbar_rect)[3]:
+                        self.scrollbar_dragging = True
+                        self.last_y = y
+                        
+            def on_drag(self, event):
+                if self.scrollbar_dragging and self.scrollable_widget:
+                    delta_y = event.y - self.last_y
+                    self.last_y = event.y
+                    
+                    # Calculer le déplacement relatif
+                    canvas_height = self.winfo_height()
+                    thumb = self.coords(self.scrollbar_rect)
+                    scrollbar_height = thumb[3] - thumb[1]
+                    max_scrollbar_y = canvas_height - scrollbar_height
+                    new_y = max(0, min(max_scrollbar_y, thumb[1] + delta_y))
+                    
+                    # Déplacer le curseur tout de suite pour suivre la souris
+                    self.coords(self.scrollbar_rect, 0, new_y, self.scrollbar_width, new_y + scrollbar_height)
+                    
+                    # Calculer la position relative pour le widget
+                    if max_scrollbar_y > 0:
+                        relative_pos = new_y / max_scrollbar_y
+                        first, last = self._view
+                        self.scrollable_widget.yview_moveto(relative_pos * (1 - (last - first)))
+                        
+            def on_release(self, event):
+                self.scrollbar_dragging = False
+                if self.winfo_containing(event.x_root, event.y_root) is not self:
+                    self.itemconfigure(self.scrollbar_rect, fill=self.scrollbar_color)
+                
+            def on_mousewheel(self, event):
+                if event.num == 4:
+                    self._wheel_units -= 1
+                elif event.num == 5:
+                    self._wheel_units += 1
+                elif event.delta:
+                    # Windows : multiples de 120 ; macOS : petites valeurs
+                    if abs(event.delta) >= 120:
+                        self._wheel_units -= int(event.delta / 120)
+                    else:
+                        self._wheel_units -= 1 if event.delta > 0 else -1
+                self.schedule()
+            
+            def update_scrollbar(self, first=None, last=None):
+                """yscrollcommand : mémorise la vue, le rendu est regroupé"""
+                if first is not None:
+                    self._view = (float(first), float(last))
+                self.schedule()
+            
+            def schedule(self):
+                """Demande un rendu ; plusieurs demandes dans la même image n'en font qu'un"""
+                if self._pending is not None:
+                    return
+                wait = self.FRAME_MS - (time.perf_counter() - self._last_render) * 1000
+                if wait > 0:
+                    self._pending = self.after(int(wait) + 1, self._render)
+                else:
+                    self._pending = self.after_idle(self._render)
+            
+            def _render(self):
+                self._pending = None
+                self._last_render = time.perf_counter()
+                if not self.scrollable_widget:
+                    return
+                if self._wheel_units:
+                    units, self._wheel_units = self._wheel_units, 0
+                    # Met à jour la vue, puis rappelle update_scrollbar pour le curseur
+                    self.scrollable_widget.yview_scroll(units, "units")
+                    return
+                    
+                first, last = self._view
+                canvas_height = self.winfo_height()
+                if (first <= 0 and last >= 1) or canvas_height <= 1:
+                    # Pas besoin de scrollbar
+                    if self.scrollbar_visible:
+                        self.scrollbar_visible = False
+                        self.itemconfigure(self.scrollbar_rect, state="hidden")
+                    return
+                    
+                # Calculer la taille et position de la scrollbar
+                scrollbar_height = max(30, int(canvas_height * (last - first)))
+                scrollbar_y = min(int(canvas_height * first), canvas_height - scrollbar_height)
+                self.coords(self.scrollbar_rect, 0, scrollbar_y,
+                            self.scrollbar_width, scrollbar_y + scrollbar_height)
+                if not self.scrollbar_visible:
+                    self.scrollbar_visible = True
+                    self.itemconfigure(self.scrollbar_rect, state="normal")
+        
+        # Créer la scrollbar personnalisée
+        scrollbar = YouTubeScrollbar(self.root)
+        scrollable_frame = tk.Frame(canvas, bg=self.spotify_black, relief="flat", bd=0)
+        
+        scrollable_frame.bind(
+            "<Configure>",
+            lambda e: canvas.configure(scrollregion=canvas.bbox("all"))
+        )
+        
+        content_window = canvas.create_window((0, 0), window=scrollable_frame, anchor="nw")
+        
+        # Configurer la scrollbar personnalisée
+        scrollbar.set_scrollable_widget(canvas)
+        canvas.configure(yscrollcommand=scrollbar.update_scrollbar)
+        
+        # Frame principal avec dégradé
+        main_frame = tk.Frame(scrollable_frame, bg=self.spotify_black, relief="flat", bd=0)
+        main_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
+        
+        # En-tête avec logo et titre
+        header_frame = tk.Frame(main_frame, bg=self.spotify_black, relief="flat", bd=0)
+        header_frame.pack(fill=tk.X, pady=(0, 30))
+        
+        # Logo et titre
+        logo_frame = tk.Frame(header_frame, bg=self.spotify_black, relief="flat", bd=0)
+        logo_frame.pack()
+        
+        # Titre principal avec effet de dégradé
+        title_label = tk.Label(logo_frame, 
+                              text="🎵 Spotag", 
+                              font=("Segoe UI", 32, "bold"),
+                              fg=self.spotify_green,
+                              bg=self.spotify_black)
+        title_label.pack()
+        
+        subtitle_label = tk.Label(logo_frame, 
+                                 text="Spotify NFC pour PC", 
+                                 font=("Segoe UI", 16),
+                                 fg=self.spotify_light_gray,
+                                 bg=self.spotify_black)
+        subtitle_label.pack()
+        
+        # Section des boutons de contrôle
+        control_frame = tk.Frame(main_frame, bg=self.spotify_dark_gray, relief="flat", bd=0)
+        control_frame.pack(fill=tk.X, pady=(0, 25), padx=5)
+        
+        # Titre de section
+        section_title = tk.Label(control_frame, 
+                                text="Contrôles", 
+                                font=("Segoe UI", 14, "bold"),
+                                fg=self.spotify_white,
+                                bg=self.spotify_dark_gray)
+        section_title.pack(pady=(20, 15))
+        
+        # Boutons de contrôle
+        button_frame = tk.Frame(control_frame, bg=self.spotify_dark_gray, relief="flat", bd=0)
+        button_frame.pack(pady=20)
+        
+        self.minimize_button = ModernButton(button_frame, 
+                                          text="Minimiser",
+                                          command=self.hide_window,
+                                          bg=self.spotify_medium_gray,
+                                          active_bg="#505050",
+                                          width=120, height=50,
+                                          icon="➖")
+        self.minimize_button.pack(side=tk.LEFT, padx=10)
+        
+        # URL du serveur
+        url_frame = tk.Frame(control_frame, bg=self.spotify_dark_gray, relief="flat", bd=0)
+        url_frame.pack(pady=20)
+        
+        url_label = tk.Label(url_frame, 
+                            text="URL du serveur:", 
+                            font=("Segoe UI", 10, "bold"), 
+                            fg=self.spotify_white, 
+                            bg=self.spotify_dark_gray)
+        url_label.pack()
+        
+        local_ip = self.get_local_ip()
+        self.url_label = tk.Label(url_frame, 
+                                 text=f"http://{local_ip}:{self.server_port}/spotify",
+                                 font=("Consolas", 11),
+                                 fg=self.spotify_green,
+                                 bg=self.spotify_dark_gray)
+        self.url_label.pack(pady=(8, 0))
+        
+        # Section du convertisseur
+        converter_frame = tk.Frame(main_frame, bg=self.spotify_dark_gray, relief="flat", bd=0)
+        converter_frame.pack(fill=tk.X, pady=(0, 25), padx=5)
+        
+        # Titre de section
+        converter_title = tk.Label(converter_frame, 
+                                  text="Convertisseur d'URL Spotify", 
+                                  font=("Segoe UI", 14, "bold"),
+                                  fg=self.spotify_white,
+                                  bg=self.spotify_dark_gray)
+        converter_title.pack(pady=(20, 15))
+        
+        # Champ de saisie du lien
+        link_frame = tk.Frame(converter_frame, bg=self.spotify_dark_gray, relief="flat", bd=0)
+        link_frame.pack(fill=tk.X, pady=15, padx=20)
+        
+        link_label = tk.Label(link_frame, 
+                             text="Lien Spotify:", 
+                             font=("Segoe UI", 10, "bold"), 
+                             fg=self.spotify_white, 
+                             bg=self.spotify_dark_gray)
+        link_label.pack(anchor=tk.W)
+        
+        self.link_entry = ModernEntry(link_frame, 
+                                     placeholder="https://open.spotify.com/track/...",
+                                     width=50)
+        self.link_entry.pack(fill=tk.X, pady=(8, 0))
+        
+        # Lier l'événement de changement pour la conversion automatique
+        self.link_entry.entry.bind('<KeyRelease>', self.on_link_change)
+        
+        # Champ de résultat
+        result_frame = tk.Frame(converter_frame, bg=self.spotify_dark_gray, relief="flat", bd=0)
+        result_frame.pack(fill=tk.X, pady=(0, 20), padx=20)
+        
+        result_label = tk.Label(result_frame, 
+                               text="URL Spotag:", 
+                               font=("Segoe UI", 10, "bold"), 
+                               fg=self.spotify_white, 
+                               bg=self.spotify_dark_gray)
+        result_label.pack(anchor=tk.W)
+        
+        # Frame pour l'entry et le bouton copier
+        result_input_frame = tk.Frame(result_frame, bg=self.spotify_dark_gray, relief="flat", bd=0)
+        result_input_frame.pack(fill=tk.X, pady=(8, 0))
+        
+        self.result_entry = ModernEntry(result_input_frame, 
+                                       placeholder="Entrez un lien Spotify valide",
+                                       width=50)
+        self.result_entry.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        
+        # Définir le champ URL Spotag en lecture seule
+        self.result_entry.set_readonly(True)
+        
+        copy_button = ModernButton(result_input_frame, 
+                                  text="Copier",
+                                  command=lambda: self.copy_to_clipboard(self.result_entry.get()),
+                                  bg=self.spotify_medium_gray,
+                                  active_bg="#505050",
+                                  width=100, height=45,
+                                  icon="📋")
+        copy_button.pack(side=tk.RIGHT, padx=(15, 0))
+        
+        # Affichage séparé de l'URI Spotify
+        uri_frame = tk.Frame(result_frame, bg=self.spotify_dark_gray, relief="flat", bd=0)
+        uri_frame.pack(fill=tk.X, pady=(12, 0))
+        
+        uri_label = tk.Label(uri_frame, 
+                             text="URI Spotify:", 
+                             font=("Segoe UI", 10, "bold"), 
+                             fg=self.spotify_white, 
+                             bg=self.spotify_dark_gray)
+        uri_label.pack(anchor=tk.W)
+        
+        # Frame pour l'entry et le bouton copier de l'URI
+        uri_input_frame = tk.Frame(uri_frame, bg=self.spotify_dark_gray, relief="flat", bd=0)
+        uri_input_frame.pack(fill=tk.X, pady=(8, 0))
+
+        self.uri_entry = ModernEntry(uri_input_frame, 
+                                     placeholder="spotify:...",
+                                     width=50)
+        self.uri_entry.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        self.uri_entry.set_readonly(True)
+
+        uri_copy_button = ModernButton(uri_input_frame, 
+                                       text="Copier",
+                                       command=lambda: self.copy_to_clipboard(self.uri_entry.get()),
+                                       bg=self.spotify_medium_gray,
+                                       active_bg="#505050",
+                                       width=100, height=45,
+                                       icon="📋")
+        uri_copy_button.pack(side=tk.RIGHT, padx=(15, 0))
+        
+        # Footer
+        footer_frame = tk.Frame(main_frame, bg=self.spotify_black, relief="flat", bd=0)
+        footer_frame.pack(fill=tk.X, pady=(20, 0))
+        
+        footer_text = tk.Label(footer_frame, 
+                              text="Développé avec ♥ par AlexM00n", 
+                              font=("Segoe UI", 9),
+                              fg=self.spotify_light_gray,
+                              bg=self.spotify_black)
+        footer_text.pack()
+        
+        # Configurer le scroll avec la scrollbar YouTube
+        canvas.pack(side="left", fill="both", expand=True)
+        scrollbar.pack(side="right", fill="y")
+        
+        # Centrer le contenu dans le canvas (un seul recentrage par rafale de <Configure>)
+        centering = {"width": 0, "pending": None}
+        
+        def center_content():
+            centering["pending"] = None
+            frame_width = scrollable_frame.winfo_reqwidth()
+            x_offset = max(0, (centering["width"] - frame_width) // 2)
+            canvas.coords(content_window, x_offset, 0)
+        
+        def on_canvas_configure(event):
+            centering["width"] = event.width
+            if centering["pending"] is None:
+                centering["pending"] = canvas.after_idle(center_content)
+            scrollbar.schedule()
+        
+        canvas.bind('<Configure>', on_canvas_configure)
+        
+        # Molette sur le contenu seulement (et non sur toute l'application)
+        scrollbar.bind_wheel(canvas)
+    
+    def setup_system_tray(self):
+        """Configure l'icône de la barre système"""
+        try:
+            import pystray
+            
+            # Créer l'icône pour la barre système
+            tray_image = self.create_tray_image()
+            
+            # Menu contextuel pour la barre système (appelé depuis le thread pystray)
+            menu = pystray.Menu(
+                pystray.MenuItem("Afficher Spotag", self.bridge.wrap(self.show_window)),
+                pystray.MenuItem("Masquer Spotag", self.bridge.wrap(self.hide_window)),
+                pystray.Menu.SEPARATOR,
+                pystray.MenuItem("Quitter", self.bridge.wrap(self.quit_application))
+            )
+            
+            self.tray_icon = pystray.Icon("Spotag", tray_image, "Spotag - Spotify NFC", menu)
+            
+            # Démarrer l'icône de la barre système dans un thread séparé
+            tray_thread = threading.Thread(target=self.tray_icon.run, daemon=True)
+            tray_thread.start()
+            
+        except Exception as e:
+            print(f"Erreur lors de la configuration de la barre système: {e}")
+    
+    def create_tray_image(self):
+        """Crée l'icône pour la barre système"""
+        from PIL import Image, ImageDraw
+        icons = self.icon_files()
+        if icons is not None:
+            try:
+                # Déjà à 64x64 dans le cache : simple lecture d'un petit PNG
+                icon = Image.open(icons[64])
+                icon.load()
+                return icon
+            except Exception as e:
+                print(f"Erreur lors du chargement de l'icône: {e}")
+        
+        # Fallback: Icône simple (cercle vert façon Spotify)
+        image = Image.new("RGB", (64, 64), (15, 15, 15))
+        draw = ImageDraw.Draw(image)
+        draw.ellipse((8, 8, 56, 56), fill=(29, 185, 84))
+        # Ajouter un petit symbole musical
+        draw.text((32, 32), "♪", fill="white", anchor="mm")
+        return image
+    
+    def show_window(self, icon=None, item=None):
+        """Affiche la fenêtre principale"""
+        self.root.deiconify()
+        self.root.lift()
+        self.root.focus_force()
+    
+    def hide_window(self, icon=None, item=None):
+        """Masque la fenêtre principale"""
+        self.root.withdraw()
+    
+    def quit_application(self, icon=None, item=None):
+        """Quitte complètement l'application"""
+        if self.tray_icon:
+            self.tray_icon.stop()
+        self.service.stop()
+        self.bridge.stop()
+        # Une mesure du démarrage ne doit pas réécrire la configuration
+        if not self.profiler.enabled:
+            self.save_config()
+        self.root.quit()
+        os._exit(0)
+        
+    def save_config(self):
+        """Écrit les réglages de l'utilisateur, une seule fois à la fermeture"""
+        spotag_config.save_config(self.config)
+    
+    def on_link_change(self, event=None):
+        self.convert_link()
+    
+    def convert_link(self):
+        link = self.link_entry.get().strip()
+        
+        if not link or link == "https://open.spotify.com/track/...":
+            self.result_entry.set_text("Entrez un lien Spotify valide")
+            return
+        
+        try:
+            spotify_uri = spotag_links.parse_link(link).uri
+        except spotag_links.InvalidLinkError:
+            self.result_entry.set_text("Lien Spotify invalide")
+            return
+        
+        # Générer l'URL Spotag complète
+        spotag_url = spotag_links.spotag_url(spotify_uri, self.get_local_ip(), self.server_port)
+        self.result_entry.set_text(spotag_url)
+        # Renseigner aussi le champ URI
+        if hasattr(self, 'uri_entry'):
+            self.uri_entry.set_text(spotify_uri)
+    
+    def copy_to_clipboard(self, text):
+        try:
+            self.root.clipboard_clear()
+            self.root.clipboard_append(text)
+            self.show_toast("📋 Texte copié dans le presse-papiers!")
+        except Exception as e:
+            self.show_toast(f"❌ Impossible de copier: {e}", error=True)
+    
+    def show_toast(self, text, error=False, duration=1800):
+        """Message temporaire en bas de la fenêtre (ne bloque pas la boucle Tk comme un messagebox)"""
+        if self.toast_label is None:
+            self.toast_label = tk.Label(self.root, font=("Segoe UI", 10, "bold"),
+                                        bg=self.spotify_medium_gray, padx=16, pady=8)
+        self.toast_label.config(text=text, fg="#E22134" if error else self.spotify_white)
+        self.toast_label.place(relx=0.5, rely=1.0, anchor="s", y=-20)
+        self.toast_label.lift()
+        if self._toast_after is not None:
+            self.root.after_cancel(self._toast_after)
+        self._toast_after = self.root.after(duration, self.hide_toast)
+    
+    def hide_toast(self):
+        self._toast_after = None
+        if self.toast_label is not None:
+            self.toast_label.place_forget()
+    
+    def on_closing(self):
+        # Minimiser dans la barre système au lieu de fermer
+        self.hide_window()
+        # Optionnel: Afficher une notification
+        if self.tray_icon:
+            try:
+                self.tray_icon.notify("Spotag a été minimisé dans la barre système", "Spotag")
+            except:
+                pass  # Ignorer les erreurs de notification
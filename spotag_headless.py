@@ -0,0 +1,107 @@
+"""Mode serveur seul de Spotag (``spotify-nfc.py --headless``)
+
+Pour les PC multimédia allumés en permanence : seuls le serveur HTTP, la
+file d'ouverture des liens et (s'il est activé) le lecteur NFC USB tournent.
+Ni tkinter, ni pystray, ni PIL ne sont importés ; l'icône servie aux
+téléphones vient du cache d'images (produite au besoin par un processus
+enfant).
+
+Prévu pour systemd (``Type=notify``) : ``READY=1`` est envoyé une fois le
+port lié et le lanceur prêt (comme ``/readyz``), ``STATUS=`` suit l'adresse
+du PC, le chien de garde (``WatchdogSec=``) est nourri s'il est demandé, et
+SIGTERM arrête le service proprement. Les messages partent ligne par ligne sur stdout/stderr (journald).
+"""
+import os
+import signal
+import socket
+import sys
+import threading
+
+import spotag_assets
+import spotag_instance
+import spotag_profile
+
+
+def sd_notify(state):
+    """Message pour systemd (NOTIFY_SOCKET) ; ne fait rien hors de systemd"""
+    address = os.environ.get("NOTIFY_SOCKET")
+    if not address or not hasattr(socket, "AF_UNIX"):
+        return False
+    if address.startswith("@"):
+        address = "\0" + address[1:]  # socket abstrait
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sock:
+            sock.connect(address)
+            sock.sendall(state.encode("utf-8"))
+        return True
+    except OSError as e:
+        print(f"⚠️ Notification systemd impossible: {e}", file=sys.stderr)
+        return False
+
+
+def watchdog_interval():
+    """Secondes entre deux signes de vie demandés par systemd (WatchdogSec), ou None"""
+    usec = os.environ.get("WATCHDOG_USEC")
+    pid = os.environ.get("WATCHDOG_PID")
+    if not usec or pid and pid != str(os.getpid()):
+        return None
+    try:
+        return int(usec) / 1e6 / 2
+    except ValueError:
+        return None
+
+
+def main(profiler=None, exit_when_ready=False, instance_lock=None, link=None):
+    """Démarre le serveur et attend SIGTERM ; retourne le code de sortie
+
+    ``instance_lock`` est la socket de verrou de spotag_instance : les
+    lancements suivants y transmettent leurs liens.
+    """
+    profiler = profiler or spotag_profile.StartupProfiler()
+    # journald lit un tube : sans cela les messages arriveraient par paquets
+    for stream in (sys.stdout, sys.stderr):
+        stream.reconfigure(line_buffering=True)
+    spotag_assets.IN_PROCESS = False
+
+    import spotag_service
+    service, network, started = spotag_service.start_service(profiler)
+    if not started:
+        sd_notify("STATUS=Le serveur n'a pas pu démarrer")
+        return 1
+    instance = None
+    if instance_lock is not None:
+        instance = spotag_instance.InstanceServer(instance_lock, service.open_link)
+        instance.start()
+    if link and not service.open_link(link):
+        print(f"⚠️ Lien invalide: {link}")
+
+    def status(primary, addresses=None):
+        sd_notify(f"STATUS=Scans sur http://{primary}:{service.server_port}/spotify")
+
+    network.subscribe(status)
+    sd_notify(f"READY=1\nMAINPID={os.getpid()}")
+    status(network.primary)
+    print("✅ Spotag prêt (serveur seul)")
+    if exit_when_ready:
+        profiler.report()
+        service.stop()
+        return 0
+
+    stopping = threading.Event()
+
+    def on_signal(signum, frame):
+        stopping.set()
+
+    signal.signal(signal.SIGTERM, on_signal)
+    signal.signal(signal.SIGINT, on_signal)
+    interval = watchdog_interval()
+    while not stopping.wait(interval):
+        sd_notify("WATCHDOG=1")
+
+    sd_notify("STOPPING=1")
+    print("Arrêt de Spotag")
+    if instance is not None:
+        instance.stop()
+    network.stop()
+    service.stop()
+    return 0
@@ -0,0 +1,122 @@
+"""Instance unique de Spotag et transmission des liens à l'instance en cours
+
+Le verrou est une socket d'écoute gardée ouverte pendant toute la vie du
+processus : socket abstraite propre à l'utilisateur sur Linux, port
+``LOCK_PORT`` de localhost ailleurs. Le système la libère quand le processus
+meurt, il n'y a donc jamais de verrou périmé à nettoyer.
+
+Un second lancement se connecte à cette socket, envoie une ligne puis quitte :
+    open <lien>   confie le lien à la file d'ouverture de l'instance en cours
+    show          affiche la fenêtre
+La réponse est une ligne ``ok`` ou ``error <raison>``. Ce module n'utilise que
+la bibliothèque standard, pour que le second lancement ne coûte que quelques
+millisecondes.
+"""
+import os
+import socket
+import struct
+import sys
+import threading
+
+
+LOCK_PORT = 5001
+LOCK_NAME = "spotag"
+TIMEOUT = 5  # couvre la construction de la fenêtre par l'instance qui démarre
+MAX_REQUEST = 4096
+
+
+def _address():
+    """(famille, adresse) de la socket de verrou"""
+    if sys.platform.startswith("linux"):
+        return socket.AF_UNIX, f"\0{LOCK_NAME}-{os.getuid()}"
+    return socket.AF_INET, ("127.0.0.1", LOCK_PORT)
+
+
+def acquire():
+    """Socket de verrou à garder ouverte, ou None si une instance tourne déjà"""
+    family, address = _address()
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    if hasattr(socket, "SO_EXCLUSIVEADDRUSE"):
+        # Windows : sans cela un second processus peut lier le même port
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_EXCLUSIVEADDRUSE, 1)
+    try:
+        sock.bind(address)
+        sock.listen(8)
+    except OSError:
+        sock.close()
+        return None
+    return sock
+
+
+def send(command, timeout=TIMEOUT):
+    """Envoie une commande à l'instance en cours et retourne sa réponse (OSError si injoignable)"""
+    family, address = _address()
+    with socket.socket(family, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(address)
+        sock.sendall(command.encode("utf-8") + b"\n")
+        with sock.makefile("rb") as reply:
+            return reply.readline(MAX_REQUEST).decode("utf-8", "replace").strip()
+
+
+def _same_user(conn):
+    """Une socket abstraite n'a pas de droits d'accès : vérifier l'utilisateur du client"""
+    if conn.family != socket.AF_UNIX or not hasattr(socket, "SO_PEERCRED"):
+        return True
+    credentials = conn.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i"))
+    _pid, uid, _gid = struct.unpack("3i", credentials)
+    return uid == os.getuid()
+
+
+class InstanceServer:
+    """Répond aux lancements suivants sur la socket de verrou"""
+
+    def __init__(self, sock, open_link, show=None):
+        self.sock = sock
+        self.open_link = open_link
+        self.show = show
+
+    def start(self):
+        threading.Thread(target=self._run, name="spotag-instance", daemon=True).start()
+
+    def _run(self):
+        while True:
+            try:
+                conn, _ = self.sock.accept()
+            except OSError:
+                return  # socket fermée par stop()
+            with conn:
+                try:
+                    conn.settimeout(TIMEOUT)
+                    if not _same_user(conn):
+                        conn.sendall("error utilisateur différent\n".encode("utf-8"))
+                        continue
+                    with conn.makefile("rb") as request:
+                        line = request.readline(MAX_REQUEST).decode("utf-8", "replace").strip()
+                    conn.sendall(self.handle(line).encode("utf-8") + b"\n")
+                except OSError:
+                    continue
+
+    def handle(self, line):
+        """Exécute une commande reçue et retourne la réponse"""
+        command, _, argument = line.partition(" ")
+        try:
+            if command == "open" and argument:
+                if not self.open_link(argument):
+                    return "error lien invalide"
+            elif command == "show":
+                if self.show is not None:
+                    self.show()
+            else:
+                return "error commande inconnue"
+        except Exception as e:
+            print(f"Erreur lors du traitement d'une demande d'un autre lancement: {e}")
+            return "error interne"
+        return "ok"
+
+    def stop(self):
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)  # réveille accept() sous Linux
+        except OSError:
+            pass
+        self.sock.close()
@@ -0,0 +1,365 @@
+"""Ouverture des liens Spotify sur le PC
+
+Le programme qui ouvre les liens (xdg-open, client Spotify, commande
+personnalisée...) est résolu une seule fois au démarrage. Sous Linux et macOS,
+les lancements passent par un petit processus auxiliaire démarré à l'avance
+qui appelle ``os.posix_spawnp`` : le gros processus Spotag (Tk, PIL, Flask)
+n'est jamais dupliqué. Sous Linux, le backend "mpris" demande directement au
+client Spotify déjà lancé d'ouvrir le lien (D-Bus), sans aucun processus.
+Chaque lancement mesure sa latence.
+"""
+import json
+import os
+import select
+import shlex
+import shutil
+import subprocess
+import sys
+import threading
+import time
+import webbrowser
+from collections import deque
+
+try:
+    from jeepney import DBusAddress, DBusErrorResponse, new_method_call
+    from jeepney.io.blocking import open_dbus_connection
+    from jeepney.wrappers import unwrap_msg
+except ImportError:
+    open_dbus_connection = None
+
+
+BACKENDS = ("auto", "webbrowser", "xdg-open", "spotify", "command", "mpris")
+
+MPRIS_BUS_NAME = "org.mpris.MediaPlayer2.spotify"
+MPRIS_PATH = "/org/mpris/MediaPlayer2"
+MPRIS_PLAYER_INTERFACE = "org.mpris.MediaPlayer2.Player"
+MPRIS_TIMEOUT = 2.0
+# Délai de réponse du processus auxiliaire (un posix_spawn prend quelques ms)
+HELPER_TIMEOUT = 2.0
+
+# Processus auxiliaire : lit des argv en JSON sur stdin, les lance, répond le pid
+HELPER_SOURCE = r"""
+import json, os, signal, sys, time
+# Les enfants sont récupérés automatiquement par le noyau (pas de zombies)
+signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+# Les tubes de l'auxiliaire servent aux réponses : les programmes lancés ne
+# doivent ni les lire ni y écrire, ni hériter de SIG_IGN ou de la session
+NULL_FDS = [(os.POSIX_SPAWN_OPEN, fd, os.devnull, os.O_RDWR, 0) for fd in (0, 1, 2)]
+for line in sys.stdin:
+    try:
+        argv = json.loads(line)
+        start = time.perf_counter()
+        pid = os.posix_spawnp(argv[0], argv, os.environ, file_actions=NULL_FDS,
+                              setsigdef=(signal.SIGCHLD,), setsid=True)
+        reply = {"pid": pid, "spawn_ms": (time.perf_counter() - start) * 1000}
+    except Exception as e:
+        reply = {"error": str(e)}
+    sys.stdout.write(json.dumps(reply) + "\n")
+    sys.stdout.flush()
+"""
+
+
+class LaunchError(Exception):
+    """Le lien n'a pas pu être ouvert"""
+
+
+class WebbrowserBackend:
+    """Comportement historique : module webbrowser de Python"""
+    name = "webbrowser"
+    argv_template = None
+
+    def open(self, link):
+        if not webbrowser.open(link):
+            raise LaunchError("aucun navigateur n'a accepté le lien")
+
+
+class StartfileBackend:
+    """Windows : association de protocole spotify: via le shell"""
+    name = "startfile"
+    argv_template = None
+
+    def open(self, link):
+        os.startfile(link)
+
+
+class CommandBackend:
+    """Programme externe ; ``{link}`` dans les arguments est remplacé par le lien"""
+
+    def __init__(self, name, argv_template):
+        self.name = name
+        if not any("{link}" in arg for arg in argv_template):
+            argv_template = list(argv_template) + ["{link}"]
+        self.argv_template = list(argv_template)
+
+    def argv(self, link):
+        return [arg.replace("{link}", link) for arg in self.argv_template]
+
+
+class MprisBackend:
+    """Linux : méthode OpenUri du client Spotify via une connexion D-Bus persistante
+
+    Si le lecteur n'est pas sur le bus (Spotify fermé) ou si l'appel échoue,
+    le lien passe par ``fallback`` (webbrowser par défaut).
+    """
+    name = "mpris"
+    argv_template = None
+
+    def __init__(self, bus_name=MPRIS_BUS_NAME, bus="SESSION", fallback=None,
+                 timeout=MPRIS_TIMEOUT):
+        if open_dbus_connection is None:
+            raise LaunchError("le paquet jeepney est nécessaire pour le backend mpris")
+        self.bus = bus
+        self.timeout = timeout
+        self.address = DBusAddress(MPRIS_PATH, bus_name=bus_name,
+                                   interface=MPRIS_PLAYER_INTERFACE)
+        self.fallback = fallback or WebbrowserBackend()
+        self.fallbacks = 0
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def connect(self):
+        """Ouvre la connexion au bus (une seule fois, gardée ensuite)"""
+        with self._lock:
+            self._connect_locked()
+
+    def _connect_locked(self):
+        if self._conn is None:
+            self._conn = open_dbus_connection(bus=self.bus)
+
+    def open_uri(self, link):
+        """Appelle OpenUri ; lève DBusErrorResponse si le lecteur est absent"""
+        message = new_method_call(self.address, "OpenUri", "s", (link,))
+        with self._lock:
+            self._connect_locked()
+            try:
+                reply = self._conn.send_and_get_reply(message, timeout=self.timeout)
+            except (OSError, TimeoutError):
+                # Connexion perdue (bus redémarré...) : elle sera rouverte au prochain appel
+                self._close_locked()
+                raise
+        unwrap_msg(reply)
+
+    def open(self, link):
+        try:
+            self.open_uri(link)
+        except (DBusErrorResponse, OSError, TimeoutError) as e:
+            print(f"⚠️ MPRIS indisponible ({e}), ouverture avec {self.fallback.name}")
+            self.fallbacks += 1
+            self.fallback.open(link)
+
+    def _close_locked(self):
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except OSError:
+                pass
+            self._conn = None
+
+    def close(self):
+        with self._lock:
+            self._close_locked()
+
+    def stats(self):
+        return {"fallbacks": self.fallbacks}
+
+
+def _which(program):
+    path = shutil.which(program)
+    if path is None:
+        raise LaunchError(f"programme introuvable : {program}")
+    return path
+
+
+def resolve_backend(name="auto", command=None, mpris_bus_name=MPRIS_BUS_NAME):
+    """Choisit et résout une fois pour toutes le programme qui ouvre les liens"""
+    if name == "mpris":
+        return MprisBackend(bus_name=mpris_bus_name)
+    if name == "webbrowser":
+        return WebbrowserBackend()
+    if name == "xdg-open":
+        return CommandBackend("xdg-open", [_which("xdg-open"), "{link}"])
+    if name == "spotify":
+        return CommandBackend("spotify", [_which("spotify"), "--uri={link}"])
+    if name == "command":
+        if not command:
+            raise LaunchError("launcher_command est vide")
+        argv = shlex.split(command) if isinstance(command, str) else list(command)
+        argv[0] = _which(argv[0])
+        return CommandBackend("command", argv)
+    if name != "auto":
+        raise LaunchError(f"backend inconnu : {name}")
+
+    if sys.platform == "win32":
+        return StartfileBackend()
+    if sys.platform == "darwin":
+        return CommandBackend("open", [_which("open"), "{link}"])
+    try:
+        return CommandBackend("xdg-open", [_which("xdg-open"), "{link}"])
+    except LaunchError:
+        return WebbrowserBackend()
+
+
+class SpawnHelper:
+    """Petit processus Python (sans site ni modules de Spotag) qui lance les programmes"""
+
+    def __init__(self, timeout=HELPER_TIMEOUT):
+        self.timeout = timeout
+        self._proc = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def supported():
+        return hasattr(os, "posix_spawnp")
+
+    def start(self):
+        with self._lock:
+            self._start_locked()
+
+    def _start_locked(self):
+        if self._proc is not None and self._proc.poll() is None:
+            return
+        self._proc = subprocess.Popen(
+            [sys.executable, "-I", "-S", "-c", HELPER_SOURCE],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            bufsize=0,
+            close_fds=True,
+        )
+
+    def _restart_locked(self):
+        """Abandonne l'auxiliaire (désynchronisé ou bloqué) ; un autre est lancé au besoin"""
+        if self._proc is not None:
+            self._proc.kill()
+            self._proc.wait()
+            self._proc = None
+
+    def _send_locked(self, argv):
+        """Envoie argv ; un auxiliaire mort avant la lecture est relancé une fois"""
+        request = json.dumps(argv).encode("utf-8") + b"\n"
+        for attempt in range(2):
+            self._start_locked()
+            try:
+                self._proc.stdin.write(request)
+                return
+            except OSError as e:
+                self._restart_locked()
+                if attempt:
+                    raise LaunchError(f"processus auxiliaire indisponible : {e}")
+
+    def _read_reply_locked(self):
+        """Ligne de réponse, lue avec une échéance : None si l'auxiliaire se tait ou s'arrête"""
+        fd = self._proc.stdout.fileno()
+        deadline = time.monotonic() + self.timeout
+        reply = b""
+        while not reply.endswith(b"\n"):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not select.select([fd], [], [], remaining)[0]:
+                return None
+            chunk = os.read(fd, 4096)
+            if not chunk:
+                return None
+            reply += chunk
+        return reply
+
+    def spawn(self, argv):
+        """Lance argv depuis l'auxiliaire ; retourne la durée du posix_spawn en ms"""
+        with self._lock:
+            self._send_locked(argv)
+            reply = self._read_reply_locked()
+            if reply is None:
+                # Bloqué ou arrêté : le suivant repartira d'un auxiliaire neuf
+                self._restart_locked()
+                raise LaunchError(f"le processus auxiliaire n'a pas répondu en {self.timeout:g} s")
+            try:
+                reply = json.loads(reply)
+                if not isinstance(reply, dict) or not ("error" in reply or "spawn_ms" in reply):
+                    raise ValueError(reply)
+            except ValueError:
+                # Réponse illisible : l'échange est désynchronisé, on repart à zéro
+                self._restart_locked()
+                raise LaunchError("le processus auxiliaire a répondu de travers")
+        if "error" in reply:
+            raise LaunchError(reply["error"])
+        return reply["spawn_ms"]
+
+    def stop(self):
+        with self._lock:
+            if self._proc is not None:
+                try:
+                    self._proc.stdin.close()
+                    self._proc.wait(timeout=1)
+                except (OSError, subprocess.TimeoutExpired):
+                    self._proc.kill()
+                self._proc = None
+
+
+class Launcher:
+    """Ouvre les liens avec le backend choisi et mesure chaque lancement"""
+
+    def __init__(self, backend="auto", command=None, use_helper=True, history=100,
+                 mpris_bus_name=MPRIS_BUS_NAME):
+        self.backend = resolve_backend(backend, command, mpris_bus_name)
+        self.helper = None
+        if use_helper and self.backend.argv_template and SpawnHelper.supported():
+            self.helper = SpawnHelper()
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=history)
+        self.launches = 0
+        self.failures = 0
+
+    def start(self):
+        """Démarre le processus auxiliaire et se connecte au bus D-Bus (mpris)"""
+        if self.helper is not None:
+            self.helper.start()
+        if isinstance(self.backend, MprisBackend):
+            try:
+                self.backend.connect()
+            except OSError as e:
+                print(f"⚠️ Bus D-Bus inaccessible: {e}")
+
+    def stop(self):
+        if self.helper is not None:
+            self.helper.stop()
+        if isinstance(self.backend, MprisBackend):
+            self.backend.close()
+
+    def open(self, link):
+        # Un lien qui commence par "-" serait lu comme une option du programme
+        if link.startswith("-"):
+            raise LaunchError(f"lien refusé : {link}")
+        start = time.perf_counter()
+        try:
+            if self.backend.argv_template is None:
+                self.backend.open(link)
+            elif self.helper is not None:
+                self.helper.spawn(self.backend.argv(link))
+            else:
+                subprocess.Popen(self.backend.argv(link), stdin=subprocess.DEVNULL,
+                                 stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                                 close_fds=True, start_new_session=True)
+        except Exception:
+            with self._lock:
+                self.failures += 1
+            raise
+        elapsed = (time.perf_counter() - start) * 1000
+        with self._lock:
+            self.launches += 1
+            self._latencies.append(elapsed)
+        return elapsed
+
+    def stats(self):
+        with self._lock:
+            latencies = sorted(self._latencies)
+            stats = {
+                "backend": self.backend.name,
+                "helper": self.helper is not None,
+                "launches": self.launches,
+                "failures": self.failures,
+            }
+        if hasattr(self.backend, "stats"):
+            stats.update(self.backend.stats())
+        if latencies:
+            stats["last_ms"] = round(self._latencies[-1], 3)
+            stats["avg_ms"] = round(sum(latencies) / len(latencies), 3)
+            stats["max_ms"] = round(latencies[-1], 3)
+        return stats
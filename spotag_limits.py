@@ -0,0 +1,139 @@
+"""Contrôle d'admission de la route /spotify
+
+Chaque client (adresse IP) et chaque lien ont un seau à jetons : une rafale
+de ``burst`` scans est acceptée, puis ``rate`` scans par seconde. Le nombre de
+requêtes traitées en même temps est borné. Une requête refusée reçoit tout de
+suite un 429 avec Retry-After, sans jamais atteindre la file d'ouverture.
+"""
+import math
+import threading
+import time
+from collections import OrderedDict
+
+
+DEFAULT_IP_RATE = 2.0
+DEFAULT_IP_BURST = 5
+DEFAULT_URI_RATE = 1.0
+DEFAULT_URI_BURST = 3
+DEFAULT_MAX_IN_FLIGHT = 32
+MAX_TRACKED_KEYS = 4096
+
+
+class TokenBucket:
+    """Seau à jetons : ``burst`` jetons au maximum, ``rate`` jetons ajoutés par seconde"""
+
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate, burst, now):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = now
+
+    def wait(self, now):
+        """Attente en secondes avant le prochain jeton (0 s'il y en a un), sans le prendre"""
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self):
+        """Prend le jeton dont wait() a confirmé la disponibilité"""
+        self.tokens -= 1
+
+
+class KeyedRateLimiter:
+    """Un seau par clé, en gardant au plus ``max_keys`` clés (les plus anciennes sont oubliées)"""
+
+    def __init__(self, rate, burst, max_keys=MAX_TRACKED_KEYS):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+
+    @property
+    def enabled(self):
+        return self.rate > 0 and self.burst > 0
+
+    def bucket(self, key, now):
+        """Seau de la clé (créé au besoin), ou None si la limite est désactivée"""
+        if not self.enabled:
+            return None
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(self.rate, self.burst, now)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+        return bucket
+
+
+class Rejection:
+    """Raison d'un refus et délai conseillé avant de réessayer"""
+
+    __slots__ = ("reason", "retry_after")
+
+    def __init__(self, reason, retry_after):
+        self.reason = reason
+        self.retry_after = retry_after
+
+    @property
+    def retry_after_header(self):
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+class AdmissionController:
+    """Limites par IP, par lien et nombre de requêtes simultanées"""
+
+    def __init__(self, ip_rate=DEFAULT_IP_RATE, ip_burst=DEFAULT_IP_BURST,
+                 uri_rate=DEFAULT_URI_RATE, uri_burst=DEFAULT_URI_BURST,
+                 max_in_flight=DEFAULT_MAX_IN_FLIGHT):
+        self._lock = threading.Lock()
+        self.configure(ip_rate, ip_burst, uri_rate, uri_burst, max_in_flight)
+        self.in_flight = 0
+        self.counters = {"admitted": 0, "shed_ip": 0, "shed_uri": 0, "shed_in_flight": 0}
+
+    def configure(self, ip_rate=DEFAULT_IP_RATE, ip_burst=DEFAULT_IP_BURST,
+                  uri_rate=DEFAULT_URI_RATE, uri_burst=DEFAULT_URI_BURST,
+                  max_in_flight=DEFAULT_MAX_IN_FLIGHT):
+        with self._lock:
+            self.by_ip = KeyedRateLimiter(float(ip_rate), int(ip_burst))
+            self.by_uri = KeyedRateLimiter(float(uri_rate), int(uri_burst))
+            self.max_in_flight = int(max_in_flight)
+
+    def admit(self, client_ip, link):
+        """Retourne None si la requête est acceptée (à libérer avec release), sinon un Rejection"""
+        now = time.monotonic()
+        with self._lock:
+            if self.max_in_flight > 0 and self.in_flight >= self.max_in_flight:
+                self.counters["shed_in_flight"] += 1
+                return Rejection("in_flight", 1.0)
+            # Les deux seaux sont vérifiés avant de prendre un jeton : un lien
+            # refusé ne consomme pas le quota de l'adresse IP, et inversement
+            buckets = [self.by_ip.bucket(client_ip, now)]
+            if link:
+                buckets.append(self.by_uri.bucket(link, now))
+            reasons = (("client", "shed_ip"), ("link", "shed_uri"))
+            for bucket, (reason, counter) in zip(buckets, reasons):
+                wait = bucket.wait(now) if bucket is not None else 0.0
+                if wait:
+                    self.counters[counter] += 1
+                    return Rejection(reason, wait)
+            for bucket in buckets:
+                if bucket is not None:
+                    bucket.take()
+            self.in_flight += 1
+            self.counters["admitted"] += 1
+        return None
+
+    def release(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+            stats["in_flight"] = self.in_flight
+        return stats
@@ -0,0 +1,96 @@
+"""Analyse des liens Spotify
+
+Fonctions pures, sans dépendance à l'interface : elles acceptent les URL
+open.spotify.com (préfixe de langue ``intl-xx``, paramètres ``?si=``, URL
+``/embed/``) et les URI ``spotify:``, et produisent une URI canonique
+``spotify:<type>:<id>``. Les expressions régulières sont compilées une fois
+et les résultats sont gardés dans un cache LRU.
+"""
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+
+TYPES = frozenset({"track", "album", "playlist", "artist", "show", "episode",
+                   "audiobook", "chapter", "user"})
+CACHE_SIZE = 4096
+
+_URL_RE = re.compile(
+    r"^(?:https?://)?(?:open|play|www)\.spotify\.com/(?P<path>[^?#]*)(?:[?#].*)?$",
+    re.IGNORECASE,
+)
+_URI_RE = re.compile(r"^spotify:(?P<path>[^?#\s]+)(?:[?#].*)?$", re.IGNORECASE)
+_LOCALE_RE = re.compile(r"^intl-[a-z]{2}(?:[-_][a-z]{2,4})?$", re.IGNORECASE)
+_ID_RE = re.compile(r"^[0-9A-Za-z]{1,64}$")
+_USER_ID_RE = re.compile(r"^[\w.\-]{1,64}$")
+
+
+class InvalidLinkError(ValueError):
+    """Le texte n'est pas un lien Spotify reconnu"""
+
+
+class SpotifyLink(namedtuple("SpotifyLink", ("type", "id"))):
+    """Type et identifiant d'un élément Spotify"""
+    __slots__ = ()
+
+    @property
+    def uri(self):
+        return f"spotify:{self.type}:{self.id}"
+
+    @property
+    def url(self):
+        return f"https://open.spotify.com/{self.type}/{self.id}"
+
+
+def _from_segments(segments):
+    segments = [s for s in segments if s]
+    if segments and _LOCALE_RE.match(segments[0]):
+        segments = segments[1:]
+    if segments and segments[0].lower() in ("embed", "embed-podcast"):
+        segments = segments[1:]
+    # Ancien format : /user/<utilisateur>/playlist/<id>
+    if len(segments) >= 4 and segments[0].lower() == "user" and segments[2].lower() == "playlist":
+        segments = segments[2:]
+    if len(segments) < 2:
+        return None
+    kind, item_id = segments[0].lower(), segments[1]
+    if kind not in TYPES:
+        return None
+    pattern = _USER_ID_RE if kind == "user" else _ID_RE
+    if not pattern.match(item_id):
+        return None
+    return SpotifyLink(kind, item_id)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _parse(text):
+    match = _URI_RE.match(text)
+    if match:
+        return _from_segments(match.group("path").split(":"))
+    match = _URL_RE.match(text)
+    if match:
+        return _from_segments(match.group("path").split("/"))
+    return None
+
+
+def parse_link(text):
+    """Analyse une URL ou une URI Spotify ; lève InvalidLinkError si elle n'est pas reconnue"""
+    link = _parse(text.strip())
+    if link is None:
+        raise InvalidLinkError(f"Lien Spotify invalide: {text}")
+    return link
+
+
+def canonical_uri(text):
+    """URI canonique ``spotify:<type>:<id>`` d'un lien, ou None s'il n'est pas reconnu"""
+    link = _parse(text.strip())
+    return link.uri if link is not None else None
+
+
+def spotag_url(uri, host, port=5000):
+    """URL Spotag à écrire sur un tag NFC pour une URI"""
+    return f"http://{host}:{port}/spotify?link={uri}"
+
+
+def cache_info():
+    return _parse.cache_info()
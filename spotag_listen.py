@@ -0,0 +1,33 @@
+"""Socket d'écoute du serveur de scans
+
+Bibliothèque standard uniquement : le port est lié avant l'import de
+werkzeug et de Flask (voir ``SpotagService.bind``).
+"""
+import os
+import socket
+
+
+DEFAULT_BACKLOG = 128
+
+
+def bind_listener(host="0.0.0.0", port=5000, backlog=DEFAULT_BACKLOG):
+    """Socket lié et en écoute tout de suite, avant que le serveur soit prêt
+
+    Les connexions arrivées entre-temps attendent dans le backlog du noyau au
+    lieu d'être refusées ; le serveur les accepte dès qu'il démarre.
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    try:
+        if os.name != "nt":
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((host, port))
+        sock.listen(max(1, int(backlog)))
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+def prefork_supported():
+    """Le mode prefork a besoin de SO_REUSEPORT (Linux, BSD, macOS)"""
+    return hasattr(socket, "SO_REUSEPORT")
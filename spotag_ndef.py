@@ -0,0 +1,215 @@
+"""Enregistrements NDEF binaires pour écrire les tags Spotag
+
+Chaque URL Spotag devient un message NDEF d'un seul enregistrement URI
+(type "U") : le début de l'URL ("http://", "https://www."...) est remplacé
+par l'octet d'abréviation prévu par la norme NFC Forum, l'URL est réduite à
+sa forme la plus courte et l'enregistrement court (SR) est utilisé dès que
+possible. La taille obtenue est comparée à la mémoire des tags courants.
+
+Usage :
+    python spotag_ndef.py playlist.csv --host 192.168.1.20 --out-dir tags/
+    python spotag_ndef.py playlist.csv --host 192.168.1.20 --short --tag ntag210
+    echo spotify:album:1ATL5GLyefJaxhQzSPVrLX | python spotag_ndef.py --tag ntag213
+"""
+import argparse
+import os
+import sys
+
+import spotag_links
+import spotag_registry
+
+
+# Table des abréviations de l'enregistrement URI (NFC Forum URI RTD)
+URI_PREFIXES = (
+    "", "http://www.", "https://www.", "http://", "https://", "tel:", "mailto:",
+    "ftp://anonymous:anonymous@", "ftp://ftp.", "ftps://", "sftp://", "smb://",
+    "nfs://", "ftp://", "dav://", "news:", "telnet://", "imap:", "rtsp://", "urn:",
+    "pop:", "sip:", "sips:", "tftp:", "btspp://", "btl2cap://", "btgoep://",
+    "tcpobex://", "irdaobex://", "file://", "urn:epc:id:", "urn:epc:tag:",
+    "urn:epc:pat:", "urn:epc:raw:", "urn:epc:", "urn:nfc:",
+)
+
+# Mémoire utilisateur (octets) disponible pour le TLV NDEF
+TAG_CAPACITIES = {
+    "ultralight": 48,
+    "ntag210": 48,
+    "ntag212": 128,
+    "ntag213": 144,
+    "ultralight-c": 144,
+    "ntag215": 504,
+    "ntag216": 888,
+}
+
+TNF_WELL_KNOWN = 0x01
+FLAG_MB = 0x80
+FLAG_ME = 0x40
+FLAG_SR = 0x10
+TLV_NDEF = 0x03
+TLV_TERMINATOR = 0xFE
+CONTAINERS = ("ndef", "tlv")
+
+
+def abbreviate(url):
+    """(octet d'abréviation, reste de l'URL) avec le préfixe connu le plus long"""
+    best = 0
+    for code, prefix in enumerate(URI_PREFIXES):
+        if prefix and url.startswith(prefix) and len(prefix) > len(URI_PREFIXES[best]):
+            best = code
+    return best, url[len(URI_PREFIXES[best]):]
+
+
+def shortest_url(uri, host, port=5000):
+    """Forme la plus courte de l'URL Spotag (URI canonique, port omis s'il vaut 80)"""
+    uri = spotag_links.canonical_uri(uri) or uri
+    host = host.lower()
+    netloc = host if int(port) == 80 else f"{host}:{port}"
+    return f"http://{netloc}/spotify?link={uri}"
+
+
+def uri_record(url):
+    """Message NDEF d'un seul enregistrement URI"""
+    code, rest = abbreviate(url)
+    payload = bytes([code]) + rest.encode("utf-8")
+    header = FLAG_MB | FLAG_ME | TNF_WELL_KNOWN
+    if len(payload) < 256:
+        return bytes([header | FLAG_SR, 1, len(payload)]) + b"U" + payload
+    return bytes([header, 1]) + len(payload).to_bytes(4, "big") + b"U" + payload
+
+
+def tlv(message):
+    """Message NDEF dans son TLV, tel qu'il est écrit à partir de la page 4 d'un NTAG"""
+    if len(message) < 0xFF:
+        length = bytes([len(message)])
+    else:
+        length = b"\xff" + len(message).to_bytes(2, "big")
+    return bytes([TLV_NDEF]) + length + message + bytes([TLV_TERMINATOR])
+
+
+def parse_uri_record(message):
+    """URL contenue dans le premier enregistrement URI d'un message NDEF, ou None"""
+    position = 0
+    while position + 3 <= len(message):
+        header = message[position]
+        type_length = message[position + 1]
+        position += 2
+        if header & FLAG_SR:
+            payload_length = message[position]
+            position += 1
+        else:
+            payload_length = int.from_bytes(message[position:position + 4], "big")
+            position += 4
+        id_length = 0
+        if header & 0x08:
+            id_length = message[position]
+            position += 1
+        record_type = message[position:position + type_length]
+        position += type_length + id_length
+        payload = message[position:position + payload_length]
+        position += payload_length
+        if header & 0x07 == TNF_WELL_KNOWN and record_type == b"U" and payload:
+            prefix = URI_PREFIXES[payload[0]] if payload[0] < len(URI_PREFIXES) else ""
+            return prefix + payload[1:].decode("utf-8", "replace")
+        if header & FLAG_ME:
+            break
+    return None
+
+
+def parse_tlv(data):
+    """Message NDEF contenu dans une zone mémoire de tag (suite de TLV), ou None"""
+    position = 0
+    while position < len(data):
+        kind = data[position]
+        if kind == TLV_TERMINATOR:
+            return None
+        if kind == 0x00:
+            position += 1
+            continue
+        if position + 1 >= len(data):
+            return None
+        length = data[position + 1]
+        position += 2
+        if length == 0xFF:
+            length = int.from_bytes(data[position:position + 2], "big")
+            position += 2
+        if kind == TLV_NDEF:
+            return bytes(data[position:position + length])
+        position += length
+    return None
+
+
+def smallest_tag(size):
+    """Plus petit tag dont la mémoire accueille ``size`` octets de TLV"""
+    fitting = [(capacity, name) for name, capacity in TAG_CAPACITIES.items() if size <= capacity]
+    return min(fitting)[1] if fitting else None
+
+
+def payload_name(uri):
+    return uri.replace(":", "_")
+
+
+def main(argv=None):
+    # Lecture des fichiers de liens : seulement pour la ligne de commande
+    import spotag_convert
+    parser = argparse.ArgumentParser(description="Génère les enregistrements NDEF des tags Spotag")
+    parser.add_argument("inputs", nargs="*", help="fichiers de liens (stdin par défaut)")
+    parser.add_argument("--host", help="adresse du PC (par défaut : adresse locale détectée)")
+    parser.add_argument("--port", type=int, help="port du serveur (par défaut : configuration)")
+    parser.add_argument("--input-format", choices=spotag_convert.INPUT_FORMATS, default="auto")
+    parser.add_argument("--tag", choices=sorted(TAG_CAPACITIES), default="ntag213",
+                        help="tag visé : les enregistrements trop grands sont signalés")
+    parser.add_argument("--out-dir", help="écrit un fichier par lien dans ce dossier")
+    parser.add_argument("--container", choices=CONTAINERS, default="ndef",
+                        help="ndef : message NDEF seul, tlv : image mémoire à écrire en page 4")
+    parser.add_argument("--short", action="store_true",
+                        help="enregistre les liens dans le registre et écrit des URL /t/<code>")
+    parser.add_argument("--registry", default=spotag_registry.DEFAULT_REGISTRY_FILE,
+                        help="base du registre des codes courts")
+    args = parser.parse_args(argv)
+
+    host = args.host
+    if host is None:
+        import spotag_net
+        host = spotag_net.NetworkAddressService().primary
+    port = args.port or spotag_convert.configured_port()
+    capacity = TAG_CAPACITIES[args.tag]
+    if args.out_dir:
+        os.makedirs(args.out_dir, exist_ok=True)
+    registry = spotag_registry.TagRegistry(args.registry, reload_interval=None) if args.short else None
+
+    written = invalid = too_big = 0
+    print("uri\turl\tndef_bytes\ttlv_bytes\tsmallest_tag\tfits")
+    for name, stream in spotag_convert.open_inputs(args.inputs):
+        for number, text in spotag_convert.read_entries(stream, name, args.input_format):
+            uri = spotag_links.canonical_uri(text)
+            if uri is None:
+                invalid += 1
+                print(f"⚠️ {name}:{number}: lien invalide: {text}", file=sys.stderr)
+                continue
+            if registry is not None:
+                url = spotag_registry.short_url(registry.add(uri), host.lower(), port)
+            else:
+                url = shortest_url(uri, host, port)
+            message = uri_record(url)
+            image = tlv(message)
+            fits = len(image) <= capacity
+            if not fits:
+                too_big += 1
+                print(f"⚠️ {name}:{number}: {len(image)} octets, trop grand pour {args.tag}",
+                      file=sys.stderr)
+            print(f"{uri}\t{url}\t{len(message)}\t{len(image)}\t{smallest_tag(len(image)) or '-'}"
+                  f"\t{'oui' if fits else 'non'}")
+            if args.out_dir:
+                extension = ".ndef" if args.container == "ndef" else ".bin"
+                path = os.path.join(args.out_dir, payload_name(uri) + extension)
+                with open(path, "wb") as f:
+                    f.write(message if args.container == "ndef" else image)
+                written += 1
+    sys.stdout.flush()
+    summary = f"✅ {written} fichiers écrits" if args.out_dir else "✅ Terminé"
+    print(f"{summary}, {invalid} liens invalides, {too_big} trop grands pour {args.tag}",
+          file=sys.stderr)
+    return 1 if invalid or too_big else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
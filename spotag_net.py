@@ -0,0 +1,178 @@
+"""Adresses réseau du PC, résolues une fois et gardées en mémoire
+
+Les adresses de toutes les interfaces sont lues au démarrage, puis seulement
+quand le réseau change : sous Linux, un socket netlink signale les ajouts et
+suppressions d'adresses ; ailleurs, les interfaces sont relues à intervalle
+régulier (quelques appels système, sans aucun trafic). Les abonnés sont
+prévenus à chaque changement de l'adresse principale ou de la liste.
+"""
+import select
+import socket
+import sys
+import threading
+import time
+
+try:
+    import fcntl
+    import struct
+except ImportError:
+    fcntl = None
+
+
+DEFAULT_POLL_INTERVAL = 10.0
+# Regroupe les rafales d'événements netlink (DHCP, Wi-Fi qui se reconnecte...)
+NETLINK_DEBOUNCE = 0.5
+
+SIOCGIFADDR = 0x8915
+RTMGRP_LINK = 0x1
+RTMGRP_IPV4_IFADDR = 0x10
+RTMGRP_IPV6_IFADDR = 0x100
+
+
+def default_route_address():
+    """Adresse utilisée pour sortir vers Internet (aucun paquet n'est envoyé)"""
+    s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        s.connect(("8.8.8.8", 80))
+        return s.getsockname()[0]
+    except OSError:
+        return None
+    finally:
+        s.close()
+
+
+def interface_addresses():
+    """Adresses IPv4 de toutes les interfaces (hors boucle locale)"""
+    addresses = []
+    if fcntl is not None and sys.platform.startswith("linux"):
+        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            for _, name in socket.if_nameindex():
+                try:
+                    packed = fcntl.ioctl(s.fileno(), SIOCGIFADDR,
+                                         struct.pack("256s", name[:15].encode()))
+                except OSError:
+                    continue  # interface sans adresse IPv4
+                addresses.append(socket.inet_ntoa(packed[20:24]))
+        finally:
+            s.close()
+    else:
+        try:
+            infos = socket.getaddrinfo(socket.gethostname(), None, socket.AF_INET)
+        except OSError:
+            infos = []
+        for info in infos:
+            address = info[4][0]
+            if address not in addresses:
+                addresses.append(address)
+    return [a for a in addresses if not a.startswith("127.")]
+
+
+class NetworkAddressService:
+    """Sert l'adresse locale depuis la mémoire et publie ses changements"""
+
+    def __init__(self, poll_interval=DEFAULT_POLL_INTERVAL):
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._subscribers = []
+        self._stopping = threading.Event()
+        # stop() y écrit un octet pour réveiller l'attente netlink
+        self._wake_reader, self._wake_writer = socket.socketpair()
+        self._thread = None
+        self.watch_mode = None
+        self.primary, self.addresses = self._resolve()
+
+    def _resolve(self):
+        addresses = interface_addresses()
+        primary = default_route_address()
+        if primary is None:
+            # Réseau local sans Internet : première interface disponible
+            primary = addresses[0] if addresses else "localhost"
+        elif primary not in addresses:
+            addresses.insert(0, primary)
+        return primary, addresses
+
+    def subscribe(self, callback):
+        """callback(primary, addresses) est appelé depuis le thread de surveillance"""
+        with self._lock:
+            self._subscribers.append(callback)
+
+    def refresh(self):
+        """Relit les interfaces ; prévient les abonnés si quelque chose a changé"""
+        primary, addresses = self._resolve()
+        with self._lock:
+            changed = primary != self.primary or addresses != self.addresses
+            self.primary, self.addresses = primary, addresses
+            subscribers = list(self._subscribers)
+        if changed:
+            print(f"🌐 Réseau modifié, adresse locale: {primary}")
+            for callback in subscribers:
+                try:
+                    callback(primary, addresses)
+                except Exception as e:
+                    print(f"Erreur lors de la notification du changement de réseau: {e}")
+        return changed
+
+    def start(self):
+        if self._thread is not None:
+            return
+        netlink = self._open_netlink()
+        if netlink is not None:
+            self.watch_mode = "netlink"
+            target, args = self._watch_netlink, (netlink,)
+        else:
+            self.watch_mode = "poll"
+            target, args = self._watch_poll, ()
+        self._thread = threading.Thread(target=target, args=args, name="spotag-net", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopping.set()
+        try:
+            self._wake_writer.send(b"\0")
+        except OSError:
+            pass
+
+    def _open_netlink(self):
+        if not hasattr(socket, "AF_NETLINK"):
+            return None
+        try:
+            s = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, socket.NETLINK_ROUTE)
+            s.bind((0, RTMGRP_LINK | RTMGRP_IPV4_IFADDR | RTMGRP_IPV6_IFADDR))
+        except OSError:
+            return None
+        return s
+
+    def _watch_netlink(self, s):
+        try:
+            while True:
+                # Aucun réveil périodique : seulement un événement réseau ou stop()
+                select.select([s, self._wake_reader], [], [])
+                if self._stopping.is_set():
+                    return
+                try:
+                    s.recv(65536)
+                except OSError:
+                    # Socket netlink inutilisable : revenir à la scrutation
+                    self.watch_mode = "poll"
+                    self._watch_poll()
+                    return
+                # Vider la rafale avant de relire les interfaces
+                deadline = time.monotonic() + NETLINK_DEBOUNCE
+                while time.monotonic() < deadline:
+                    try:
+                        s.settimeout(max(0.01, deadline - time.monotonic()))
+                        s.recv(65536)
+                    except (socket.timeout, OSError):
+                        break
+                s.settimeout(None)
+                self.refresh()
+        finally:
+            s.close()
+
+    def _watch_poll(self):
+        while not self._stopping.wait(self.poll_interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Erreur lors de la lecture des interfaces réseau: {e}")
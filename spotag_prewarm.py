@@ -0,0 +1,261 @@
+"""Pré-chauffage du client Spotify
+
+Un démarrage à froid de Spotify prend plusieurs secondes. Selon la politique
+choisie, le lecteur est lancé au démarrage du serveur ("boot") ou dès qu'une
+connexion TCP arrive sur le port des scans, avant même la lecture de la
+requête ("connect"). Un minuteur peut le relancer s'il a été fermé.
+
+Tant que le lecteur est chaud, sa présence est revérifiée toutes les
+``PRESENCE_POLL`` secondes : s'il a été fermé, les scans ne comptent plus
+comme servis à chaud et la politique est réarmée (en "boot", la connexion
+suivante le relance).
+
+Les démarrages à froid observés sont mesurés (lancement -> lecteur présent),
+ce qui permet d'estimer le temps gagné par chaque scan servi à chaud.
+"""
+import os
+import shlex
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+
+try:
+    from jeepney.bus_messages import message_bus
+    from jeepney.io.blocking import open_dbus_connection
+except ImportError:
+    open_dbus_connection = None
+
+
+POLICIES = ("off", "boot", "connect")
+PLAYER_BUS_NAME = "org.mpris.MediaPlayer2.spotify"
+DEFAULT_KEEP_WARM = 0
+# Délai minimal entre deux vérifications déclenchées par des connexions
+CONNECT_COOLDOWN = 2.0
+READY_TIMEOUT = 30.0
+READY_POLL = 0.1
+PRESENCE_POLL = 5.0
+
+
+def default_warm_command():
+    """Commande qui démarre le client Spotify sans ouvrir de lien"""
+    if sys.platform == "win32":
+        return None  # os.startfile("spotify:")
+    if sys.platform == "darwin":
+        return ["open", "-g", "-a", "Spotify"]
+    path = shutil.which("spotify")
+    return [path] if path else None
+
+
+class PlayerProbe:
+    """Indique si le client Spotify tourne (D-Bus, /proc, pgrep ou tasklist)"""
+
+    def __init__(self, bus_name=PLAYER_BUS_NAME, process_name="spotify"):
+        self.bus_name = bus_name
+        self.process_name = process_name
+        self._conn = None
+
+    def running(self):
+        if sys.platform.startswith("linux"):
+            if open_dbus_connection is not None:
+                try:
+                    return self._has_bus_name()
+                except OSError:
+                    self._conn = None
+            return self._in_proc()
+        if sys.platform == "darwin":
+            return subprocess.run(["pgrep", "-xi", self.process_name],
+                                  stdout=subprocess.DEVNULL).returncode == 0
+        if sys.platform == "win32":
+            output = subprocess.run(
+                ["tasklist", "/FI", f"IMAGENAME eq {self.process_name}.exe", "/NH"],
+                capture_output=True, text=True,
+                creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0),
+            ).stdout
+            return self.process_name.lower() in output.lower()
+        return False
+
+    def _has_bus_name(self):
+        if self._conn is None:
+            self._conn = open_dbus_connection(bus="SESSION")
+        reply = self._conn.send_and_get_reply(message_bus.NameHasOwner(self.bus_name), timeout=1)
+        return bool(reply.body[0])
+
+    def _in_proc(self):
+        for pid in os.listdir("/proc"):
+            if not pid.isdigit():
+                continue
+            try:
+                with open(f"/proc/{pid}/comm") as f:
+                    if f.read().strip().lower() == self.process_name:
+                        return True
+            except OSError:
+                continue
+        return False
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+class Prewarmer:
+    """Lance le lecteur à l'avance et mesure le temps gagné sur les scans"""
+
+    def __init__(self, policy="off", warm_command=None, keep_warm=DEFAULT_KEEP_WARM,
+                 probe=None, spawn=None):
+        if policy not in POLICIES:
+            raise ValueError(f"politique de pré-chauffage inconnue : {policy}")
+        self.policy = policy
+        if isinstance(warm_command, str) and warm_command:
+            warm_command = shlex.split(warm_command)
+        self.warm_command = warm_command or default_warm_command()
+        self.keep_warm = float(keep_warm or 0)
+        self.probe = probe or PlayerProbe()
+        # Fonction de lancement (ex. le processus auxiliaire du lanceur)
+        self.spawn = spawn
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+        self._last_check = 0.0
+        self.warming_since = None
+        self.ready_at = None
+        self.cold_starts = deque(maxlen=20)
+        self.counters = {"warm_starts": 0, "warm_hits": 0, "warming_hits": 0, "cold_misses": 0}
+        self.saved_ms = 0.0
+
+    @property
+    def enabled(self):
+        return self.policy != "off"
+
+    def start(self):
+        if not self.enabled or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="spotag-prewarm", daemon=True)
+        self._thread.start()
+        if self.policy == "boot":
+            self._wake.set()
+
+    def stop(self):
+        self._stopping.set()
+        self._wake.set()
+        self.probe.close()
+
+    def on_connection(self):
+        """Appelé à l'acceptation d'une connexion : doit rester quasi gratuit"""
+        # En "boot", seulement une fois le lecteur fermé (politique réarmée)
+        if self.policy == "connect" or self.policy == "boot" and self.ready_at is None:
+            self._wake.set()
+
+    def _wait_timeout(self):
+        if self.keep_warm:
+            return self.keep_warm
+        return PRESENCE_POLL if self.ready_at is not None else None
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self._wake.wait(self._wait_timeout())
+            if self._stopping.is_set():
+                return
+            triggered = self._wake.is_set()
+            self._wake.clear()
+            now = time.monotonic()
+            if triggered and now - self._last_check < CONNECT_COOLDOWN:
+                continue
+            self._last_check = now
+            try:
+                if triggered or self.keep_warm:
+                    self._ensure_warm()
+                elif not self.probe.running():
+                    self._player_gone()
+            except Exception as e:
+                print(f"Erreur lors du pré-chauffage de Spotify: {e}")
+
+    def _player_gone(self):
+        """Le lecteur n'est plus là : les scans suivants ne sont plus servis à chaud"""
+        with self._lock:
+            was_ready = self.ready_at is not None
+            self.ready_at = None
+        if was_ready:
+            print("🧊 Client Spotify fermé, pré-chauffage réarmé")
+
+    def _ensure_warm(self):
+        if self.probe.running():
+            with self._lock:
+                if self.ready_at is None:
+                    self.ready_at = time.monotonic()
+            return
+        self._player_gone()
+        with self._lock:
+            if self.warming_since is not None:
+                return
+            self.warming_since = time.monotonic()
+            self.ready_at = None
+            self.counters["warm_starts"] += 1
+        print("🔥 Pré-chauffage du client Spotify")
+        self._launch()
+        self._wait_ready()
+
+    def _launch(self):
+        if self.warm_command is None:
+            if sys.platform == "win32":
+                os.startfile("spotify:")
+                return
+            raise RuntimeError("aucune commande pour démarrer Spotify (prewarm_command)")
+        if self.spawn is not None:
+            self.spawn(self.warm_command)
+        else:
+            subprocess.Popen(self.warm_command, stdin=subprocess.DEVNULL,
+                             stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                             close_fds=True, start_new_session=True)
+
+    def _wait_ready(self):
+        deadline = time.monotonic() + READY_TIMEOUT
+        while time.monotonic() < deadline and not self._stopping.is_set():
+            if self.probe.running():
+                now = time.monotonic()
+                with self._lock:
+                    self.cold_starts.append((now - self.warming_since) * 1000)
+                    self.ready_at = now
+                    self.warming_since = None
+                return
+            time.sleep(READY_POLL)
+        with self._lock:
+            self.warming_since = None
+
+    def note_dispatch(self):
+        """Au moment d'ouvrir un lien : le lecteur était-il déjà chaud ?"""
+        now = time.monotonic()
+        with self._lock:
+            estimate = sum(self.cold_starts) / len(self.cold_starts) if self.cold_starts else 0.0
+            if self.ready_at is not None:
+                self.counters["warm_hits"] += 1
+                self.saved_ms += estimate
+            elif self.warming_since is not None:
+                # Démarrage en cours : le temps déjà écoulé est gagné
+                self.counters["warming_hits"] += 1
+                self.saved_ms += (now - self.warming_since) * 1000
+            else:
+                self.counters["cold_misses"] += 1
+
+    def wrap(self, opener):
+        """Enveloppe l'ouverture des liens pour comptabiliser les scans à chaud"""
+        def open_link(link):
+            if self.enabled:
+                self.note_dispatch()
+            return opener(link)
+        return open_link
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+            stats["policy"] = self.policy
+            stats["cold_start_ms"] = (round(sum(self.cold_starts) / len(self.cold_starts), 1)
+                                      if self.cold_starts else None)
+            stats["saved_ms_total"] = round(self.saved_ms, 1)
+            hits = self.counters["warm_hits"] + self.counters["warming_hits"]
+            stats["saved_ms_per_scan"] = round(self.saved_ms / hits, 1) if hits else None
+        return stats
@@ -0,0 +1,83 @@
+"""Mesure du démarrage de Spotag (option ``--profile-startup``)
+
+Deux relevés : le temps de chaque import de module (premier import
+seulement, mesuré en enveloppant ``builtins.__import__``) et la durée des
+grandes étapes du démarrage (configuration, icônes, widgets, barre système,
+serveur). Désactivé, le profileur ne fait rien et ne coûte rien.
+"""
+import builtins
+import sys
+import time
+from contextlib import contextmanager
+
+
+TOP_IMPORTS = 15
+
+
+class StartupProfiler:
+    """Temps des imports et des étapes du démarrage"""
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.started = time.perf_counter()
+        self.phases = []
+        # nom -> (temps cumulé, temps propre) en secondes
+        self.imports = {}
+        self._stack = []
+        self._original_import = None
+
+    def install(self):
+        """Commence à mesurer les imports (à appeler le plus tôt possible)"""
+        if not self.enabled or self._original_import is not None:
+            return
+        self._original_import = builtins.__import__
+        builtins.__import__ = self._import
+
+    def uninstall(self):
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        if level or name in sys.modules:
+            return self._original_import(name, globals, locals, fromlist, level)
+        self._stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            return self._original_import(name, globals, locals, fromlist, level)
+        finally:
+            total = time.perf_counter() - start
+            children = self._stack.pop()
+            if self._stack:
+                self._stack[-1] += total
+            if name not in self.imports:
+                self.imports[name] = (total, total - children)
+
+    @contextmanager
+    def phase(self, name):
+        """Mesure une étape : ``with profiler.phase("icônes"): ...``"""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - start))
+
+    def report(self, file=None):
+        """Affiche les étapes puis les imports les plus lents"""
+        if not self.enabled:
+            return
+        file = file or sys.stderr
+        self.uninstall()
+        elapsed = time.perf_counter() - self.started
+        print(f"⏱️ Démarrage en {elapsed * 1000:.0f} ms", file=file)
+        for name, duration in self.phases:
+            print(f"   {duration * 1000:8.1f} ms  {name}", file=file)
+        slowest = sorted(self.imports.items(), key=lambda item: item[1][0], reverse=True)
+        print(f"⏱️ Imports les plus lents ({len(self.imports)} modules importés) :", file=file)
+        print("     cumulé     propre  module", file=file)
+        for name, (total, own) in slowest[:TOP_IMPORTS]:
+            print(f"   {total * 1000:8.1f} ms {own * 1000:7.1f} ms  {name}", file=file)
+        file.flush()
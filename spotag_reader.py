@@ -0,0 +1,333 @@
+"""Lecteur NFC USB (PC/SC) branché directement sur le PC
+
+Un thread interroge le lecteur à intervalle régulier ; quand un tag est posé,
+sa mémoire NDEF est lue (commandes PC/SC READ BINARY, page 4 et suivantes),
+l'enregistrement URI est décodé et le lien part dans la même file
+d'ouverture que les scans HTTP : ni téléphone ni Wi-Fi dans la boucle. Un tag
+laissé sur le lecteur n'est lu qu'une fois.
+
+Le lecteur simulé rejoue des contenus de tags enregistrés (fichiers ``.ndef``
+ou ``.bin`` produits par spotag_ndef.py ou par ``--record``), pour essayer le
+chemin complet sans matériel.
+
+Usage :
+    python spotag_reader.py --list
+    python spotag_reader.py --record tags_lus/
+    python spotag_reader.py --simulate tags/
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import spotag_links
+import spotag_ndef
+
+try:
+    from smartcard.Exceptions import CardConnectionException, NoCardException
+    from smartcard.System import readers as pcsc_readers
+except ImportError:
+    pcsc_readers = None
+
+
+MODES = ("off", "pcsc", "simulated")
+DEFAULT_POLL_INTERVAL = 0.2
+# Commandes PC/SC (pseudo-APDU des lecteurs compatibles PC/SC part 3)
+GET_UID = [0xFF, 0xCA, 0x00, 0x00, 0x00]
+FIRST_NDEF_PAGE = 4
+READ_PAGES = 4
+MAX_PAGES = 231  # NTAG216
+
+
+class ReaderError(Exception):
+    """Lecteur absent ou inutilisable"""
+
+
+def _tlv_length(data):
+    """Nombre d'octets à lire pour avoir le TLV NDEF en entier, ou None si on ne le sait pas encore"""
+    position = 0
+    while position < len(data):
+        kind = data[position]
+        if kind == spotag_ndef.TLV_TERMINATOR:
+            return position + 1
+        if kind == 0x00:
+            position += 1
+            continue
+        if position + 1 >= len(data):
+            return None
+        length = data[position + 1]
+        header = 2
+        if length == 0xFF:
+            if position + 3 >= len(data):
+                return None
+            length = int.from_bytes(data[position + 2:position + 4], "big")
+            header = 4
+        end = position + header + length
+        if kind == spotag_ndef.TLV_NDEF:
+            return end
+        position = end
+    return None
+
+
+class PcscReader:
+    """Lecteur USB PC/SC (ACR122U, ACR1252U...) via pyscard"""
+
+    def __init__(self, name=None):
+        if pcsc_readers is None:
+            raise ReaderError("le paquet pyscard est nécessaire pour lire un lecteur PC/SC")
+        available = pcsc_readers()
+        if not available:
+            raise ReaderError("aucun lecteur PC/SC détecté")
+        matching = [r for r in available if not name or name.lower() in str(r).lower()]
+        if not matching:
+            raise ReaderError(f"lecteur introuvable : {name}")
+        self.reader = matching[0]
+        self.name = str(self.reader)
+
+    def read_tag(self):
+        """(uid, mémoire NDEF) du tag posé sur le lecteur, ou None s'il n'y en a pas"""
+        connection = self.reader.createConnection()
+        try:
+            connection.connect()
+        except (NoCardException, CardConnectionException):
+            return None
+        try:
+            uid, sw1, _ = connection.transmit(GET_UID)
+            if sw1 != 0x90:
+                return None
+            data = bytearray()
+            page = FIRST_NDEF_PAGE
+            while page < MAX_PAGES:
+                block, sw1, _ = connection.transmit([0xFF, 0xB0, 0x00, page, READ_PAGES * 4])
+                if sw1 != 0x90 or not block:
+                    break
+                data += bytes(block)
+                needed = _tlv_length(data)
+                if needed is not None and len(data) >= needed:
+                    break
+                page += READ_PAGES
+            return bytes(uid).hex(), bytes(data)
+        except CardConnectionException:
+            # Tag retiré pendant la lecture
+            return None
+        finally:
+            try:
+                connection.disconnect()
+            except CardConnectionException:
+                pass
+
+
+class SimulatedReader:
+    """Rejoue des contenus de tags : chaque tag est posé pendant un relevé, puis retiré"""
+
+    name = "simulé"
+
+    def __init__(self, payloads, loop=False):
+        self.payloads = list(payloads)
+        self.loop = loop
+        self._index = 0
+        self._present = False
+
+    @classmethod
+    def from_path(cls, path, loop=False):
+        """Fichiers .ndef (message NDEF) ou .bin (image mémoire) d'un dossier, dans l'ordre"""
+        if os.path.isdir(path):
+            names = sorted(n for n in os.listdir(path) if n.endswith((".ndef", ".bin")))
+            files = [os.path.join(path, n) for n in names]
+        else:
+            files = [path]
+        payloads = []
+        for file in files:
+            with open(file, "rb") as f:
+                data = f.read()
+            if file.endswith(".ndef"):
+                data = spotag_ndef.tlv(data)
+            payloads.append((os.path.splitext(os.path.basename(file))[0], data))
+        return cls(payloads, loop=loop)
+
+    def read_tag(self):
+        if self._present or not self.payloads:
+            self._present = False
+            return None
+        if self._index >= len(self.payloads):
+            if not self.loop:
+                return None
+            self._index = 0
+        uid, data = self.payloads[self._index]
+        self._index += 1
+        self._present = True
+        return uid, data
+
+    @property
+    def finished(self):
+        return not self.loop and self._index >= len(self.payloads) and not self._present
+
+
+def link_from_url(url, lookup_tag=None):
+    """URI Spotify d'une URL lue sur un tag (URL Spotag, code court ou lien Spotify)"""
+    uri = spotag_links.canonical_uri(url)
+    if uri is not None:
+        return uri
+    parts = urlsplit(url)
+    if parts.path == "/spotify":
+        link = parse_qs(parts.query).get("link", [""])[0]
+        return spotag_links.canonical_uri(link) if link else None
+    if parts.path.startswith("/t/") and lookup_tag is not None:
+        return lookup_tag(unquote(parts.path[3:]))
+    return None
+
+
+class ReaderService:
+    """Relève le lecteur dans un thread et confie les liens lus à ``submit(link)``
+
+    ``submit`` retourne False quand le scan est refusé (limites de spotag_limits).
+    """
+
+    def __init__(self, reader, submit, lookup_tag=None, poll_interval=DEFAULT_POLL_INTERVAL,
+                 on_tag=None):
+        self.reader = reader
+        self.submit = submit
+        self.lookup_tag = lookup_tag
+        # Appelé avec (uid, mémoire) pour chaque nouveau tag (enregistrement...)
+        self.on_tag = on_tag
+        self.poll_interval = poll_interval
+        self._stopping = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._current_uid = None
+        self.last_read_ms = None
+        self.counters = {"reads": 0, "dispatched": 0, "rejected": 0, "unreadable": 0, "errors": 0}
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="spotag-reader", daemon=True)
+        self._thread.start()
+        print(f"📇 Lecteur NFC actif: {self.reader.name}")
+
+    def stop(self):
+        self._stopping.set()
+
+    def _run(self):
+        while not self._stopping.is_set():
+            if getattr(self.reader, "finished", False):
+                print(f"📇 Lecteur {self.reader.name}: tous les tags ont été rejoués")
+                return
+            try:
+                self.poll()
+            except Exception as e:
+                with self._lock:
+                    self.counters["errors"] += 1
+                print(f"Erreur lors de la lecture du lecteur NFC: {e}")
+                self._stopping.wait(1.0)
+            self._stopping.wait(self.poll_interval)
+
+    def poll(self):
+        """Un relevé du lecteur ; retourne le lien envoyé, s'il y en a un"""
+        start = time.perf_counter()
+        tag = self.reader.read_tag()
+        if tag is None:
+            self._current_uid = None
+            return None
+        uid, data = tag
+        if uid == self._current_uid:
+            return None  # tag toujours posé
+        self._current_uid = uid
+        elapsed = (time.perf_counter() - start) * 1000
+        if self.on_tag is not None:
+            self.on_tag(uid, data)
+        message = spotag_ndef.parse_tlv(data)
+        url = spotag_ndef.parse_uri_record(message) if message else None
+        link = link_from_url(url, self.lookup_tag) if url else None
+        with self._lock:
+            self.counters["reads"] += 1
+            self.last_read_ms = elapsed
+            if link is None:
+                self.counters["unreadable"] += 1
+        if link is None:
+            print(f"⚠️ Tag {uid} sans lien Spotify reconnu ({url or 'aucun enregistrement URI'})")
+            return None
+        accepted = self.submit(link) is not False
+        with self._lock:
+            self.counters["dispatched" if accepted else "rejected"] += 1
+        return link if accepted else None
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+            stats["reader"] = self.reader.name
+            stats["last_read_ms"] = round(self.last_read_ms, 3) if self.last_read_ms is not None else None
+        return stats
+
+
+def open_reader(mode, name=None, replay_path=None):
+    """Lecteur correspondant au mode de la configuration"""
+    if mode == "pcsc":
+        return PcscReader(name)
+    if mode == "simulated":
+        if not replay_path:
+            raise ReaderError("reader_replay_path est vide")
+        # Une seule fois : en boucle, les mêmes liens seraient rouverts sans fin
+        return SimulatedReader.from_path(replay_path)
+    raise ReaderError(f"mode de lecteur inconnu : {mode}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Lit les tags Spotag sur un lecteur NFC USB")
+    parser.add_argument("--list", action="store_true", help="liste les lecteurs PC/SC")
+    parser.add_argument("--reader", help="partie du nom du lecteur à utiliser")
+    parser.add_argument("--record", metavar="DOSSIER",
+                        help="enregistre chaque tag lu (.bin) pour le rejouer plus tard")
+    parser.add_argument("--simulate", metavar="CHEMIN",
+                        help="rejoue des tags enregistrés au lieu d'un vrai lecteur")
+    parser.add_argument("--registry", help="registre des codes courts pour résoudre les URL /t/")
+    parser.add_argument("--interval", type=float, default=DEFAULT_POLL_INTERVAL)
+    args = parser.parse_args(argv)
+
+    if args.list:
+        if pcsc_readers is None:
+            print("❌ pyscard n'est pas installé", file=sys.stderr)
+            return 1
+        for reader in pcsc_readers():
+            print(reader)
+        return 0
+
+    try:
+        if args.simulate:
+            reader = SimulatedReader.from_path(args.simulate)
+        else:
+            reader = PcscReader(args.reader)
+    except (ReaderError, OSError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    if args.record:
+        os.makedirs(args.record, exist_ok=True)
+
+    def record(uid, data):
+        with open(os.path.join(args.record, f"{uid}.bin"), "wb") as f:
+            f.write(data)
+
+    # Les liens sont seulement affichés : rien n'est ouvert
+    lookup_tag = None
+    if args.registry:
+        import spotag_registry
+        lookup_tag = spotag_registry.TagRegistry(args.registry).lookup
+    service = ReaderService(reader, lambda link: None, lookup_tag=lookup_tag,
+                            poll_interval=args.interval, on_tag=record if args.record else None)
+    print(f"📇 Lecteur: {reader.name} (Ctrl+C pour arrêter)", file=sys.stderr)
+    try:
+        while not getattr(reader, "finished", False):
+            link = service.poll()
+            if link:
+                print(f"{link}\t{service.last_read_ms:.1f} ms")
+                sys.stdout.flush()
+            time.sleep(args.interval if not args.simulate else 0)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
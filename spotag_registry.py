@@ -0,0 +1,345 @@
+"""Registre des codes courts de tags
+
+Les codes ne tiennent pas compte de la casse : ils sont enregistrés et
+cherchés en minuscules (``/t/K3`` et ``/t/k3`` désignent le même tag).
+
+Un tag peut contenir ``http://<ip>:5000/t/<code>`` au lieu de l'URI Spotify
+complète : le code est associé à l'URI dans une petite base SQLite, et la
+table entière est gardée dans un dictionnaire en mémoire pour que chaque scan
+soit résolu sans accès disque. Changer l'URI d'un code ne demande pas de
+réécrire le tag. Les modifications faites par un autre processus (ligne de
+commande, autre worker) sont détectées via ``PRAGMA data_version`` au plus une
+fois par seconde pour les lectures, et systématiquement au début de chaque
+écriture.
+
+Usage :
+    python spotag_registry.py add spotify:playlist:37i9dQZF1DXcBWIGoYBM5M
+    python spotag_registry.py import playlist.csv
+    python spotag_registry.py remap k3 spotify:album:1ATL5GLyefJaxhQzSPVrLX
+    python spotag_registry.py export > tags.csv
+"""
+import argparse
+import csv
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+
+import spotag_config
+import spotag_links
+
+
+DEFAULT_REGISTRY_FILE = spotag_config.REGISTRY_FILE
+CODE_ALPHABET = "0123456789abcdefghijklmnopqrstuvwxyz"
+CODE_RE = re.compile(r"^[0-9A-Za-z_-]{1,32}$")
+RELOAD_INTERVAL = 1.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tags (
+    code TEXT PRIMARY KEY,
+    uri TEXT NOT NULL,
+    created REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+class RegistryError(ValueError):
+    """Code ou URI refusé par le registre"""
+
+
+def encode_code(number):
+    """Code en base 36 (minuscules) : court et insensible aux claviers de téléphone"""
+    digits = []
+    while True:
+        number, rest = divmod(number, len(CODE_ALPHABET))
+        digits.append(CODE_ALPHABET[rest])
+        if not number:
+            return "".join(reversed(digits))
+
+
+class TagRegistry:
+    """Codes courts -> URI Spotify, index en mémoire adossé à SQLite"""
+
+    def __init__(self, path=DEFAULT_REGISTRY_FILE, reload_interval=RELOAD_INTERVAL):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.reload_interval = reload_interval
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.executescript(SCHEMA)
+        self._by_code = {}
+        self._by_uri = {}
+        self._data_version = None
+        self._checked = 0.0
+        with self._lock:
+            self._load_locked()
+
+    def _load_locked(self):
+        # lower() : codes enregistrés avec des majuscules par une version précédente
+        rows = self._conn.execute("SELECT lower(code), uri FROM tags").fetchall()
+        self._by_code = dict(rows)
+        self._by_uri = {}
+        for code, uri in rows:
+            self._by_uri.setdefault(uri, code)
+        self._data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        self._checked = time.monotonic()
+
+    def _maybe_reload_locked(self):
+        now = time.monotonic()
+        if now - self._checked < self.reload_interval:
+            return
+        self._checked = now
+        version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        if version != self._data_version:
+            self._load_locked()
+
+    def lookup(self, code):
+        """URI associée au code, ou None (lecture du dictionnaire en mémoire)"""
+        code = code.lower()
+        with self._lock:
+            if self.reload_interval is not None:
+                self._maybe_reload_locked()
+            return self._by_code.get(code)
+
+    def code_for(self, uri):
+        with self._lock:
+            return self._by_uri.get(uri)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._by_code)
+
+    def _canonical(self, uri):
+        canonical = spotag_links.canonical_uri(uri)
+        if canonical is None:
+            raise RegistryError(f"lien Spotify invalide : {uri}")
+        return canonical
+
+    def _check_code(self, code):
+        if not CODE_RE.match(code):
+            raise RegistryError(f"code invalide : {code}")
+        return code.lower()
+
+    def _next_code_locked(self):
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'next_code'").fetchone()
+        number = row[0] if row else 0
+        while encode_code(number) in self._by_code:
+            number += 1
+        self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('next_code', ?)",
+                           (number + 1,))
+        return encode_code(number)
+
+    def _begin_locked(self):
+        """Ouvre la transaction d'écriture et recharge l'index si un autre processus a écrit
+
+        Une fois le verrou d'écriture SQLite pris, l'index en mémoire reflète
+        exactement la base : les vérifications qui suivent ne peuvent pas se
+        fier à un index périmé.
+        """
+        self._conn.execute("BEGIN IMMEDIATE")
+        version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        if version != self._data_version:
+            self._load_locked()
+
+    def _commit_locked(self):
+        self._conn.execute("COMMIT")
+        self._data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def _rollback_locked(self):
+        self._conn.execute("ROLLBACK")
+
+    def add(self, uri, code=None):
+        """Enregistre une URI ; retourne son code (le code existant si elle est déjà connue)"""
+        uri = self._canonical(uri)
+        if code is not None:
+            code = self._check_code(code)
+        with self._lock:
+            self._begin_locked()
+            try:
+                existing = self._by_uri.get(uri)
+                if existing is not None and code in (None, existing):
+                    self._rollback_locked()
+                    return existing
+                if code is not None and code in self._by_code:
+                    raise RegistryError(f"code déjà utilisé : {code}")
+                if code is None:
+                    code = self._next_code_locked()
+                self._conn.execute("INSERT INTO tags (code, uri, created) VALUES (?, ?, ?)",
+                                   (code, uri, time.time()))
+                self._commit_locked()
+            except sqlite3.IntegrityError:
+                # Filet de sécurité : code inséré entre-temps avec une autre casse
+                self._rollback_locked()
+                raise RegistryError(f"code déjà utilisé : {code}")
+            except Exception:
+                self._rollback_locked()
+                raise
+            self._by_code[code] = uri
+            self._by_uri.setdefault(uri, code)
+        return code
+
+    def remap(self, code, uri):
+        """Associe un code existant à une autre URI, sans toucher au tag"""
+        uri = self._canonical(uri)
+        code = code.lower()
+        with self._lock:
+            self._begin_locked()
+            try:
+                old = self._by_code.get(code)
+                if old is None:
+                    raise RegistryError(f"code inconnu : {code}")
+                self._conn.execute("UPDATE tags SET uri = ? WHERE lower(code) = ?", (uri, code))
+                self._commit_locked()
+            except Exception:
+                self._rollback_locked()
+                raise
+            self._by_code[code] = uri
+            if self._by_uri.get(old) == code:
+                del self._by_uri[old]
+            self._by_uri.setdefault(uri, code)
+
+    def remove(self, code):
+        code = code.lower()
+        with self._lock:
+            self._begin_locked()
+            try:
+                uri = self._by_code.get(code)
+                if uri is None:
+                    raise RegistryError(f"code inconnu : {code}")
+                self._conn.execute("DELETE FROM tags WHERE lower(code) = ?", (code,))
+                self._commit_locked()
+            except Exception:
+                self._rollback_locked()
+                raise
+            del self._by_code[code]
+            if self._by_uri.get(uri) == code:
+                del self._by_uri[uri]
+
+    def import_entries(self, entries, replace=False):
+        """Import en une transaction de (code ou None, lien) ; retourne (ajoutés, erreurs)"""
+        added, errors = [], []
+        with self._lock:
+            self._begin_locked()
+            try:
+                for code, link in entries:
+                    uri = spotag_links.canonical_uri(link)
+                    if uri is None or code is not None and not CODE_RE.match(code):
+                        errors.append((code, link))
+                        continue
+                    if code is not None:
+                        code = code.lower()
+                    if code is None:
+                        code = self._by_uri.get(uri)
+                        if code is not None:
+                            continue
+                        code = self._next_code_locked()
+                    elif code in self._by_code:
+                        old = self._by_code[code]
+                        if not replace:
+                            if old != uri:
+                                errors.append((code, link))
+                            continue
+                        if self._by_uri.get(old) == code:
+                            del self._by_uri[old]
+                        # Ligne éventuellement enregistrée avec des majuscules
+                        self._conn.execute("DELETE FROM tags WHERE lower(code) = ?", (code,))
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO tags (code, uri, created) VALUES (?, ?, ?)",
+                        (code, uri, time.time()))
+                    self._by_code[code] = uri
+                    self._by_uri.setdefault(uri, code)
+                    added.append((code, uri))
+                self._commit_locked()
+            except Exception:
+                # L'index en mémoire a suivi les lignes annulées
+                self._rollback_locked()
+                self._load_locked()
+                raise
+        return added, errors
+
+    def export(self):
+        """(code, uri) de tous les tags, dans l'ordre de création"""
+        with self._lock:
+            rows = self._conn.execute("SELECT code, uri FROM tags ORDER BY created, code").fetchall()
+        return rows
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def short_url(code, host, port=5000):
+    """URL courte d'un tag enregistré"""
+    netloc = host if int(port) == 80 else f"{host}:{port}"
+    return f"http://{netloc}/t/{code}"
+
+
+def _import_rows(paths):
+    """Lignes ``code,lien`` (CSV, comme l'export) ou simples liens (codes générés)"""
+    import spotag_convert
+    for name, stream in spotag_convert.open_inputs(paths):
+        for row in csv.reader(stream):
+            cells = [cell.strip() for cell in row]
+            if not cells or not cells[0] or cells[0].startswith("#") or cells[0].lower() == "code":
+                continue
+            if len(cells) >= 2 and CODE_RE.match(cells[0]) and spotag_links.canonical_uri(cells[1]):
+                yield cells[0], cells[1]
+            else:
+                link = next((c for c in cells if spotag_links.canonical_uri(c)), None)
+                yield None, link or ",".join(cells)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gère les codes courts des tags Spotag")
+    parser.add_argument("--file", default=DEFAULT_REGISTRY_FILE, help="base du registre")
+    commands = parser.add_subparsers(dest="command", required=True)
+    add = commands.add_parser("add", help="enregistre un lien")
+    add.add_argument("link")
+    add.add_argument("--code")
+    remap = commands.add_parser("remap", help="associe un code à un autre lien")
+    remap.add_argument("code")
+    remap.add_argument("link")
+    remove = commands.add_parser("remove", help="supprime un code")
+    remove.add_argument("code")
+    bulk = commands.add_parser("import", help="importe des liens ou des lignes code,lien")
+    bulk.add_argument("inputs", nargs="*")
+    bulk.add_argument("--replace", action="store_true", help="remplace les codes existants")
+    commands.add_parser("export", help="écrit code,uri en CSV")
+    args = parser.parse_args(argv)
+
+    registry = TagRegistry(args.file, reload_interval=None)
+    try:
+        if args.command == "add":
+            print(registry.add(args.link, args.code))
+        elif args.command == "remap":
+            registry.remap(args.code, args.link)
+        elif args.command == "remove":
+            registry.remove(args.code)
+        elif args.command == "import":
+            added, errors = registry.import_entries(_import_rows(args.inputs), args.replace)
+            for code, link in errors:
+                print(f"⚠️ entrée refusée: {code or ''} {link}", file=sys.stderr)
+            print(f"✅ {len(added)} codes ajoutés, {len(errors)} entrées refusées", file=sys.stderr)
+            return 1 if errors else 0
+        elif args.command == "export":
+            writer = csv.writer(sys.stdout)
+            writer.writerow(("code", "uri"))
+            writer.writerows(registry.export())
+    except RegistryError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    finally:
+        registry.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,505 @@
+"""Moteurs de service HTTP pour Spotag"""
+import multiprocessing
+import multiprocessing.connection
+import os
+import queue
+import selectors
+import socket
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.exceptions import InternalServerError
+from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+from werkzeug.wsgi import LimitedStream, get_content_length
+
+from spotag_listen import DEFAULT_BACKLOG, prefork_supported
+
+
+DEFAULT_WORKERS = 8
+DEFAULT_TIMEOUT = 5
+DEFAULT_PROCESSES = max(2, os.cpu_count() or 2)
+# Attente d'un worker libre avant de répondre 503 à une nouvelle connexion
+SLOT_TIMEOUT = 1.0
+SERVICE_UNAVAILABLE = (b"HTTP/1.1 503 Service Unavailable\r\nRetry-After: 1\r\n"
+                       b"Content-Length: 0\r\nConnection: close\r\n\r\n")
+# Délai d'attente d'un worker qui interroge le processus principal
+QUERY_TIMEOUT = 2.0
+# Relance des workers prefork : 1 s, 2 s, 4 s... au plus 60 s, abandon après 5 arrêts de suite
+RESPAWN_BASE_DELAY = 1.0
+RESPAWN_MAX_DELAY = 60.0
+RESPAWN_MAX_FAILURES = 5
+# Un worker qui a tourné aussi longtemps n'est plus compté comme en échec
+RESPAWN_STABLE_AFTER = 30.0
+
+
+class KeepAliveRequestHandler(WSGIRequestHandler):
+    """Gestionnaire werkzeug qui garde la connexion ouverte entre deux requêtes
+
+    werkzeug ferme toujours la connexion après la réponse. Ici la réponse est
+    envoyée avec sa longueur (ou en chunked), le corps de la requête est lu
+    jusqu'au bout, puis la requête suivante est attendue au plus ``timeout``
+    secondes sur la même connexion. Un corps de requête en chunked ferme la
+    connexion, comme un client qui demande ``Connection: close``.
+    """
+
+    protocol_version = "HTTP/1.1"
+    served = 0
+
+    def setup(self):
+        super().setup()
+        # En-têtes et corps partent en deux écritures : sans TCP_NODELAY, la seconde
+        # attendrait l'ACK retardé du client (~40 ms) sur une connexion gardée ouverte
+        if self.connection.family in (socket.AF_INET, socket.AF_INET6):
+            self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def log_error(self, format, *args):
+        # Une connexion gardée ouverte qui reste inactive se termine ainsi, sans erreur
+        if self.served and format.startswith("Request timed out"):
+            return
+        super().log_error(format, *args)
+
+    def run_wsgi(self):
+        self.served += 1
+        if self.headers.get("Expect", "").lower().strip() == "100-continue":
+            self.wfile.write(b"HTTP/1.1 100 Continue\r\n\r\n")
+        self.environ = environ = self.make_environ()
+        body = None
+        if environ.get("wsgi.input_terminated") or (
+                "CONTENT_LENGTH" in environ and get_content_length(environ) is None):
+            # Fin du corps inconnue : impossible de retrouver la requête suivante
+            self.close_connection = True
+        else:
+            body = LimitedStream(self.rfile, get_content_length(environ) or 0)
+            environ["wsgi.input"] = body
+        keep_alive = not self.close_connection and self.server.keep_alive_allowed()
+        state = {"status": None, "headers": None, "sent": False, "chunked": False}
+
+        def write(data):
+            if not state["sent"]:
+                state["sent"] = True
+                code_str, _, msg = state["status"].partition(" ")
+                code = int(code_str)
+                self.send_response(code, msg)
+                keys = set()
+                for key, value in state["headers"]:
+                    if key.lower() == "connection":
+                        continue
+                    self.send_header(key, value)
+                    keys.add(key.lower())
+                if not ("content-length" in keys or environ["REQUEST_METHOD"] == "HEAD"
+                        or 100 <= code < 200 or code in (204, 304)):
+                    state["chunked"] = True
+                    self.send_header("Transfer-Encoding", "chunked")
+                self.send_header("Connection", "keep-alive" if keep_alive else "close")
+                self.end_headers()
+            if data:
+                if state["chunked"]:
+                    self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+                else:
+                    self.wfile.write(data)
+            self.wfile.flush()
+
+        def start_response(status, headers, exc_info=None):
+            if exc_info and state["sent"]:
+                raise exc_info[1].with_traceback(exc_info[2])
+            state["status"], state["headers"] = status, headers
+            return write
+
+        def execute(app):
+            application_iter = app(environ, start_response)
+            try:
+                for data in application_iter:
+                    write(data)
+                if not state["sent"]:
+                    write(b"")
+                if state["chunked"]:
+                    self.wfile.write(b"0\r\n\r\n")
+            finally:
+                if hasattr(application_iter, "close"):
+                    application_iter.close()
+
+        try:
+            execute(self.server.app)
+            if body is not None:
+                # Corps non lu par l'application : la requête suivante commence après
+                body.exhaust()
+        except (ConnectionError, socket.timeout) as e:
+            self.close_connection = True
+            self.connection_dropped(e, environ)
+        except Exception:
+            self.close_connection = True
+            if not state["sent"]:
+                keep_alive = False
+                try:
+                    execute(InternalServerError())
+                except Exception:
+                    pass
+            self.server.log("error", f"Error on request:\n{traceback.format_exc()}")
+        if not keep_alive:
+            self.close_connection = True
+
+
+class ThreadPoolWSGIServer(BaseWSGIServer):
+    """Serveur WSGI avec un pool de threads borné
+
+    Le thread d'acceptation confie chaque connexion à un pool de taille fixe.
+    Quand tous les workers sont occupés, il arrête d'accepter : les nouvelles
+    connexions attendent dans la file d'écoute du noyau (backlog) au lieu de
+    créer un thread de plus.
+
+    Les connexions HTTP/1.1 restent ouvertes entre deux requêtes
+    (KeepAliveRequestHandler) tant que la moitié des workers au moins reste
+    libre ; au-delà, la connexion est fermée après la réponse pour laisser la
+    place. ``timeout`` borne le temps accordé au client pour envoyer sa
+    requête, et l'inactivité d'une connexion gardée ouverte. Si aucun worker
+    ne se libère en ``SLOT_TIMEOUT`` secondes, la nouvelle connexion reçoit
+    un 503 ; l'acceptation n'est jamais bloquée plus longtemps, pour que
+    l'arrêt du serveur reste possible.
+    """
+
+    def __init__(self, host, port, app, workers=DEFAULT_WORKERS,
+                 backlog=DEFAULT_BACKLOG, timeout=DEFAULT_TIMEOUT, reuse_port=False,
+                 on_connection=None, sock=None):
+        self.workers = max(1, int(workers))
+        self.reuse_port = reuse_port
+        # Appelé dès l'acceptation, avant la lecture de la requête
+        self.on_connection = on_connection
+        # Lu par socketserver au moment du listen()
+        self.request_queue_size = max(1, int(backlog))
+        handler = type("SpotagRequestHandler", (KeepAliveRequestHandler,),
+                       {"timeout": timeout})
+        # Avec sock (bind_listener), le socket déjà en écoute est repris tel quel
+        super().__init__(host, port, app, handler=handler,
+                         fd=sock.fileno() if sock is not None else None)
+        if sock is not None:
+            sock.close()  # werkzeug en garde un duplicata
+        self._pool = ThreadPoolExecutor(max_workers=self.workers,
+                                        thread_name_prefix="spotag-http")
+        self._slots = threading.BoundedSemaphore(self.workers)
+        self._busy = 0
+        self._busy_lock = threading.Lock()
+        # shutdown() écrit un octet pour réveiller serve_forever()
+        self._wake_reader, self._wake_writer = socket.socketpair()
+        self._stopped = threading.Event()
+        self._stopped.set()
+
+    def _count(self, delta):
+        with self._busy_lock:
+            self._busy += delta
+
+    def keep_alive_allowed(self):
+        """Garder une connexion ouverte seulement si la moitié des workers reste libre"""
+        return self._busy <= self.workers // 2
+
+    def server_bind(self):
+        if self.reuse_port:
+            # Plusieurs processus écoutent sur le même port, le noyau répartit
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        super().server_bind()
+
+    def process_request(self, request, client_address):
+        if self.on_connection is not None:
+            self.on_connection()
+        # Attente bornée d'un worker libre, puis 503
+        if not self._slots.acquire(timeout=SLOT_TIMEOUT):
+            try:
+                request.sendall(SERVICE_UNAVAILABLE)
+            except OSError:
+                pass
+            self.shutdown_request(request)
+            return
+        self._count(1)
+        try:
+            self._pool.submit(self._process_request_worker, request, client_address)
+        except RuntimeError:
+            # Pool arrêté pendant la fermeture du serveur
+            self._count(-1)
+            self._slots.release()
+            self.shutdown_request(request)
+
+    def _process_request_worker(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self._count(-1)
+            self._slots.release()
+
+    def serve_forever(self, poll_interval=None):
+        """Accepte jusqu'à shutdown() sans réveil périodique
+
+        socketserver relève son drapeau d'arrêt toutes les ``poll_interval``
+        secondes ; ici la boucle dort jusqu'à une connexion ou jusqu'à l'octet
+        écrit par shutdown() sur une paire de sockets.
+        """
+        self._stopped.clear()
+        try:
+            with selectors.DefaultSelector() as selector:
+                selector.register(self, selectors.EVENT_READ)
+                selector.register(self._wake_reader, selectors.EVENT_READ)
+                while True:
+                    ready = [key.fileobj for key, _ in selector.select()]
+                    if self._wake_reader in ready:
+                        break
+                    self._handle_request_noblock()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.server_close()
+            self._stopped.set()
+
+    def shutdown(self):
+        """Réveille serve_forever() et attend sa fin"""
+        try:
+            self._wake_writer.send(b"\0")
+        except OSError:
+            pass  # serveur déjà fermé
+        self._stopped.wait()
+
+    def server_close(self):
+        super().server_close()
+        # Aussi appelé par werkzeug pendant __init__, avant la création du pool
+        pool = getattr(self, "_pool", None)
+        if pool is not None:
+            pool.shutdown(wait=False)
+            self._wake_reader.close()
+            self._wake_writer.close()
+
+
+def make_threaded_server(app, host="0.0.0.0", port=5000, workers=DEFAULT_WORKERS,
+                         backlog=DEFAULT_BACKLOG, timeout=DEFAULT_TIMEOUT, reuse_port=False,
+                         on_connection=None, sock=None):
+    """Crée (et lie, sauf si sock est fourni) le serveur à pool de threads, sans le démarrer"""
+    return ThreadPoolWSGIServer(host, port, app, workers=workers, backlog=backlog,
+                                timeout=timeout, reuse_port=reuse_port,
+                                on_connection=on_connection, sock=sock)
+
+
+class _MainProcessQuery:
+    """Côté worker : questions au processus principal par un Pipe, une à la fois"""
+
+    def __init__(self, conn, timeout=QUERY_TIMEOUT):
+        self.conn = conn
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._seq = 0
+
+    def __call__(self, kind, argument=None):
+        with self._lock:
+            self._seq += 1
+            deadline = time.monotonic() + self.timeout
+            try:
+                self.conn.send((self._seq, kind, argument))
+                while True:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0 or not self.conn.poll(remaining):
+                        return None
+                    seq, reply = self.conn.recv()
+                    # Une réponse arrivée après un délai dépassé est ignorée
+                    if seq == self._seq:
+                        return reply
+            except (EOFError, OSError):
+                return None
+
+
+def _prefork_worker(host, port, links, queries, bound, limits, registry_file,
+                    workers, backlog, timeout):
+    """Point d'entrée d'un processus worker : sert /spotify sans Tk ni pystray"""
+    import spotag_dispatch
+    import spotag_web
+
+    # Les liens sont renvoyés au processus principal qui les ouvre ; /dispatch,
+    # /stats et /readyz lui sont demandés
+    spotag_web.dispatcher = spotag_dispatch.ForwardingDispatcher(
+        links, query=_MainProcessQuery(queries))
+    if limits:
+        # Limites appliquées par processus
+        spotag_web.admission.configure(**limits)
+    if registry_file:
+        # Chaque worker garde son propre index des codes courts
+        import spotag_registry
+        spotag_web.registry = spotag_registry.TagRegistry(registry_file)
+    server = make_threaded_server(spotag_web.app, host=host, port=port, workers=workers,
+                                  backlog=backlog, timeout=timeout, reuse_port=True)
+    spotag_web.listening = True
+    bound.set()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+class PreforkServer:
+    """N processus workers qui acceptent sur le même port via SO_REUSEPORT
+
+    Les workers ne font que le HTTP : chaque lien reçu remonte par une file
+    multiprocessing jusqu'au processus principal, où ``dispatch(link, dispatch_id)``
+    le prend en charge. Les questions des workers sur la file (/dispatch/<id>,
+    /stats, /readyz) arrivent par un Pipe et sont confiées à ``query(kind, argument)``.
+    Un superviseur relance les workers qui meurent, avec un délai qui double
+    à chaque arrêt rapproché ; après ``RESPAWN_MAX_FAILURES`` arrêts de suite,
+    l'emplacement est abandonné.
+    """
+
+    def __init__(self, dispatch, host="0.0.0.0", port=5000, processes=DEFAULT_PROCESSES,
+                 workers=DEFAULT_WORKERS, backlog=DEFAULT_BACKLOG, timeout=DEFAULT_TIMEOUT,
+                 limits=None, registry_file=None, check_interval=1.0, query=None):
+        if not prefork_supported():
+            raise RuntimeError("SO_REUSEPORT n'est pas disponible sur ce système")
+        self.dispatch = dispatch
+        self.query = query
+        self.host = host
+        self.port = port
+        self.processes = max(1, int(processes))
+        self.limits = limits
+        self.registry_file = registry_file
+        self.worker_args = (workers, backlog, timeout)
+        self.check_interval = check_interval
+        # "spawn" : ne pas dupliquer un parent qui a déjà des threads Tk/pystray
+        self._ctx = multiprocessing.get_context("spawn")
+        self._links = self._ctx.Queue()
+        # Positionné par le premier worker qui a lié le port
+        self._bound = self._ctx.Event()
+        self._procs = []
+        self._conns = []
+        self._started = []
+        self._failures = []
+        self._restart_at = []
+        self._conns_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self.respawns = 0
+
+    def _spawn(self, index):
+        parent_conn, child_conn = self._ctx.Pipe()
+        proc = self._ctx.Process(
+            target=_prefork_worker,
+            args=(self.host, self.port, self._links, child_conn, self._bound, self.limits,
+                  self.registry_file) + self.worker_args,
+            name="spotag-prefork",
+            daemon=True,
+        )
+        proc.start()
+        child_conn.close()
+        with self._conns_lock:
+            old = self._conns[index]
+            self._conns[index] = parent_conn
+        if old is not None:
+            old.close()
+        self._procs[index] = proc
+        self._started[index] = time.monotonic()
+
+    def start(self):
+        """Lance les workers, le superviseur et les threads d'ouverture et de réponse"""
+        self._procs = [None] * self.processes
+        self._conns = [None] * self.processes
+        self._started = [0.0] * self.processes
+        self._failures = [0] * self.processes
+        self._restart_at = [None] * self.processes
+        for index in range(self.processes):
+            self._spawn(index)
+        threading.Thread(target=self._dispatch_loop, name="spotag-prefork-dispatch",
+                         daemon=True).start()
+        threading.Thread(target=self._answer_loop, name="spotag-prefork-queries",
+                         daemon=True).start()
+        threading.Thread(target=self._supervise, name="spotag-prefork-supervisor",
+                         daemon=True).start()
+
+    def wait_bound(self, timeout=None):
+        """Attend qu'au moins un worker écoute sur le port"""
+        return self._bound.wait(timeout)
+
+    def _dispatch_loop(self):
+        while not self._stopping.is_set():
+            try:
+                link, dispatch_id = self._links.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            except (EOFError, OSError):
+                break
+            try:
+                self.dispatch(link, dispatch_id)
+            except Exception as e:
+                print(f"Erreur lors de l'ouverture du lien {link}: {e}")
+
+    def _answer_loop(self):
+        while not self._stopping.is_set():
+            with self._conns_lock:
+                conns = [conn for conn in self._conns if conn is not None]
+            if not conns:
+                self._stopping.wait(0.5)
+                continue
+            try:
+                ready = multiprocessing.connection.wait(conns, timeout=0.5)
+            except (OSError, ValueError):
+                # Pipe fermé pendant l'attente par _spawn() ou stop()
+                continue
+            for conn in ready:
+                try:
+                    seq, kind, argument = conn.recv()
+                except (EOFError, OSError):
+                    # Worker arrêté : le superviseur remplacera ce Pipe
+                    with self._conns_lock:
+                        if conn in self._conns:
+                            self._conns[self._conns.index(conn)] = None
+                    conn.close()
+                    continue
+                try:
+                    reply = self.query(kind, argument) if self.query is not None else None
+                except Exception as e:
+                    print(f"Erreur lors de la réponse à un worker prefork: {e}")
+                    reply = None
+                try:
+                    conn.send((seq, reply))
+                except OSError:
+                    pass
+
+    def _supervise(self):
+        while not self._stopping.wait(self.check_interval):
+            now = time.monotonic()
+            for index, proc in enumerate(self._procs):
+                if proc is None or proc.is_alive():
+                    continue
+                restart_at = self._restart_at[index]
+                if restart_at is None:
+                    # Un worker qui a tenu RESPAWN_STABLE_AFTER secondes repart à zéro
+                    if now - self._started[index] >= RESPAWN_STABLE_AFTER:
+                        self._failures[index] = 0
+                    self._failures[index] += 1
+                    if self._failures[index] >= RESPAWN_MAX_FAILURES:
+                        print(f"❌ Worker prefork {proc.pid} arrêté {RESPAWN_MAX_FAILURES} fois "
+                              f"de suite (code {proc.exitcode}), il n'est plus relancé")
+                        self._procs[index] = None
+                        if not any(self._procs):
+                            print("❌ Plus aucun worker prefork : les scans ne sont plus servis")
+                        continue
+                    delay = min(RESPAWN_MAX_DELAY,
+                                RESPAWN_BASE_DELAY * 2 ** (self._failures[index] - 1))
+                    self._restart_at[index] = now + delay
+                    print(f"Worker prefork {proc.pid} arrêté (code {proc.exitcode}), "
+                          f"redémarrage dans {delay:g} s")
+                    continue
+                if now < restart_at:
+                    continue
+                self._restart_at[index] = None
+                self._spawn(index)
+                self.respawns += 1
+
+    def stop(self):
+        """Arrête le superviseur puis les workers"""
+        self._stopping.set()
+        procs = [proc for proc in self._procs if proc is not None]
+        for proc in procs:
+            proc.terminate()
+        deadline = time.monotonic() + 2
+        for proc in procs:
+            proc.join(max(0, deadline - time.monotonic()))
+        with self._conns_lock:
+            for conn in self._conns:
+                if conn is not None:
+                    conn.close()
@@ -0,0 +1,280 @@
+"""Serveur de scans de Spotag, sans interface
+
+Assemble ce que l'interface graphique et le mode serveur seul ont en commun :
+lanceur et pré-chauffage, file d'ouverture, limites, registre des codes
+courts, lecteur NFC USB et serveur HTTP dans le mode choisi. Aucune
+bibliothèque d'interface (tkinter, pystray, PIL) n'est importée ici.
+
+Ordre de démarrage : le port est lié d'abord (``bind``, avant même l'import
+de werkzeug et de Flask), puis le serveur accepte les scans ; ceux qui arrivent avant que le
+lanceur soit prêt attendent dans la file d'ouverture au lieu d'être refusés.
+"""
+import threading
+from datetime import datetime
+
+import spotag_links
+import spotag_listen
+
+
+PREFORK_BIND_TIMEOUT = 10
+
+
+class SpotagService:
+    """Lanceur, file d'ouverture et serveur HTTP configurés d'après la configuration"""
+
+    def __init__(self, config, get_local_ip=None):
+        self.config = config
+        self.server_port = int(config.get("server_port", 5000))
+        self.get_local_ip = get_local_ip or (lambda: "0.0.0.0")
+        self.mode = self.config.get("server_mode", "threaded")
+        if self.mode == "prefork" and not spotag_listen.prefork_supported():
+            print("⚠️ Mode prefork indisponible sur ce système, utilisation du mode threaded")
+            self.mode = "threaded"
+        self.listener = None
+        self.http_server = None
+        self.launcher = None
+        self.prewarmer = None
+        self.reader = None
+        self.registry = None
+
+    def bind(self):
+        """Lie le port tout de suite ; retourne False s'il est déjà utilisé"""
+        if self.mode == "prefork":
+            return True  # chaque worker lie le port lui-même (SO_REUSEPORT)
+        try:
+            self.listener = spotag_listen.bind_listener(
+                '0.0.0.0', self.server_port,
+                backlog=self.config.get("server_backlog", spotag_listen.DEFAULT_BACKLOG))
+        except OSError as e:
+            print(f"Erreur lors du démarrage du serveur Flask: {e}")
+            return False
+        return True
+
+    def set_ui(self, ui):
+        """Pont vers la boucle de l'interface, pour la latence affichée par /stats"""
+        import spotag_web
+        spotag_web.ui = ui
+
+    def _on_connection(self):
+        if self.prewarmer is not None:
+            self.prewarmer.on_connection()
+
+    def setup_launcher(self):
+        """Résout une fois le programme qui ouvre les liens et le branche sur la file"""
+        import spotag_launcher
+        import spotag_prewarm
+        import spotag_web
+        backend = self.config.get("launcher_backend", "auto")
+        try:
+            self.launcher = spotag_launcher.Launcher(
+                backend,
+                command=self.config.get("launcher_command"),
+                use_helper=self.config.get("launcher_helper", True),
+                mpris_bus_name=self.config.get("mpris_bus_name", spotag_launcher.MPRIS_BUS_NAME),
+            )
+        except spotag_launcher.LaunchError as e:
+            print(f"⚠️ Lanceur {backend} indisponible ({e}), utilisation de webbrowser")
+            self.launcher = spotag_launcher.Launcher("webbrowser")
+        self.launcher.start()
+        spotag_web.launcher = self.launcher
+        print(f"✅ Liens ouverts avec: {self.launcher.backend.name}")
+
+        helper = self.launcher.helper
+        try:
+            self.prewarmer = spotag_prewarm.Prewarmer(
+                self.config.get("prewarm_policy", "off"),
+                warm_command=self.config.get("prewarm_command"),
+                keep_warm=self.config.get("prewarm_keep_warm", spotag_prewarm.DEFAULT_KEEP_WARM),
+                spawn=helper.spawn if helper is not None else None,
+            )
+        except ValueError as e:
+            print(f"⚠️ {e}, pré-chauffage désactivé")
+            self.prewarmer = spotag_prewarm.Prewarmer("off")
+        self.prewarmer.start()
+        spotag_web.prewarmer = self.prewarmer
+        spotag_web.dispatcher.opener = self.prewarmer.wrap(self.launcher.open)
+
+    def setup_reader(self):
+        """Démarre la lecture du lecteur NFC USB, si elle est activée"""
+        mode = self.config.get("reader_mode", "off")
+        if mode == "off":
+            return
+        import spotag_reader
+        import spotag_web
+        try:
+            reader = spotag_reader.open_reader(mode, self.config.get("reader_name"),
+                                               self.config.get("reader_replay_path"))
+        except (spotag_reader.ReaderError, OSError) as e:
+            print(f"⚠️ Lecteur NFC indisponible: {e}")
+            return
+        # Même chemin que les scans HTTP : limites puis file d'ouverture de spotag_web
+        self.reader = spotag_reader.ReaderService(
+            reader,
+            spotag_web.reader_scan,
+            lookup_tag=spotag_web.lookup_tag,
+            poll_interval=float(self.config.get("reader_poll_interval",
+                                                spotag_reader.DEFAULT_POLL_INTERVAL)),
+        )
+        spotag_web.reader = self.reader
+        self.reader.start()
+
+    def open_link(self, text):
+        """Lien reçu hors HTTP (ligne de commande, autre lancement) : même file que les scans"""
+        import spotag_web
+        uri = spotag_links.canonical_uri(text)
+        if uri is None:
+            return False
+        spotag_web.handle_link(uri)
+        return True
+
+    def start(self):
+        """Sert les scans, puis prépare le lanceur ; retourne False si le serveur n'a pas démarré"""
+        if self.listener is None and self.mode != "prefork" and not self.bind():
+            return False
+        # Flask n'est importé qu'ici, une fois le port déjà lié
+        import spotag_dispatch
+        import spotag_limits
+        import spotag_registry
+        import spotag_web
+        dispatcher = spotag_web.dispatcher
+        dispatcher.coalesce_window = float(self.config.get("dispatch_coalesce_window",
+                                                           spotag_dispatch.DEFAULT_COALESCE_WINDOW))
+        dispatcher.drop_superseded = bool(self.config.get("dispatch_drop_superseded", True))
+        # Les scans sont acceptés tout de suite et ouverts dès que le lanceur est prêt
+        dispatcher.hold()
+        dispatcher.start()
+        limits = {
+            "ip_rate": self.config.get("limit_ip_rate", spotag_limits.DEFAULT_IP_RATE),
+            "ip_burst": self.config.get("limit_ip_burst", spotag_limits.DEFAULT_IP_BURST),
+            "uri_rate": self.config.get("limit_uri_rate", spotag_limits.DEFAULT_URI_RATE),
+            "uri_burst": self.config.get("limit_uri_burst", spotag_limits.DEFAULT_URI_BURST),
+            "max_in_flight": self.config.get("limit_max_in_flight", spotag_limits.DEFAULT_MAX_IN_FLIGHT),
+        }
+        spotag_web.admission.configure(**limits)
+        registry_file = self.config.get("registry_file")
+        if registry_file:
+            try:
+                self.registry = spotag_web.registry = spotag_registry.TagRegistry(registry_file)
+            except Exception as e:
+                print(f"Erreur lors de l'ouverture du registre des tags: {e}")
+                registry_file = None
+
+        if not self.start_server(spotag_web, limits, registry_file):
+            dispatcher.release()
+            return False
+        self._log_started()
+        self.setup_launcher()
+        dispatcher.release()
+        self.setup_reader()
+        return True
+
+    def start_server(self, spotag_web, limits, registry_file):
+        """Démarre le serveur HTTP du mode choisi sur le port déjà lié"""
+        import spotag_server
+        app = spotag_web.app
+        dispatcher = spotag_web.dispatcher
+        listener, self.listener = self.listener, None
+        if self.mode == "prefork":
+            # Les workers ne font que le HTTP, les liens sont ouverts ici et leurs
+            # questions sur la file d'ouverture (/dispatch, /stats, /readyz) y sont traitées
+            self.http_server = spotag_server.PreforkServer(
+                dispatcher.submit,
+                host='0.0.0.0',
+                port=self.server_port,
+                processes=self.config.get("server_processes", spotag_server.DEFAULT_PROCESSES),
+                workers=self.config.get("server_workers", spotag_server.DEFAULT_WORKERS),
+                backlog=self.config.get("server_backlog", spotag_server.DEFAULT_BACKLOG),
+                timeout=self.config.get("server_timeout", spotag_server.DEFAULT_TIMEOUT),
+                limits=limits,
+                registry_file=registry_file,
+                query=spotag_web.answer_query,
+            )
+            self.http_server.start()
+            if not self.http_server.wait_bound(PREFORK_BIND_TIMEOUT):
+                print(f"Erreur lors du démarrage du serveur Flask: aucun worker n'écoute "
+                      f"sur le port {self.server_port}")
+                self.http_server.stop()
+                return False
+            spotag_web.listening = True
+            return True
+
+        try:
+            if self.mode == "asyncio":
+                # /spotify est servi par asyncio, les autres routes par Flask
+                import spotag_fastpath
+                self.http_server = spotag_fastpath.make_fastpath_server(
+                    app,
+                    timeout=self.config.get("server_timeout", spotag_fastpath.DEFAULT_TIMEOUT),
+                    on_connection=self._on_connection,
+                    sock=listener,
+                )
+                self.http_server.start_in_thread()
+                spotag_web.listening = True
+                return True
+            if self.mode == "dev":
+                # Serveur de développement de werkzeug (celui de app.run)
+                from werkzeug.serving import make_server
+                self.http_server = make_server('0.0.0.0', self.server_port, app,
+                                               threaded=True, fd=listener.fileno())
+                listener.close()
+            else:
+                self.http_server = spotag_server.make_threaded_server(
+                    app,
+                    workers=self.config.get("server_workers", spotag_server.DEFAULT_WORKERS),
+                    backlog=self.config.get("server_backlog", spotag_server.DEFAULT_BACKLOG),
+                    timeout=self.config.get("server_timeout", spotag_server.DEFAULT_TIMEOUT),
+                    on_connection=self._on_connection,
+                    sock=listener,
+                )
+        except Exception as e:
+            listener.close()
+            print(f"Erreur lors du démarrage du serveur Flask: {e}")
+            return False
+
+        # Démarrer le serveur dans un thread séparé
+        flask_thread = threading.Thread(target=self.http_server.serve_forever, daemon=True)
+        flask_thread.start()
+        spotag_web.listening = True
+        return True
+
+    def _log_started(self):
+        print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Serveur Flask à l'écoute ({self.mode}) sur http://{self.get_local_ip()}:{self.server_port}")
+
+    def stop(self):
+        """Arrête le serveur, le lecteur, le lanceur et ferme le registre"""
+        if self.http_server is not None:
+            import spotag_server
+            if isinstance(self.http_server, spotag_server.PreforkServer):
+                self.http_server.stop()
+            else:
+                self.http_server.shutdown()
+        if self.listener is not None:
+            self.listener.close()
+        if self.prewarmer:
+            self.prewarmer.stop()
+        if self.launcher:
+            self.launcher.stop()
+        if self.reader:
+            self.reader.stop()
+        if self.registry is not None:
+            self.registry.close()
+
+
+def start_service(profiler):
+    """Configuration, port lié puis scans servis : le début commun des deux modes
+
+    Retourne (service, réseau, démarré) ; l'interface est construite ensuite.
+    """
+    import spotag_config
+    import spotag_net
+    with profiler.phase("chargement de la configuration"):
+        config = spotag_config.load_config()
+    network = spotag_net.NetworkAddressService(
+        poll_interval=config.get("network_poll_interval", spotag_net.DEFAULT_POLL_INTERVAL))
+    service = SpotagService(config, get_local_ip=lambda: network.primary)
+    with profiler.phase("liaison du port"):
+        bound = service.bind()
+    with profiler.phase("démarrage du serveur"):
+        started = bound and service.start()
+    network.start()
+    return service, network, started
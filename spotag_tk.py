@@ -0,0 +1,101 @@
+"""Pont entre les threads d'arrière-plan et la boucle Tk
+
+Tk n'est pas thread-safe : seules les fonctions appelées depuis sa boucle
+peuvent toucher aux widgets. Les autres threads (pystray, réseau, serveur)
+déposent leurs mises à jour dans une file (``collections.deque``, sans verrou)
+que la boucle Tk vide toutes les ``DRAIN_INTERVAL`` millisecondes.
+
+Le pont mesure aussi la latence de la boucle : chaque fonction exécutée par
+la file qui dépasse ``STALL_THRESHOLD_MS`` est signalée, ainsi que tout retard
+du relevé lui-même (un gestionnaire d'événement Tk trop long).
+"""
+import time
+from collections import deque
+
+
+DRAIN_INTERVAL = 15
+STALL_THRESHOLD_MS = 16.0
+MAX_PER_DRAIN = 200
+# Au plus un message de blocage par seconde dans la console
+STALL_LOG_INTERVAL = 1.0
+
+
+def _name(callback):
+    return getattr(callback, "__qualname__", None) or repr(callback)
+
+
+class TkBridge:
+    """File de mises à jour pour la boucle Tk"""
+
+    def __init__(self, root, stall_threshold_ms=STALL_THRESHOLD_MS,
+                 interval=DRAIN_INTERVAL):
+        self.root = root
+        self.interval = interval
+        self.stall_threshold_ms = stall_threshold_ms
+        self._calls = deque()
+        self._expected = None
+        self._last_log = 0.0
+        self._stopped = False
+        self.stalls = 0
+        self.max_lag_ms = 0.0
+        self.max_handler_ms = 0.0
+
+    def start(self):
+        """À appeler depuis le thread Tk, avant mainloop"""
+        self._schedule()
+
+    def stop(self):
+        self._stopped = True
+
+    def call_soon(self, callback, *args):
+        """Exécute callback(*args) dans le thread Tk ; utilisable depuis n'importe quel thread"""
+        self._calls.append((callback, args))
+
+    def wrap(self, callback):
+        """Version de callback à donner à un autre thread (menus pystray...)"""
+        def relay(*args):
+            self.call_soon(callback, *args)
+        return relay
+
+    def _schedule(self):
+        if self._stopped:
+            return
+        self._expected = time.perf_counter() + self.interval / 1000
+        self.root.after(self.interval, self._drain)
+
+    def _drain(self):
+        # Retard du relevé : la boucle était occupée par un autre gestionnaire
+        lag = (time.perf_counter() - self._expected) * 1000
+        self.max_lag_ms = max(self.max_lag_ms, lag)
+        if lag > self.stall_threshold_ms:
+            self._report(f"boucle Tk en retard de {lag:.0f} ms")
+        for _ in range(MAX_PER_DRAIN):
+            try:
+                callback, args = self._calls.popleft()
+            except IndexError:
+                break
+            start = time.perf_counter()
+            try:
+                callback(*args)
+            except Exception as e:
+                print(f"Erreur dans {_name(callback)}: {e}")
+            elapsed = (time.perf_counter() - start) * 1000
+            self.max_handler_ms = max(self.max_handler_ms, elapsed)
+            if elapsed > self.stall_threshold_ms:
+                self._report(f"{_name(callback)} a bloqué la boucle Tk {elapsed:.0f} ms")
+        self._schedule()
+
+    def _report(self, message):
+        self.stalls += 1
+        now = time.monotonic()
+        if now - self._last_log >= STALL_LOG_INTERVAL:
+            self._last_log = now
+            print(f"🐢 {message}")
+
+    def stats(self):
+        return {
+            "stalls": self.stalls,
+            "max_lag_ms": round(self.max_lag_ms, 1),
+            "max_handler_ms": round(self.max_handler_ms, 1),
+            "pending": len(self._calls),
+        }
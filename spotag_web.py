@@ -0,0 +1,735 @@
+"""Application Flask de Spotag : reçoit les liens des tags NFC"""
+import gzip
+import hashlib
+import json
+import os
+import string
+import webbrowser
+
+from flask import Flask, Response, request
+
+import spotag_assets
+import spotag_dispatch
+import spotag_limits
+import spotag_links
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+# Créer l'application Flask
+app = Flask(__name__)
+
+# File d'ouverture des liens (remplacée par un transfert dans les workers prefork)
+dispatcher = spotag_dispatch.DispatchQueue(webbrowser.open)
+
+# Lanceur et pré-chauffage utilisés par la file (renseignés au démarrage, pour les statistiques)
+launcher = None
+prewarmer = None
+
+# Registre des codes courts servis par /t/<code> (ouvert au démarrage)
+registry = None
+
+# Lecteur NFC USB, s'il est activé (pour les statistiques)
+reader = None
+
+# Pont vers la boucle Tk de l'interface, s'il y en a une (latence de la boucle)
+ui = None
+
+# Vrai une fois le port lié et le serveur en train d'accepter (/readyz)
+listening = False
+
+# Limites par client, par lien et en nombre de requêtes simultanées
+admission = spotag_limits.AdmissionController()
+
+# Page affichée sur le téléphone après un scan (rendue une seule fois au démarrage)
+SUCCESS_PAGE_TEMPLATE = string.Template("""
+    <!DOCTYPE html>
+    <html lang="fr">
+    <head>
+        <meta charset="UTF-8">
+        <title>Spotag - Succès</title>
+        <meta name="viewport" content="width=device-width, initial-scale=1">
+        <meta name="theme-color" content="#1DB954">
+        <link rel="icon" type="image/x-png" href="$icon_url">
+        <style>
+            * {
+                margin: 0;
+                padding: 0;
+                box-sizing: border-box;
+            }
+            
+            body {
+                background: linear-gradient(135deg, #0F0F0F 0%, #1A1A1A 100%);
+                color: #fff;
+                font-family: 'Inter', 'Segoe UI', Arial, sans-serif;
+                display: flex;
+                flex-direction: column;
+                align-items: center; 
+                justify-content: center;
+                min-height: 100vh;
+                margin: 0;
+                overflow: hidden;
+            }
+            
+            .background-animation {
+                position: fixed;
+                top: 0;
+                left: 0;
+                width: 100%;
+                height: 100%;
+                z-index: -1;
+                opacity: 0.1;
+            }
+            
+            .background-animation::before {
+                content: '';
+                position: absolute;
+                top: 50%;
+                left: 50%;
+                width: 200px;
+                height: 200px;
+                background: radial-gradient(circle, #1DB954 0%, transparent 70%);
+                transform: translate(-50%, -50%);
+                animation: pulse 3s ease-in-out infinite;
+            }
+            
+            @keyframes pulse {
+                0%, 100% { transform: translate(-50%, -50%) scale(1); opacity: 0.3; }
+                50% { transform: translate(-50%, -50%) scale(1.2); opacity: 0.6; }
+            }
+            
+            .container {
+                background: rgba(26, 26, 26, 0.95);
+                backdrop-filter: blur(20px);
+                border: 1px solid rgba(29, 185, 84, 0.2);
+                border-radius: 24px;
+                box-shadow: 0 20px 60px rgba(0,0,0,0.5), 0 0 40px rgba(29, 185, 84, 0.1);
+                padding: 50px 40px;
+                text-align: center;
+                max-width: 500px;
+                width: 90%;
+                transform: translateY(20px);
+                animation: slideUp 0.8s ease-out forwards;
+            }
+            
+            @keyframes slideUp {
+                to {
+                    transform: translateY(0);
+                    opacity: 1;
+                }
+            }
+            
+            .icon {
+                width: 80px;
+                height: 80px;
+                margin-bottom: 25px;
+                filter: drop-shadow(0 8px 16px rgba(29, 185, 84, 0.3));
+                animation: iconFloat 2s ease-in-out infinite;
+            }
+            
+            @keyframes iconFloat {
+                0%, 100% { transform: translateY(0px); }
+                50% { transform: translateY(-10px); }
+            }
+            
+            h1 {
+                color: #1DB954;
+                margin-bottom: 15px;
+                font-size: 2.5em;
+                font-weight: 700;
+                text-shadow: 0 4px 8px rgba(29, 185, 84, 0.3);
+                animation: fadeIn 1s ease-out 0.3s both;
+            }
+            
+            p {
+                font-size: 1.1em;
+                margin-bottom: 0;
+                line-height: 1.6;
+                color: #CCCCCC;
+                font-weight: 400;
+                animation: fadeIn 1s ease-out 0.5s both;
+            }
+            
+            .success-check {
+                display: inline-block;
+                width: 60px;
+                height: 60px;
+                background: #1DB954;
+                border-radius: 50%;
+                margin-bottom: 20px;
+                position: relative;
+                animation: checkAppear 0.6s ease-out 0.8s both;
+            }
+            
+            .success-check::after {
+                content: '✓';
+                position: absolute;
+                top: 50%;
+                left: 50%;
+                transform: translate(-50%, -50%);
+                color: white;
+                font-size: 30px;
+                font-weight: bold;
+            }
+            
+            @keyframes checkAppear {
+                from {
+                    transform: scale(0) rotate(-180deg);
+                    opacity: 0;
+                }
+                to {
+                    transform: scale(1) rotate(0deg);
+                    opacity: 1;
+                }
+            }
+            
+            @keyframes fadeIn {
+                from {
+                    opacity: 0;
+                    transform: translateY(20px);
+                }
+                to {
+                    opacity: 1;
+                    transform: translateY(0);
+                }
+            }
+            
+            .spotify-link {
+                margin-top: 25px;
+                padding: 15px 25px;
+                background: rgba(29, 185, 84, 0.1);
+                border: 1px solid rgba(29, 185, 84, 0.3);
+                border-radius: 12px;
+                color: #1DB954;
+                font-family: 'Consolas', monospace;
+                font-size: 0.9em;
+                word-break: break-all;
+                animation: fadeIn 1s ease-out 0.7s both;
+            }
+            
+            .error h1 {
+                color: #E22134;
+                text-shadow: none;
+            }
+            
+            .error .success-check {
+                background: #E22134;
+            }
+            
+            .error .spotify-link {
+                color: #E22134;
+                background: rgba(226, 33, 52, 0.1);
+                border-color: rgba(226, 33, 52, 0.3);
+            }
+        </style>
+    </head>
+    <body data-dispatched="$dispatched">
+        <div class="background-animation"></div>
+        <div class="container">
+            <div class="success-check"></div>
+            <img src="$icon_url" alt="Spotag" class="icon">
+            <h1>Prêt !</h1>
+            <p>Le lien Spotify a été ouvert avec succès sur votre PC.<br><br>
+            Vous pouvez maintenant utiliser l'application Spotify sur votre ordinateur pour écouter votre musique.</p>
+            <div class="spotify-link" id="status">🎵 Spotify est en cours d'ouverture...</div>
+        </div>
+        <script>
+        (function () {
+            var status = document.getElementById("status");
+            
+            function showError(message) {
+                document.body.classList.add("error");
+                document.querySelector("h1").textContent = "Oups !";
+                document.querySelector("p").textContent = "Le lien n'a pas pu être ouvert sur votre PC.";
+                status.textContent = "⚠️ " + message;
+            }
+            
+            // Page servie depuis le cache du téléphone : le lien part en arrière-plan
+            var scan = location.pathname.indexOf("/t/") === 0 || location.search;
+            if (document.body.dataset.dispatched === "0" && scan) {
+                status.textContent = "⏳ Envoi au PC...";
+                fetch(location.pathname + location.search, {headers: {"Accept": "application/json"}, cache: "no-store"})
+                    .then(function (response) {
+                        if (response.ok) {
+                            status.textContent = "🎵 Spotify est en cours d'ouverture...";
+                        } else if (response.status === 429) {
+                            // Limite de scans atteinte : le lien est bon, il faut juste attendre
+                            var wait = parseInt(response.headers.get("Retry-After"), 10) || 1;
+                            showError("Trop de scans, réessayez dans " + wait + " s");
+                        } else if (response.status === 400) {
+                            showError("Lien Spotify invalide");
+                        } else if (response.status === 404) {
+                            showError("Tag inconnu sur ce PC");
+                        } else {
+                            showError("Le PC a répondu " + response.status);
+                        }
+                    })
+                    .catch(function () {
+                        showError("Impossible de joindre le PC");
+                    });
+            }
+            
+            // Les service workers ne fonctionnent qu'en HTTPS (ou sur localhost) :
+            // en HTTP sur le réseau local, ni manifeste ni service worker, la page
+            // reste celle servie par le PC à chaque scan
+            if ("serviceWorker" in navigator && window.isSecureContext) {
+                var manifest = document.createElement("link");
+                manifest.rel = "manifest";
+                manifest.href = "/manifest.webmanifest";
+                document.head.appendChild(manifest);
+                navigator.serviceWorker.register("/sw.js").catch(function () {});
+            }
+        })();
+        </script>
+    </body>
+    </html>
+    """)
+
+ASSETS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Fichiers servis depuis la mémoire sur /assets/<nom> (ignorés s'ils sont absents)
+ASSET_FILES = {
+    "spotag2.png": "image/png",
+}
+
+# Les URL des assets contiennent leur empreinte : ils peuvent être gardés pour toujours
+IMMUTABLE = "public, max-age=31536000, immutable"
+# La page de succès est revalidée à chaque scan pour que le lien soit bien ouvert
+REVALIDATE = "no-cache"
+
+COMPRESSIBLE_TYPES = ("text/", "application/json", "image/svg+xml")
+
+
+class CachedResponse:
+    """Corps de réponse précalculé : versions compressées, ETag et Cache-Control"""
+
+    def __init__(self, body, content_type, cache_control, vary="Accept-Encoding"):
+        self.content_type = content_type
+        self.cache_control = cache_control
+        self.vary = vary
+        self.etag = '"%s"' % hashlib.sha256(body).hexdigest()[:16]
+        self.bodies = {"identity": body}
+        if content_type.startswith(COMPRESSIBLE_TYPES):
+            self.bodies["gzip"] = gzip.compress(body, compresslevel=9, mtime=0)
+            if brotli is not None:
+                self.bodies["br"] = brotli.compress(body)
+
+    def negotiate(self, accept_encoding):
+        """Choisit l'encodage le plus compact accepté par le client"""
+        accepted = set()
+        for item in (accept_encoding or "").split(","):
+            coding, _, params = item.strip().partition(";")
+            if params.replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+                continue
+            accepted.add(coding.strip().lower())
+        for coding in ("br", "gzip"):
+            if coding in self.bodies and (coding in accepted or "*" in accepted):
+                return coding
+        return "identity"
+
+    def not_modified(self, if_none_match):
+        if not if_none_match:
+            return False
+        if if_none_match.strip() == "*":
+            return True
+        return self.etag in [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+
+    def headers(self, coding):
+        headers = [
+            ("ETag", self.etag),
+            ("Cache-Control", self.cache_control),
+            ("Vary", self.vary),
+        ]
+        if coding != "identity":
+            headers.append(("Content-Encoding", coding))
+        return headers
+
+    def to_response(self, extra_headers=()):
+        """Réponse Flask pour la requête courante (304 si l'ETag correspond)"""
+        coding = self.negotiate(request.headers.get("Accept-Encoding"))
+        headers = self.headers(coding) + list(extra_headers)
+        if self.not_modified(request.headers.get("If-None-Match")):
+            return Response(status=304, headers=headers)
+        return Response(self.bodies[coding], status=200, content_type=self.content_type,
+                        headers=headers)
+
+
+def json_body(payload):
+    return json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+# L'icône est affichée en 80 px : 160 px suffisent pour les écrans haute densité
+ICON_SIZE = 160
+
+
+def shrink_png(data, size=ICON_SIZE):
+    """Réduit une image PNG à la taille affichée (inchangée si PIL est absent)"""
+    return spotag_assets.shrunk_png(data, size)
+
+
+def load_assets():
+    """Charge les assets statiques en mémoire"""
+    assets = {}
+    for name, content_type in ASSET_FILES.items():
+        path = os.path.join(ASSETS_DIR, name)
+        if not os.path.exists(path):
+            continue
+        with open(path, "rb") as f:
+            data = f.read()
+        if content_type == "image/png":
+            data = shrink_png(data)
+        assets[name] = CachedResponse(data, content_type, IMMUTABLE)
+    return assets
+
+
+def asset_url(name):
+    """URL versionnée d'un asset : elle change quand le fichier change"""
+    version = ASSETS[name].etag.strip('"')
+    return f"/assets/{name}?v={version}"
+
+
+def render_success_page(dispatched=True):
+    """Rend la page de succès avec des assets servis par le PC (aucun accès à Internet)
+
+    Avec ``dispatched=False``, la page est la coquille gardée par le service
+    worker : elle envoie elle-même le lien au PC et affiche le résultat.
+    """
+    if "spotag2.png" in ASSETS:
+        icon_url = asset_url("spotag2.png")
+    else:
+        icon_url = "data:,"
+    return SUCCESS_PAGE_TEMPLATE.substitute(icon_url=icon_url,
+                                            dispatched="1" if dispatched else "0")
+
+
+def render_manifest():
+    """Manifeste de l'application web installable"""
+    manifest = {
+        "name": "Spotag",
+        "short_name": "Spotag",
+        "start_url": "/shell",
+        "scope": "/",
+        "display": "standalone",
+        "background_color": "#0F0F0F",
+        "theme_color": "#1DB954",
+        "icons": [],
+    }
+    if "spotag2.png" in ASSETS:
+        manifest["icons"].append({"src": asset_url("spotag2.png"), "sizes": f"{ICON_SIZE}x{ICON_SIZE}",
+                                  "type": "image/png"})
+    return json_body(manifest)
+
+
+# Service worker : répond aux scans avec la coquille en cache, sans attendre le réseau
+SERVICE_WORKER_TEMPLATE = string.Template("""\
+const CACHE = "spotag-$version";
+const SHELL = "/shell";
+const PRECACHE = $precache;
+
+self.addEventListener("install", function (event) {
+    // Seule la coquille est indispensable : un asset manquant n'empêche pas l'installation
+    event.waitUntil(caches.open(CACHE)
+        .then(function (cache) {
+            return cache.add(SHELL).then(function () {
+                return Promise.all(PRECACHE.filter(function (url) { return url !== SHELL; })
+                    .map(function (url) { return cache.add(url).catch(function () {}); }));
+            });
+        })
+        .then(function () { return self.skipWaiting(); }));
+});
+
+self.addEventListener("activate", function (event) {
+    event.waitUntil(caches.keys()
+        .then(function (keys) {
+            return Promise.all(keys.filter(function (key) { return key !== CACHE; })
+                .map(function (key) { return caches.delete(key); }));
+        })
+        .then(function () { return self.clients.claim(); }));
+});
+
+self.addEventListener("fetch", function (event) {
+    var url = new URL(event.request.url);
+    var scan = url.pathname === "/spotify" || url.pathname.indexOf("/t/") === 0;
+    if (event.request.mode === "navigate" && scan) {
+        // Sans coquille en cache, le serveur ouvre le lien et renvoie la page complète
+        event.respondWith(caches.match(SHELL).then(function (shell) {
+            return shell || fetch(event.request);
+        }));
+    } else if (url.pathname.indexOf("/assets/") === 0) {
+        event.respondWith(caches.match(event.request).then(function (cached) {
+            return cached || fetch(event.request);
+        }));
+    }
+});
+""")
+
+
+def render_service_worker(shell_etag):
+    precache = ["/shell"] + [asset_url(name) for name in ASSETS]
+    return SERVICE_WORKER_TEMPLATE.substitute(version=shell_etag.strip('"'),
+                                              precache=json.dumps(precache)).encode("utf-8")
+
+
+ASSETS = load_assets()
+SUCCESS_PAGE = render_success_page()
+# La réponse de /spotify dépend aussi des en-têtes Accept et Prefer
+SCAN_VARY = "Accept, Accept-Encoding, Prefer"
+SUCCESS_RESPONSE = CachedResponse(SUCCESS_PAGE.encode("utf-8"), "text/html; charset=utf-8",
+                                  REVALIDATE, vary=SCAN_VARY)
+SHELL_RESPONSE = CachedResponse(render_success_page(dispatched=False).encode("utf-8"),
+                                "text/html; charset=utf-8", REVALIDATE)
+MANIFEST_RESPONSE = CachedResponse(render_manifest(), "application/manifest+json", REVALIDATE)
+SERVICE_WORKER_RESPONSE = CachedResponse(render_service_worker(SHELL_RESPONSE.etag),
+                                         "application/javascript", REVALIDATE)
+
+# Formes de réponse de /spotify : page complète, JSON compact ou 204 sans corps
+SCAN_FORMATS = ("html", "json", "minimal")
+
+
+def _media_quality(accept, media_type):
+    """Qualité (q) donnée à un type précis dans un en-tête Accept, 0 s'il est absent"""
+    for item in accept.split(","):
+        media, _, params = item.strip().partition(";")
+        if media.strip().lower() != media_type:
+            continue
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    return float(value)
+                except ValueError:
+                    return 0.0
+        return 1.0
+    return 0.0
+
+
+def negotiate_format(format_param=None, accept=None, prefer=None):
+    """Choisit la forme de réponse : ?format=, puis Prefer: return=minimal, puis Accept"""
+    if format_param in SCAN_FORMATS:
+        return format_param
+    if prefer_minimal(prefer):
+        return "minimal"
+    if accept and _media_quality(accept, "application/json") > _media_quality(accept, "text/html"):
+        return "json"
+    return "html"
+
+
+def prefer_minimal(prefer):
+    return "return=minimal" in (prefer or "").replace(" ", "").lower()
+
+
+MISSING_LINK_JSON = json_body({"status": "error", "error": "missing link"})
+UNKNOWN_TAG_JSON = json_body({"status": "error", "error": "unknown tag"})
+INVALID_LINK_JSON = json_body({"status": "error", "error": "invalid link"})
+HEALTHY_JSON = json_body({"status": "ok"})
+# « Adresse » du lecteur NFC USB pour le contrôle d'admission
+READER_CLIENT = "reader"
+
+
+def admission_key(link):
+    """Clé de limitation par lien : l'URI canonique, pour que toutes les formes comptent ensemble"""
+    if not link:
+        return link
+    return spotag_links.canonical_uri(link) or link
+
+
+def scan_headers(item):
+    """En-têtes communs aux réponses d'un scan : identifiant et temps de mise en file"""
+    return [
+        ("X-Dispatch-Id", item.id),
+        ("Server-Timing", f'dispatch;dur={item.submit_ms:.3f};desc="{item.state}"'),
+    ]
+
+
+def scan_json(item):
+    return json_body({
+        "status": "ok",
+        "id": item.id,
+        "link": item.link,
+        "state": item.state,
+        "coalesced_with": item.coalesced_with,
+        "submit_ms": round(item.submit_ms, 3),
+    })
+
+def rejection_parts(response_format, rejection):
+    """Type, corps et en-têtes du 429 renvoyé à une requête refusée"""
+    headers = [("Retry-After", rejection.retry_after_header), ("Cache-Control", "no-store")]
+    if response_format == "json":
+        body = json_body({"status": "error", "error": "too many requests",
+                          "reason": rejection.reason,
+                          "retry_after": round(rejection.retry_after, 3)})
+        return "application/json", body, headers
+    return "text/plain; charset=utf-8", b"Too many requests", headers
+
+
+def handle_link(link):
+    """Confie le lien à la file d'ouverture et retourne tout de suite son élément"""
+    return dispatcher.submit(link)
+
+def reader_scan(link):
+    """Lien lu sur le lecteur NFC USB : mêmes limites que /spotify ; False si refusé"""
+    rejection = admission.admit(READER_CLIENT, admission_key(link))
+    if rejection is not None:
+        print(f"⚠️ Scan du lecteur NFC refusé ({rejection.reason}), "
+              f"réessayez dans {rejection.retry_after_header} s")
+        return False
+    try:
+        return handle_link(link)
+    finally:
+        admission.release()
+
+def lookup_tag(code):
+    """URI d'un code court, ou None s'il est inconnu ou si le registre est fermé"""
+    if registry is None:
+        return None
+    return registry.lookup(code)
+
+@app.route("/spotify", methods=["GET", "HEAD"])
+def open_spotify():
+    return scan_request(request.args.get("link"))
+
+@app.route("/t/<code>", methods=["GET", "HEAD"])
+def open_tag(code):
+    """Tag à code court : l'URI est lue dans le registre"""
+    uri = lookup_tag(code)
+    if uri is None:
+        if negotiate_format(request.args.get("format"), request.headers.get("Accept"),
+                            request.headers.get("Prefer")) == "json":
+            return Response(UNKNOWN_TAG_JSON, status=404, content_type="application/json")
+        return "Unknown tag", 404
+    return scan_request(uri)
+
+def scan_request(link):
+    response_format = negotiate_format(request.args.get("format"),
+                                       request.headers.get("Accept"),
+                                       request.headers.get("Prefer"))
+    rejection = admission.admit(request.remote_addr, admission_key(link))
+    if rejection is not None:
+        content_type, body, headers = rejection_parts(response_format, rejection)
+        return Response(body, status=429, content_type=content_type, headers=headers)
+    try:
+        return scan_response(response_format, link)
+    finally:
+        admission.release()
+
+def scan_response(response_format, link):
+    if not link:
+        if response_format == "json":
+            return Response(MISSING_LINK_JSON, status=400, content_type="application/json")
+        return "Missing link", 400
+    uri = spotag_links.canonical_uri(link)
+    if uri is None:
+        if response_format == "json":
+            return Response(INVALID_LINK_JSON, status=400, content_type="application/json")
+        return "Invalid link", 400
+    item = handle_link(uri)
+    headers = scan_headers(item)
+    if response_format == "minimal":
+        headers.append(("Vary", SCAN_VARY))
+        if prefer_minimal(request.headers.get("Prefer")):
+            headers.append(("Preference-Applied", "return=minimal"))
+        response = Response(status=204, headers=headers)
+        del response.headers["Content-Type"]
+        return response
+    if response_format == "json":
+        headers.append(("Vary", SCAN_VARY))
+        headers.append(("Cache-Control", "no-store"))
+        return Response(scan_json(item), status=200, content_type="application/json",
+                        headers=headers)
+    return SUCCESS_RESPONSE.to_response(headers)
+
+def process_stats():
+    """Sections de /stats tenues par le processus qui ouvre les liens
+
+    Dans un worker prefork, elles sont demandées au processus principal.
+    """
+    query = getattr(dispatcher, "query", None)
+    if query is not None:
+        return query("stats", None) or {}
+    stats = {"dispatch": dispatcher.stats()}
+    if launcher is not None:
+        stats["launcher"] = launcher.stats()
+    if prewarmer is not None and prewarmer.enabled:
+        stats["prewarm"] = prewarmer.stats()
+    if registry is not None:
+        stats["registry"] = {"tags": len(registry)}
+    if reader is not None:
+        stats["reader"] = reader.stats()
+    if ui is not None:
+        stats["ui"] = ui.stats()
+    return stats
+
+def answer_query(kind, argument):
+    """Réponse du processus principal à un worker prefork (ForwardingDispatcher.query)"""
+    if kind == "dispatch":
+        item = dispatcher.get(argument)
+        return item.to_dict() if item is not None else None
+    if kind == "ready":
+        return dispatcher.ready()
+    if kind == "stats":
+        return process_stats()
+    return None
+
+@app.route("/stats")
+def server_stats():
+    """Compteurs de la file d'ouverture et des requêtes refusées
+
+    En mode prefork, ``admission`` ne compte que le worker qui a répondu
+    (les limites s'appliquent par processus) ; le reste vient du processus
+    principal.
+    """
+    stats = process_stats()
+    stats["admission"] = admission.stats()
+    return Response(json_body(stats), status=200, content_type="application/json",
+                    headers=[("Cache-Control", "no-store")])
+
+def readiness():
+    """État de chaque étape du démarrage : port lié, file d'ouverture active"""
+    return {"listening": listening, "dispatcher": dispatcher.ready()}
+
+@app.route("/healthz", methods=["GET", "HEAD"])
+def health():
+    """Le processus répond (vivacité)"""
+    return Response(HEALTHY_JSON, status=200, content_type="application/json",
+                    headers=[("Cache-Control", "no-store")])
+
+@app.route("/readyz", methods=["GET", "HEAD"])
+def ready():
+    """200 quand les scans sont acceptés et ouverts, 503 pendant le démarrage"""
+    checks = readiness()
+    is_ready = all(checks.values())
+    body = json_body({"status": "ready" if is_ready else "starting", "checks": checks})
+    return Response(body, status=200 if is_ready else 503, content_type="application/json",
+                    headers=[("Cache-Control", "no-store")])
+
+@app.route("/dispatch/<dispatch_id>")
+def dispatch_status(dispatch_id):
+    """Attente et durée d'ouverture mesurées pour un scan"""
+    item = dispatcher.get(dispatch_id)
+    if item is None:
+        return Response(json_body({"status": "error", "error": "unknown dispatch"}),
+                        status=404, content_type="application/json")
+    return Response(json_body(item.to_dict()), status=200, content_type="application/json",
+                    headers=[("Cache-Control", "no-store")])
+
+@app.route("/shell")
+def app_shell():
+    return SHELL_RESPONSE.to_response()
+
+@app.route("/manifest.webmanifest")
+def web_manifest():
+    return MANIFEST_RESPONSE.to_response()
+
+@app.route("/sw.js")
+def service_worker():
+    return SERVICE_WORKER_RESPONSE.to_response([("Service-Worker-Allowed", "/")])
+
+@app.route("/assets/<name>")
+def static_asset(name):
+    asset = ASSETS.get(name)
+    if asset is None:
+        return "Not found", 404
+    return asset.to_response()
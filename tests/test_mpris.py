@@ -0,0 +1,82 @@
+"""Backend "mpris" contre le faux lecteur tools/mpris_stub.py, sur un bus de session privé"""
+import os
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+import spotag_launcher
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STUB = os.path.join(ROOT, "tools", "mpris_stub.py")
+LINK = "spotify:track:4uLU6hMCjMI75M1A2tKUQC"
+
+pytestmark = pytest.mark.skipif(
+    spotag_launcher.open_dbus_connection is None or shutil.which("dbus-daemon") is None,
+    reason="jeepney et dbus-daemon sont nécessaires")
+
+
+class RecordingBackend:
+    """Backend de secours qui retient les liens au lieu de les ouvrir"""
+    name = "recording"
+
+    def __init__(self):
+        self.links = []
+
+    def open(self, link):
+        self.links.append(link)
+
+
+@pytest.fixture
+def session_bus():
+    """Adresse d'un dbus-daemon de session lancé pour le test"""
+    daemon = subprocess.Popen(["dbus-daemon", "--session", "--nofork", "--print-address=1"],
+                              stdout=subprocess.PIPE, text=True)
+    try:
+        address = daemon.stdout.readline().strip()
+        assert address, "dbus-daemon n'a pas donné d'adresse"
+        yield address
+    finally:
+        daemon.terminate()
+        daemon.wait(timeout=5)
+
+
+@pytest.fixture
+def stub(session_bus):
+    """Faux lecteur qui prend le nom MPRIS de Spotify et répond à un OpenUri"""
+    env = dict(os.environ, DBUS_SESSION_BUS_ADDRESS=session_bus)
+    proc = subprocess.Popen([sys.executable, STUB, "--count", "1"], env=env,
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    try:
+        ready = proc.stdout.readline()
+        assert "prêt" in ready, proc.stderr.read()
+        yield proc
+    finally:
+        proc.kill()
+        proc.wait(timeout=5)
+
+
+def test_open_uri_reaches_player(session_bus, stub):
+    fallback = RecordingBackend()
+    backend = spotag_launcher.MprisBackend(bus=session_bus, fallback=fallback)
+    try:
+        backend.open(LINK)
+    finally:
+        backend.close()
+    assert stub.stdout.readline().strip().endswith(f"OpenUri: {LINK}")
+    assert stub.wait(timeout=5) == 0
+    assert fallback.links == []
+    assert backend.stats() == {"fallbacks": 0}
+
+
+def test_missing_player_uses_fallback(session_bus):
+    fallback = RecordingBackend()
+    backend = spotag_launcher.MprisBackend(bus_name="org.mpris.MediaPlayer2.absent",
+                                           bus=session_bus, fallback=fallback)
+    try:
+        backend.open(LINK)
+    finally:
+        backend.close()
+    assert fallback.links == [LINK]
+    assert backend.stats() == {"fallbacks": 1}
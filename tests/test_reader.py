@@ -0,0 +1,100 @@
+"""Chemin du lecteur NFC USB sans matériel : tags enregistrés rejoués par le lecteur simulé"""
+import pytest
+
+import spotag_limits
+import spotag_ndef
+import spotag_reader
+import spotag_registry
+import spotag_web
+
+TRACK = "spotify:track:4uLU6hMCjMI75M1A2tKUQC"
+ALBUM = "spotify:album:1ATL5GLyefJaxhQzSPVrLX"
+PLAYLIST = "spotify:playlist:37i9dQZF1DXcBWIGoYBM5M"
+
+
+class RecordingDispatcher:
+    """File d'ouverture qui retient les liens au lieu de les ouvrir"""
+
+    def __init__(self):
+        self.links = []
+
+    def submit(self, link):
+        self.links.append(link)
+        return object()
+
+
+def write_tag(directory, name, url, container="ndef"):
+    """Tag enregistré comme spotag_ndef.py (.ndef) ou spotag_reader.py --record (.bin)"""
+    message = spotag_ndef.uri_record(url)
+    if container == "ndef":
+        (directory / f"{name}.ndef").write_bytes(message)
+    else:
+        (directory / f"{name}.bin").write_bytes(spotag_ndef.tlv(message))
+
+
+@pytest.fixture
+def web(tmp_path, monkeypatch):
+    """spotag_web avec un registre temporaire, une file factice et des limites serrées"""
+    registry = spotag_registry.TagRegistry(str(tmp_path / "tags.db"))
+    registry.add(ALBUM, code="k3")
+    dispatcher = RecordingDispatcher()
+    monkeypatch.setattr(spotag_web, "registry", registry)
+    monkeypatch.setattr(spotag_web, "dispatcher", dispatcher)
+    # Un seul scan par lien, sans recharge pendant le test
+    monkeypatch.setattr(spotag_web, "admission", spotag_limits.AdmissionController(
+        ip_rate=1000, ip_burst=1000, uri_rate=0.001, uri_burst=1))
+    yield dispatcher
+    registry.close()
+
+
+def replay(directory):
+    """Rejoue le dossier jusqu'au bout comme le service démarré par spotag_service"""
+    reader = spotag_reader.open_reader("simulated", replay_path=str(directory))
+    service = spotag_reader.ReaderService(reader, spotag_web.reader_scan,
+                                          lookup_tag=spotag_web.lookup_tag, poll_interval=0)
+    service.start()
+    service._thread.join(timeout=10)
+    assert not service._thread.is_alive(), "le lecteur simulé ne s'est pas arrêté"
+    return service
+
+
+def test_replay_decodes_uri_records(tmp_path, web):
+    tags = tmp_path / "tags"
+    tags.mkdir()
+    write_tag(tags, "1", f"http://192.168.1.20:5000/spotify?link={TRACK}")
+    write_tag(tags, "2", "https://open.spotify.com/playlist/37i9dQZF1DXcBWIGoYBM5M", "bin")
+
+    service = replay(tags)
+
+    assert web.links == [TRACK, PLAYLIST]
+    assert service.stats()["dispatched"] == 2
+
+
+def test_short_codes_are_resolved_by_the_registry(tmp_path, web):
+    tags = tmp_path / "tags"
+    tags.mkdir()
+    write_tag(tags, "1", "http://192.168.1.20:5000/t/K3", "bin")
+    write_tag(tags, "2", "http://192.168.1.20:5000/t/zz")
+
+    service = replay(tags)
+
+    assert web.links == [ALBUM]
+    stats = service.stats()
+    assert stats["dispatched"] == 1
+    assert stats["unreadable"] == 1
+
+
+def test_admission_rejects_repeated_scans(tmp_path, web):
+    tags = tmp_path / "tags"
+    tags.mkdir()
+    for name in ("1", "2", "3"):
+        write_tag(tags, name, f"http://192.168.1.20:5000/spotify?link={TRACK}")
+
+    service = replay(tags)
+
+    assert web.links == [TRACK]
+    stats = service.stats()
+    assert stats["dispatched"] == 1
+    assert stats["rejected"] == 2
+    assert spotag_web.admission.stats()["shed_uri"] == 2
+    assert spotag_web.admission.stats()["in_flight"] == 0
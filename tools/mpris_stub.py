@@ -0,0 +1,54 @@
+"""Faux lecteur MPRIS pour tester le backend "mpris" sans le client Spotify
+
+Prend le nom org.mpris.MediaPlayer2.spotify sur le bus de session et répond
+à OpenUri en affichant le lien reçu. Pour un bus isolé :
+
+    dbus-run-session -- sh -c "python tools/mpris_stub.py & python spotify-nfc.py"
+"""
+import argparse
+import sys
+from datetime import datetime
+
+from jeepney import HeaderFields, MessageType, new_error, new_method_return
+from jeepney.bus_messages import message_bus
+from jeepney.io.blocking import open_dbus_connection
+
+PLAYER_INTERFACE = "org.mpris.MediaPlayer2.Player"
+OBJECT_PATH = "/org/mpris/MediaPlayer2"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--name", default="org.mpris.MediaPlayer2.spotify")
+    parser.add_argument("--count", type=int, default=0,
+                        help="s'arrêter après N appels à OpenUri (0 : jamais)")
+    args = parser.parse_args(argv)
+
+    conn = open_dbus_connection(bus="SESSION")
+    reply = conn.send_and_get_reply(message_bus.RequestName(args.name))
+    if reply.body[0] != 1:
+        print(f"Impossible de prendre le nom {args.name}", file=sys.stderr)
+        return 1
+    print(f"Lecteur MPRIS factice prêt sur {args.name}", flush=True)
+
+    received = 0
+    while not args.count or received < args.count:
+        message = conn.receive()
+        if message.header.message_type != MessageType.method_call:
+            continue
+        fields = message.header.fields
+        if (fields.get(HeaderFields.path) == OBJECT_PATH
+                and fields.get(HeaderFields.interface) == PLAYER_INTERFACE
+                and fields.get(HeaderFields.member) == "OpenUri"):
+            received += 1
+            print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] OpenUri: {message.body[0]}",
+                  flush=True)
+            conn.send(new_method_return(message))
+        else:
+            conn.send(new_error(message, "org.freedesktop.DBus.Error.UnknownMethod"))
+    conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())